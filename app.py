@@ -24,6 +24,7 @@ logger = logging.getLogger(__name__)
 try:
     import config
     from core_analysis import run_analysis # Import aus core_analysis
+    from modules.model_registry import preload_models_in_background
 except ImportError as e:
      logger.critical(f"FEHLER beim Importieren der Kernkomponenten in app.py: {e}", exc_info=True)
      sys.exit(1)
@@ -37,6 +38,9 @@ if app.secret_key == "default_secret_key_change_me_in_production":
 # Lade JSON Config
 config.load_config_from_json()
 
+# Spacy-Modelle vorab laden (SPACY_PRELOAD_MODELS), damit der erste /analyze-Request nicht auf spacy.load wartet
+preload_models_in_background(config.SPACY_PRELOAD_MODELS)
+
 # --- Routen ---
 
 @app.route("/", methods=["GET"])
@@ -65,6 +69,7 @@ def analyze():
         include_clustering = request.form.get("cluster") == "true"
         include_sentiment = request.form.get("sentiment") == "true"
         reference_file = request.files.get("reference_file")
+        fetch_deadline_str = request.form.get("fetch_deadline", "").strip()
 
         logger.debug(f"Empfangene Formular-Optionen: NER={include_ner}, Cluster={include_clustering}, Sentiment={include_sentiment}") # Logge empfangene Optionen
 
@@ -77,6 +82,12 @@ def analyze():
         except ValueError:
             logger.warning(f"Ungültige Anzahl Ergebnisse erhalten: '{num_results_str}'")
             return jsonify({"success": False, "error": "Bitte geben Sie eine gültige Anzahl (1-100) ein."}), 400
+        try:
+            fetch_deadline = float(fetch_deadline_str) if fetch_deadline_str else None
+            if fetch_deadline is not None and fetch_deadline < 0: raise ValueError("Negative Deadline.")
+        except ValueError:
+            logger.warning(f"Ungültige Fetch-Deadline erhalten: '{fetch_deadline_str}'")
+            return jsonify({"success": False, "error": "Bitte geben Sie eine gültige Deadline in Sekunden (>= 0) ein."}), 400
 
         if not config.SERP_API_KEY:
              logger.error("SerpApi API Schlüssel nicht konfiguriert.")
@@ -112,7 +123,8 @@ def analyze():
             include_clustering=include_clustering, # Wird korrekt übergeben
             include_sentiment=include_sentiment, # Wird korrekt übergeben
             max_workers=5,
-            output_format="all"
+            output_format="all",
+            fetch_deadline_seconds=fetch_deadline # leer -> FETCH_DEADLINE_SECONDS aus der Konfiguration
         )
         logger.info("run_analysis über /analyze abgeschlossen.")
 
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# SEO-GAP-ANALYSIS/benchmarks/bench_cache_format.py
+"""
+Vergleicht Cache-Formate (legacy JSON mit indent=4, gerahmt unkomprimiert, gzip, zstd falls installiert):
+Bytes auf der Platte und Ladezeit pro Eintrag über load_from_cache.
+
+    python benchmarks/bench_cache_format.py                       # synthetischer Cache (400 Texte, 40 SERPs)
+    python benchmarks/bench_cache_format.py --from-cache output/cache   # vorhandene Einträge (.json) verwenden
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+import cache_utils
+from cache_utils import load_from_cache, save_to_cache, get_cache_path, decode_cache_data
+
+WORDS = ("Analyse Keyword Suchmaschine Inhalt Nutzer Ranking Wettbewerb Text Seite Optimierung Strategie Google "
+         "Marketing Backlink Qualität Struktur Überschrift Absatz Beispiel Daten Ergebnis Thema Frage Antwort die der "
+         "das und ist nicht mit für auf eine einen werden kann auch sich bei wie oder mehr sehr über").split()
+
+def synthetic_entries(num_texts: int, num_serps: int, seed: int = 42):
+    """Texte (3-25 KB, zipf-ähnliche Wortverteilung) und SERP-Antworten wie sie extractor/serp_api speichern."""
+    rng = random.Random(seed); weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+    for i in range(num_texts):
+        words = rng.choices(WORDS, weights=weights, k=rng.randint(400, 3500))
+        text = " ".join(words).replace(" und ", ". Und ", 3)
+        yield f"text_v2_{i:06d}", [text, None, {"etag": f'"{i:x}"', "content_hash": f"{i:064x}", "settings": "abc"}]
+    for i in range(num_serps):
+        organic = [{"title": f"Ergebnis {r}", "url": f"https://seite{r}.example/artikel-{i}-{r}", "snippet": " ".join(rng.choices(WORDS, k=25))} for r in range(10)]
+        yield f"serp_v2_{i:06d}", {"organic_results": organic, "related_questions": [f"Frage {q}?" for q in range(4)], "error": None}
+
+def existing_entries(cache_dir: str):
+    for name in sorted(os.listdir(cache_dir)):
+        if not name.endswith(".json"): continue
+        with open(os.path.join(cache_dir, name), 'rb') as f: data = decode_cache_data(f.read(), name)
+        yield name[:-len(".json")], data
+
+def run(entries, compression: str, repeats: int):
+    config.CACHE_COMPRESSION = compression; config.CACHE_BACKEND = "file"
+    with tempfile.TemporaryDirectory() as cache_dir:
+        config.CACHE_DIR = cache_dir
+        files = []
+        for name, data in entries:
+            cache_file = os.path.join(cache_dir, f"{name}.json"); save_to_cache(data, cache_file); files.append(cache_file)
+        size = sum(os.path.getsize(cache_file) for cache_file in files)
+        latencies = []
+        for _ in range(repeats):
+            for cache_file in files:
+                started = time.perf_counter(); load_from_cache(cache_file); latencies.append(time.perf_counter() - started)
+        return size, statistics.mean(latencies), statistics.quantiles(latencies, n=100)[94]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark der Cache-Formate")
+    parser.add_argument("--from-cache", metavar="DIR", help="Vorhandenes Cache-Verzeichnis als Datengrundlage.")
+    parser.add_argument("--texts", type=int, default=400); parser.add_argument("--serps", type=int, default=40)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    entries = list(existing_entries(args.from_cache) if args.from_cache else synthetic_entries(args.texts, args.serps))
+    formats = ["legacy", "none", "gzip"] + (["zstd"] if cache_utils.zstandard is not None else [])
+    print(f"{len(entries)} Einträge" + ("" if cache_utils.zstandard else " (zstandard nicht installiert, zstd übersprungen)"))
+    print(f"{'Format':<8} {'Bytes':>12} {'Faktor':>7} {'Laden Ø':>10} {'Laden p95':>10}")
+    baseline = None
+    for compression in formats:
+        size, mean, p95 = run(entries, compression, args.repeats); baseline = baseline or size
+        print(f"{compression:<8} {size:>12,} {baseline / size:>6.1f}x {mean * 1e6:>8.0f}µs {p95 * 1e6:>8.0f}µs")
+
+if __name__ == "__main__":
+    main()
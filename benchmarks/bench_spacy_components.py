@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# SEO-GAP-ANALYSIS/benchmarks/bench_spacy_components.py
+"""
+Durchsatz der Spacy-Vorverarbeitung mit vollständiger Pipeline (alle Komponenten, wie bisher) gegen die
+optionsabhängige Auswahl (ohne Parser, NER nur mit --ner), dazu die Zeit je Komponente aus get_nlp_stats.
+
+    python benchmarks/bench_spacy_components.py                     # de_core_news_sm, 100 synthetische Texte
+    python benchmarks/bench_spacy_components.py --model en_core_web_sm --docs 200 --from-cache output/cache
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+import modules.tf_idf as tfidf_module
+from modules.tf_idf import load_spacy_model, analyze_texts, get_nlp_stats
+from bench_spacy_pipe import synthetic_texts, cached_texts
+
+def measure(nlp, texts, include_ner: bool, disable_unused: bool, batch_size: int):
+    """Sekunden und Sekunden je Komponente für einen Durchlauf von analyze_texts (ein Prozess)."""
+    original = tfidf_module.disabled_components
+    if not disable_unused: tfidf_module.disabled_components = lambda nlp, include_ner=False: [] # alles ausführen wie bisher
+    try:
+        before = get_nlp_stats(); started = time.perf_counter()
+        result = analyze_texts(texts, nlp, include_ner=include_ner, batch_size=batch_size, n_process=1)
+        seconds = time.perf_counter() - started; after = get_nlp_stats()
+    finally: tfidf_module.disabled_components = original
+    components = {key[len("seconds_"):]: after[key] - before.get(key, 0.0) for key in after if key.startswith("seconds_")}
+    return seconds, {name: value for name, value in components.items() if value > 0}, [tokens for tokens, _ in result]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: nur benötigte Spacy-Komponenten ausführen")
+    parser.add_argument("--model", default=config.SPACY_MODEL); parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=config.SPACY_BATCH_SIZE)
+    parser.add_argument("--from-cache", metavar="DIR", help="Texte aus einem vorhandenen Cache-Verzeichnis verwenden.")
+    args = parser.parse_args()
+    config.NLP_CACHE_ENABLED = False # jeder Durchlauf soll Spacy messen, nicht den NLP-Cache (und keine nlp_v1-Einträge schreiben)
+    nlp = load_spacy_model(args.model)
+    if nlp is None: sys.exit(f"Spacy-Modell '{args.model}' nicht installiert (python -m spacy download {args.model}).")
+    texts = cached_texts(args.from_cache, args.docs) if args.from_cache else synthetic_texts(args.docs)
+    analyze_texts(texts[:2], nlp, include_ner=True, n_process=1) # Aufwärmen
+    print(f"Modell {args.model} ({', '.join(nlp.pipe_names)}), {len(texts)} Texte, Batchgröße {args.batch_size}")
+    for include_ner in (False, True):
+        full_seconds, full_components, full_tokens = measure(nlp, texts, include_ner, False, args.batch_size)
+        seconds, components, tokens = measure(nlp, texts, include_ner, True, args.batch_size)
+        if tokens != full_tokens: sys.exit("Abweichende Tokens zwischen vollständiger und reduzierter Pipeline!")
+        print(f"\nNER {'an' if include_ner else 'aus'}: vollständig {len(texts) / full_seconds:.1f} Docs/s, "
+              f"nur benötigte Komponenten {len(texts) / seconds:.1f} Docs/s ({full_seconds / seconds:.2f}x)")
+        print(f"  {'Komponente':<16} {'vollständig':>12} {'reduziert':>12}")
+        for name in full_components:
+            print(f"  {name:<16} {full_components[name]:>11.2f}s {components[name]:>11.2f}s" if name in components else f"  {name:<16} {full_components[name]:>11.2f}s {'-':>12}")
+
+if __name__ == "__main__":
+    main()
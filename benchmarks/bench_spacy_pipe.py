@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# SEO-GAP-ANALYSIS/benchmarks/bench_spacy_pipe.py
+"""
+Skalierung der Spacy-Vorverarbeitung: preprocess_text pro Text (bisheriger Weg) gegen preprocess_texts über nlp.pipe
+mit 1..N Prozessen, jeweils für 10, 50 und 100 Dokumente. Prüft nebenbei, dass beide Wege identische Tokens liefern.
+preprocess_texts nutzt höchstens so viele Prozesse, wie es Batches gibt (--batch-size klein wählen, um bei 10 Docs mehrere Kerne zu sehen).
+
+    python benchmarks/bench_spacy_pipe.py                          # de_core_news_sm, 1..os.cpu_count() Prozesse
+    python benchmarks/bench_spacy_pipe.py --docs 10 50 100 --max-processes 4 --batch-size 16
+    python benchmarks/bench_spacy_pipe.py --from-cache output/cache    # echte Texte (content_v1-Einträge) statt synthetischer
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+from cache_utils import load_from_cache, CONTENT_CACHE_TYPE
+from modules.tf_idf import load_spacy_model, preprocess_text, preprocess_texts
+
+WORDS = ("Analyse Keyword Suchmaschine Inhalt Nutzer Ranking Wettbewerb Text Seite Optimierung Strategie Google "
+         "Marketing Backlink Qualität Struktur Überschrift Absatz Beispiel Daten Ergebnis Thema Frage Antwort die der "
+         "das und ist nicht mit für auf eine einen werden kann auch sich bei wie oder mehr sehr über verbessert "
+         "analysiert schreiben gute schnelle neue 2024 https://example.com/seite").split()
+
+def synthetic_texts(count: int, seed: int = 42):
+    """Texte mit 300-1500 Wörtern in Sätzen zu 8-20 Wörtern (typische Länge extrahierter Ratgeberseiten)."""
+    rng = random.Random(seed); weights = [1 / (rank + 1) for rank in range(len(WORDS))]; texts = []
+    for _ in range(count):
+        sentences = []; remaining = rng.randint(300, 1500)
+        while remaining > 0:
+            length = min(remaining, rng.randint(8, 20)); remaining -= length
+            sentences.append(" ".join(rng.choices(WORDS, weights=weights, k=length)).capitalize() + ".")
+        texts.append(" ".join(sentences))
+    return texts
+
+def cached_texts(cache_dir: str, count: int):
+    config.CACHE_DIR = cache_dir; config.CACHE_BACKEND = "file"; texts = []
+    for name in sorted(os.listdir(cache_dir)):
+        if not name.startswith(f"{CONTENT_CACHE_TYPE}_"): continue
+        text = load_from_cache(os.path.join(cache_dir, name), allow_expired=True)
+        if isinstance(text, str) and text: texts.append(text)
+        if len(texts) >= count: break
+    return texts
+
+def timed(function):
+    started = time.perf_counter(); result = function(); return time.perf_counter() - started, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark der Batch-Vorverarbeitung (nlp.pipe)")
+    parser.add_argument("--model", default=config.SPACY_MODEL); parser.add_argument("--docs", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--max-processes", type=int, default=os.cpu_count() or 1); parser.add_argument("--batch-size", type=int, default=config.SPACY_BATCH_SIZE)
+    parser.add_argument("--from-cache", metavar="DIR", help="Texte aus einem vorhandenen Cache-Verzeichnis verwenden.")
+    args = parser.parse_args()
+    config.NLP_CACHE_ENABLED = False # jeder Durchlauf soll Spacy messen, nicht den NLP-Cache (und keine nlp_v1-Einträge schreiben)
+    nlp = load_spacy_model(args.model)
+    if nlp is None: sys.exit(f"Spacy-Modell '{args.model}' nicht installiert (python -m spacy download {args.model}).")
+    corpus = cached_texts(args.from_cache, max(args.docs)) if args.from_cache else synthetic_texts(max(args.docs))
+    preprocess_texts(corpus[:2], nlp, n_process=1) # Aufwärmen (Lazy-Init der Komponenten)
+    processes = sorted({1, 2, 4, 8, args.max_processes} & set(range(1, args.max_processes + 1)))
+    print(f"Modell {args.model}, Batchgröße {args.batch_size}, {len(corpus)} Texte verfügbar, {os.cpu_count()} CPUs")
+    print(f"{'Docs':>5} {'Weg':<14} {'Sekunden':>9} {'Docs/s':>8} {'Speedup':>8}")
+    for count in args.docs:
+        texts = corpus[:count]
+        baseline_seconds, expected = timed(lambda: [preprocess_text(text, nlp) for text in texts])
+        print(f"{len(texts):>5} {'pro Text':<14} {baseline_seconds:>9.2f} {len(texts) / baseline_seconds:>8.1f} {1.0:>7.2f}x")
+        for n_process in processes:
+            seconds, result = timed(lambda: preprocess_texts(texts, nlp, batch_size=args.batch_size, n_process=n_process))
+            if result != expected: sys.exit(f"Abweichende Tokens bei {count} Docs und {n_process} Prozessen!")
+            print(f"{len(texts):>5} {f'pipe n={n_process}':<14} {seconds:>9.2f} {len(texts) / seconds:>8.1f} {baseline_seconds / seconds:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
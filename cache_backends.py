@@ -0,0 +1,443 @@
+# SEO-GAP-ANALYSIS/cache_backends.py
+import os
+import time
+import atexit
+import queue
+import shutil
+import struct
+import sqlite3
+import threading
+import uuid
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import config
+from resp_client import RespClient, RespError
+
+logger = logging.getLogger(__name__)
+
+# Ein Eintrag wird über seinen Cache-Dateipfad angesprochen (wie bisher in cache_utils); die Backends speichern
+# die bereits serialisierten Bytes. Zeitstempel = Zeitpunkt des Schreibens bzw. letzten touch (entspricht mtime).
+
+class CacheEntryInfo(NamedTuple):
+    """Metadaten eines Eintrags für Statistik und Garbage Collection (expires_at nur, wenn das Backend sie speichert)."""
+    name: str
+    size: int
+    stored_at: float
+    accessed_at: float
+    expires_at: Optional[float]
+
+def cache_type_of(name: str) -> str:
+    """Cache-Typ aus dem Dateinamen, z.B. 'text_v2' aus 'text_v2_<md5>.json'."""
+    name = os.path.basename(name)
+    return name.rsplit("_", 1)[0] if "_" in name else name
+
+# Inhaltsadressierte Texte und daraus abgeleitete Ergebnisse (Extraktion aus Roh-HTML, Lemmata/Entitäten) veralten nicht:
+# gleicher Hash bedeutet gleicher Inhalt. Sie werden ohne TTL gelesen und nur per LRU verdrängt.
+NON_EXPIRING_CACHE_TYPES = frozenset({"content_v1", "extract_v1", "nlp_v1"})
+
+# Lesezugriffe werden gesammelt und gebündelt geschrieben (LRU-Reihenfolge für die Garbage Collection)
+ACCESS_FLUSH_THRESHOLD = 256
+
+class CacheBackend(ABC):
+    """Schnittstelle der Cache-Backends: Bytes pro Name lesen/schreiben, Alter abfragen, löschen."""
+    name = "base"
+    shared = False # True: mehrere Knoten teilen den Cache (Single-Flight über Leases)
+    failed_writes = 0 # asynchron geschriebene Einträge, die nicht gespeichert werden konnten (prozessweit)
+
+    def __init__(self):
+        self._pending_access: Dict[str, float] = {}; self._access_lock = threading.Lock()
+
+    @abstractmethod
+    def read(self, cache_file: str) -> Optional[Tuple[bytes, float]]: raise NotImplementedError
+    @abstractmethod
+    def write(self, cache_file: str, payload: bytes, ttl: float): raise NotImplementedError
+    @abstractmethod
+    def stored_at(self, cache_file: str) -> Optional[float]: raise NotImplementedError
+    @abstractmethod
+    def touch(self, cache_file: str) -> bool: raise NotImplementedError
+    @abstractmethod
+    def delete(self, cache_file: str) -> bool: raise NotImplementedError
+    @abstractmethod
+    def clear(self): raise NotImplementedError
+    @abstractmethod
+    def entries(self) -> Iterator[CacheEntryInfo]: raise NotImplementedError
+    @abstractmethod
+    def _write_access_times(self, accessed: Dict[str, float]): raise NotImplementedError
+
+    def exists(self, cache_file: str) -> bool: return self.stored_at(cache_file) is not None
+    def acquire_lease(self, cache_file: str, seconds: float) -> bool: return True
+    def release_lease(self, cache_file: str): pass
+
+    def read_many(self, cache_files: Iterable[str]) -> Dict[str, Tuple[bytes, float]]:
+        results = {}
+        for cache_file in cache_files:
+            entry = self.read(cache_file)
+            if entry is not None: results[cache_file] = entry
+        return results
+
+    def write_many(self, items: Iterable[Tuple[str, bytes, float]]):
+        for cache_file, payload, ttl in items: self.write(cache_file, payload, ttl)
+
+    def delete_many(self, cache_files: Iterable[str]) -> int:
+        return sum(1 for cache_file in cache_files if self.delete(cache_file))
+
+    def record_access(self, cache_file: str):
+        """Merkt einen Lesezugriff vor; geschrieben wird gebündelt."""
+        self.record_access_many({cache_file: time.time()})
+
+    def record_access_many(self, accessed: Dict[str, float]):
+        """Merkt mehrere Lesezugriffe vor (z.B. gesammelte Treffer der Speicher-Stufe)."""
+        with self._access_lock:
+            self._pending_access.update(accessed)
+            if len(self._pending_access) < ACCESS_FLUSH_THRESHOLD: return
+            accessed = self._pending_access; self._pending_access = {}
+        self._flush_access(accessed)
+
+    def flush_access(self):
+        with self._access_lock: accessed = self._pending_access; self._pending_access = {}
+        if accessed: self._flush_access(accessed)
+
+    def _flush_access(self, accessed: Dict[str, float]):
+        try: self._write_access_times(accessed)
+        except Exception as e: logger.warning(f"Zugriffszeiten im Cache nicht gespeichert: {e}")
+
+class FileCacheBackend(CacheBackend):
+    """
+    Eine Datei pro Eintrag im Cache-Verzeichnis (bisheriges Verhalten), Schreiben atomar über temporäre Datei.
+    Der letzte Lesezugriff steht in der atime der Datei, die mtime bleibt der Zeitpunkt des Schreibens.
+    """
+    name = "file"
+
+    def read(self, cache_file: str) -> Optional[Tuple[bytes, float]]:
+        try:
+            with open(cache_file, 'rb') as f: payload = f.read()
+            return payload, os.path.getmtime(cache_file)
+        except FileNotFoundError: return None
+
+    def write(self, cache_file: str, payload: bytes, ttl: float):
+        os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, 'wb') as f: f.write(payload)
+        os.replace(tmp_file, cache_file)
+
+    def stored_at(self, cache_file: str) -> Optional[float]:
+        try: return os.path.getmtime(cache_file)
+        except OSError: return None
+
+    def touch(self, cache_file: str) -> bool:
+        try: os.utime(cache_file, None); return True
+        except OSError as e: logger.warning(f"Fehler beim Erneuern der Cache-TTL für {cache_file}: {e}"); return False
+
+    def delete(self, cache_file: str) -> bool:
+        try: os.remove(cache_file); return True
+        except FileNotFoundError: return False
+
+    def clear(self):
+        # Sicherer: Inhalt löschen statt Verzeichnis selbst, falls Rechte fehlen
+        for filename in os.listdir(config.CACHE_DIR):
+            file_path = os.path.join(config.CACHE_DIR, filename)
+            try:
+                if os.path.isfile(file_path) or os.path.islink(file_path): os.unlink(file_path)
+                elif os.path.isdir(file_path): shutil.rmtree(file_path)
+            except Exception as e: logger.error(f'Fehler beim Löschen von {file_path} im Cache. Grund: {e}')
+
+    def entries(self) -> Iterator[CacheEntryInfo]:
+        if not os.path.isdir(config.CACHE_DIR): return
+        with os.scandir(config.CACHE_DIR) as scan:
+            for entry in scan:
+                if not entry.is_file() or entry.name.endswith(".tmp") or entry.name.startswith(SQLITE_FILENAME): continue
+                try: stat = entry.stat()
+                except OSError: continue
+                yield CacheEntryInfo(entry.path, stat.st_size, stat.st_mtime, max(stat.st_atime, stat.st_mtime), None)
+
+    def _write_access_times(self, accessed: Dict[str, float]):
+        for cache_file, accessed_at in accessed.items():
+            try: os.utime(cache_file, (accessed_at, os.path.getmtime(cache_file)))
+            except OSError: continue # inzwischen gelöscht
+
+SQLITE_FILENAME = "cache.sqlite3"
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Alle Einträge in einer SQLite-Datei (WAL-Modus, Index auf Ablaufzeit). Schlüssel ist der Dateiname des
+    Cache-Pfads, Verbindungen sind pro Thread; parallele Schreiber (Threads, Flask-Worker-Prozesse) warten
+    über busy_timeout aufeinander statt zu scheitern.
+    """
+    name = "sqlite"
+    COLUMNS = "key, cache_type, value, stored_at, expires_at, size, accessed_at"
+    cache_type_of = staticmethod(cache_type_of)
+
+    def __init__(self, db_path: str):
+        super().__init__()
+        self.db_path = db_path; self._local = threading.local()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, cache_type TEXT NOT NULL, value BLOB NOT NULL, "
+                         "stored_at REAL NOT NULL, expires_at REAL NOT NULL, size INTEGER NOT NULL, accessed_at REAL)")
+            if "accessed_at" not in [row[1] for row in conn.execute("PRAGMA table_info(entries)")]: # Datenbank einer älteren Version
+                conn.execute("ALTER TABLE entries ADD COLUMN accessed_at REAL"); conn.execute("UPDATE entries SET accessed_at = stored_at")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL"); conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key_of(cache_file: str) -> str: return os.path.basename(cache_file)
+
+    def row_for(self, cache_file: str, payload: bytes, ttl: float, stored_at: Optional[float] = None) -> Tuple:
+        key = self.key_of(cache_file); now = time.time() if stored_at is None else stored_at
+        return key, cache_type_of(key), sqlite3.Binary(payload), now, now + ttl, len(payload), now
+
+    def read(self, cache_file: str) -> Optional[Tuple[bytes, float]]:
+        row = self._connection().execute("SELECT value, stored_at FROM entries WHERE key = ?", (self.key_of(cache_file),)).fetchone()
+        return (bytes(row[0]), row[1]) if row else None
+
+    def read_many(self, cache_files: Iterable[str]) -> Dict[str, Tuple[bytes, float]]:
+        by_key = {self.key_of(cache_file): cache_file for cache_file in cache_files}; keys = list(by_key); results = {}
+        for start in range(0, len(keys), 500): # SQLite-Limit für Parameter pro Abfrage
+            chunk = keys[start:start + 500]
+            rows = self._connection().execute(f"SELECT key, value, stored_at FROM entries WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+            for key, value, stored_at in rows: results[by_key[key]] = (bytes(value), stored_at)
+        return results
+
+    def write(self, cache_file: str, payload: bytes, ttl: float):
+        self.write_rows([self.row_for(cache_file, payload, ttl)])
+
+    def write_many(self, items: Iterable[Tuple[str, bytes, float]]):
+        self.write_rows([self.row_for(cache_file, payload, ttl) for cache_file, payload, ttl in items])
+
+    def write_rows(self, rows: List[Tuple]):
+        """Schreibt Zeilen (siehe COLUMNS bzw. row_for) in einer Transaktion."""
+        with self._connection() as conn: conn.executemany(f"INSERT OR REPLACE INTO entries ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def stored_at(self, cache_file: str) -> Optional[float]:
+        row = self._connection().execute("SELECT stored_at FROM entries WHERE key = ?", (self.key_of(cache_file),)).fetchone()
+        return row[0] if row else None
+
+    def touch(self, cache_file: str) -> bool:
+        now = time.time()
+        with self._connection() as conn:
+            updated = conn.execute("UPDATE entries SET expires_at = expires_at - stored_at + ?, stored_at = ?, accessed_at = ? WHERE key = ?",
+                                   (now, now, now, self.key_of(cache_file))).rowcount
+        return updated > 0
+
+    def delete(self, cache_file: str) -> bool:
+        with self._connection() as conn: return conn.execute("DELETE FROM entries WHERE key = ?", (self.key_of(cache_file),)).rowcount > 0
+
+    def delete_many(self, cache_files: Iterable[str]) -> int:
+        with self._connection() as conn:
+            return conn.executemany("DELETE FROM entries WHERE key = ?", [(self.key_of(cache_file),) for cache_file in cache_files]).rowcount
+
+    def clear(self):
+        with self._connection() as conn: conn.execute("DELETE FROM entries")
+
+    def entries(self) -> Iterator[CacheEntryInfo]:
+        rows = self._connection().execute("SELECT key, size, stored_at, COALESCE(accessed_at, stored_at), expires_at FROM entries").fetchall()
+        for row in rows: yield CacheEntryInfo(*row)
+
+    def _write_access_times(self, accessed: Dict[str, float]):
+        with self._connection() as conn:
+            conn.executemany("UPDATE entries SET accessed_at = ? WHERE key = ?", [(accessed_at, self.key_of(cache_file)) for cache_file, accessed_at in accessed.items()])
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Geteilter Cache über einen Server mit Redis-Protokoll (mehrere App-Knoten). Werte = Header (stored_at, ttl) + Bytes;
+    der Server lässt Einträge erst nach TTL + MAX_CACHE_AGE_SECONDS verfallen, damit abgelaufene Texte noch
+    revalidiert werden können. Schreiben läuft asynchron über einen Hintergrund-Thread (gebündelt per Pipeline),
+    noch nicht geschriebene Einträge sind lokal sofort lesbar. Gleichzeitige Lesezugriffe auf denselben Schlüssel
+    werden zu einer Anfrage zusammengefasst; Leases (SET NX) sorgen dafür, dass nur ein Knoten einen Miss füllt.
+    """
+    name = "redis"
+    shared = True
+    HEADER = struct.Struct(">dd")
+    WRITE_BATCH = 100
+    # Lease nur löschen, wenn sie noch diesem Knoten gehört (nach Ablauf kann ein anderer Knoten sie halten)
+    RELEASE_LEASE_SCRIPT = 'if redis.call("GET", KEYS[1]) == ARGV[1] then return redis.call("DEL", KEYS[1]) end return 0'
+
+    def __init__(self, url: str, prefix: str, client: Optional[RespClient] = None):
+        super().__init__()
+        self.url = url; self.prefix = prefix; self.client = client or RespClient(url)
+        self._pending: Dict[str, Tuple[bytes, float, float, bool]] = {} # Schlüssel -> (Bytes, stored_at, ttl, gesendet)
+        self._pending_lock = threading.Lock()
+        self._inflight: Dict[str, Tuple[threading.Event, list]] = {}; self._inflight_lock = threading.Lock()
+        self._queue: "queue.Queue[str]" = queue.Queue(); self._token = uuid.uuid4().hex
+        threading.Thread(target=self._writer, name="cache-redis-writer", daemon=True).start()
+
+    def key_of(self, cache_file: str) -> str: return self.prefix + os.path.basename(cache_file)
+    def lease_key(self, cache_file: str) -> str: return f"{self.prefix}lease:{os.path.basename(cache_file)}"
+
+    def _pack(self, payload: bytes, stored_at: float, ttl: float) -> bytes: return self.HEADER.pack(stored_at, ttl) + payload
+
+    def _expiry_ms(self, ttl: float) -> int: return max(1, int((ttl + config.MAX_CACHE_AGE_SECONDS) * 1000))
+
+    def _release_command(self, cache_file: str) -> Tuple:
+        return ("EVAL", self.RELEASE_LEASE_SCRIPT, 1, self.lease_key(cache_file), self._token)
+
+    def _unpack(self, value: Optional[bytes]) -> Optional[Tuple[bytes, float]]:
+        if value is None or len(value) < self.HEADER.size: return None
+        stored_at, _ = self.HEADER.unpack_from(value); return value[self.HEADER.size:], stored_at
+
+    # --- asynchrones Schreiben ---
+    def _writer(self):
+        while True:
+            keys = [self._queue.get()]
+            while len(keys) < self.WRITE_BATCH:
+                try: keys.append(self._queue.get_nowait())
+                except queue.Empty: break
+            try: self._write_batch(keys)
+            except Exception as e:
+                logger.warning(f"Schreiben in den geteilten Cache fehlgeschlagen ({len(keys)} Einträge): {e}")
+                self.failed_writes += len(keys); self._release_leases(keys) # wartende Knoten füllen selbst statt bis zum Lease-Ablauf
+            finally:
+                with self._pending_lock:
+                    for key in keys:
+                        entry = self._pending.get(key)
+                        if entry is not None and entry[3]: del self._pending[key] # nur, wenn nicht erneut geschrieben
+                for _ in keys: self._queue.task_done()
+
+    def _write_batch(self, keys: List[str]):
+        commands = []
+        with self._pending_lock:
+            for key in dict.fromkeys(keys):
+                entry = self._pending.get(key)
+                if entry is None or entry[3]: continue
+                payload, stored_at, ttl, _ = entry; self._pending[key] = (payload, stored_at, ttl, True) # Stand wird geschrieben
+                expiry = () if cache_type_of(key[len(self.prefix):]) in NON_EXPIRING_CACHE_TYPES else ("PX", self._expiry_ms(ttl))
+                commands.append(("SET", key, self._pack(payload, stored_at, ttl), *expiry)) # ohne Ablauf: Verdrängung über maxmemory
+                commands.append(self._release_command(key[len(self.prefix):])) # Lease des Füllers endet mit dem Schreiben
+        for command, reply in zip(commands, self.client.pipeline(commands)):
+            if isinstance(reply, RespError) and command[0] == "SET": raise reply
+            if isinstance(reply, RespError): logger.debug(f"Lease für {command[3]} nicht freigegeben: {reply}")
+
+    def _release_leases(self, keys: List[str]):
+        try: self.client.pipeline([self._release_command(key[len(self.prefix):]) for key in dict.fromkeys(keys)])
+        except (ConnectionError, RespError) as e: logger.debug(f"Leases von {len(keys)} Einträgen nicht freigegeben: {e}")
+
+    def flush_writes(self):
+        """Wartet, bis alle asynchronen Schreibvorgänge beim Server angekommen sind."""
+        self._queue.join()
+
+    # --- Schnittstelle ---
+    def read(self, cache_file: str) -> Optional[Tuple[bytes, float]]:
+        key = self.key_of(cache_file)
+        with self._pending_lock: entry = self._pending.get(key)
+        if entry is not None: return entry[0], entry[1]
+        with self._inflight_lock: # Single-Flight: gleichzeitige Leser desselben Schlüssels teilen eine Anfrage
+            inflight = self._inflight.get(key); leader = inflight is None
+            if leader: inflight = self._inflight[key] = (threading.Event(), [])
+        event, result = inflight
+        if not leader:
+            event.wait(self.client.timeout * 2)
+            if result: return result[0]
+        try:
+            value = self._unpack(self.client.execute("GET", key)); result.append(value); return value
+        finally:
+            if leader:
+                with self._inflight_lock: self._inflight.pop(key, None)
+                event.set()
+
+    def read_many(self, cache_files: Iterable[str]) -> Dict[str, Tuple[bytes, float]]:
+        results, remote = {}, []
+        with self._pending_lock:
+            for cache_file in cache_files:
+                entry = self._pending.get(self.key_of(cache_file))
+                if entry is not None: results[cache_file] = (entry[0], entry[1])
+                else: remote.append(cache_file)
+        for start in range(0, len(remote), 500):
+            chunk = remote[start:start + 500]
+            for cache_file, value in zip(chunk, self.client.execute("MGET", *[self.key_of(cache_file) for cache_file in chunk])):
+                unpacked = self._unpack(value)
+                if unpacked is not None: results[cache_file] = unpacked
+        return results
+
+    def write(self, cache_file: str, payload: bytes, ttl: float):
+        self.write_many([(cache_file, payload, ttl)])
+
+    def write_many(self, items: Iterable[Tuple[str, bytes, float]]):
+        now = time.time(); keys = []
+        with self._pending_lock:
+            for cache_file, payload, ttl in items:
+                key = self.key_of(cache_file); self._pending[key] = (payload, now, ttl, False); keys.append(key)
+        for key in keys: self._queue.put(key)
+
+    def stored_at(self, cache_file: str) -> Optional[float]:
+        key = self.key_of(cache_file)
+        with self._pending_lock: entry = self._pending.get(key)
+        if entry is not None: return entry[1]
+        header = self.client.execute("GETRANGE", key, 0, self.HEADER.size - 1)
+        return self.HEADER.unpack(header)[0] if header and len(header) == self.HEADER.size else None
+
+    def touch(self, cache_file: str) -> bool:
+        key = self.key_of(cache_file)
+        with self._pending_lock: entry = self._pending.get(key)
+        if entry is None:
+            value = self.client.execute("GET", key)
+            if value is None or len(value) < self.HEADER.size: return False
+            entry = (value[self.HEADER.size:], 0.0, self.HEADER.unpack_from(value)[1])
+        self.write_many([(cache_file, entry[0], entry[2])]); return True
+
+    def delete(self, cache_file: str) -> bool:
+        return self.delete_many([cache_file]) > 0
+
+    def delete_many(self, cache_files: Iterable[str]) -> int:
+        keys = [self.key_of(cache_file) for cache_file in cache_files]
+        if not keys: return 0
+        with self._pending_lock: pending_removed = sum(1 for key in keys if self._pending.pop(key, None) is not None)
+        return max(pending_removed, self.client.execute("DEL", *keys))
+
+    def clear(self):
+        self.flush_writes()
+        keys = self.client.scan_keys(self.prefix + "*")
+        for start in range(0, len(keys), 500): self.client.execute("DEL", *keys[start:start + 500])
+
+    def entries(self) -> Iterator[CacheEntryInfo]:
+        self.flush_writes()
+        keys = [key for key in self.client.scan_keys(self.prefix + "*") if not key.startswith(self.prefix + "lease:")]
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            replies = self.client.pipeline([command for key in chunk for command in (("GETRANGE", key, 0, self.HEADER.size - 1), ("STRLEN", key))])
+            for key, header, length in zip(chunk, replies[0::2], replies[1::2]):
+                if not isinstance(header, bytes) or len(header) != self.HEADER.size: continue # inzwischen verfallen
+                stored_at, ttl = self.HEADER.unpack(header)
+                yield CacheEntryInfo(key[len(self.prefix):], length - self.HEADER.size, stored_at, stored_at, stored_at + ttl)
+
+    def acquire_lease(self, cache_file: str, seconds: float) -> bool:
+        return self.client.execute("SET", self.lease_key(cache_file), self._token, "NX", "PX", max(1, int(seconds * 1000))) == "OK"
+
+    def release_lease(self, cache_file: str):
+        try: self.client.execute(*self._release_command(cache_file))
+        except (ConnectionError, RespError) as e: logger.debug(f"Lease für {cache_file} nicht freigegeben: {e}")
+
+    def _write_access_times(self, accessed: Dict[str, float]): pass # der Server verdrängt selbst (maxmemory-policy)
+
+_backends: Dict[Tuple[str, str], CacheBackend] = {}
+_backends_lock = threading.Lock()
+
+def get_cache_backend() -> CacheBackend:
+    """Backend laut config.CACHE_BACKEND ('file', 'sqlite' oder 'redis') für das aktuelle CACHE_DIR bzw. CACHE_REDIS_URL (wird wiederverwendet)."""
+    kind = config.CACHE_BACKEND
+    if kind not in ("file", "sqlite", "redis"):
+        raise ValueError(f"Unbekanntes Cache-Backend '{kind}' (erlaubt: file, sqlite, redis)")
+    location = f"{config.CACHE_REDIS_URL}#{config.CACHE_REDIS_PREFIX}" if kind == "redis" else config.CACHE_DIR
+    with _backends_lock:
+        backend = _backends.get((kind, location))
+        if backend is None:
+            if kind == "file": backend = FileCacheBackend()
+            elif kind == "sqlite": backend = SQLiteCacheBackend(os.path.join(config.CACHE_DIR, SQLITE_FILENAME))
+            else: backend = RedisCacheBackend(config.CACHE_REDIS_URL, config.CACHE_REDIS_PREFIX)
+            _backends[(kind, location)] = backend
+        return backend
+
+@atexit.register
+def flush_all_access():
+    """Schreibt vorgemerkte Zugriffszeiten aller Backends (auch beim Beenden des Prozesses)."""
+    with _backends_lock: backends = list(_backends.values())
+    for backend in backends:
+        backend.flush_access()
+        if isinstance(backend, RedisCacheBackend): backend.flush_writes()
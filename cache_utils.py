@@ -3,10 +3,19 @@ import os
 import hashlib
 import time
 import json
-from typing import Any
+import gzip
+import struct
+import copy
+import threading
+import atexit
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import fnmatch
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 import config
 import logging # NEU
-import shutil # Für clear_all_cache
+from cache_backends import get_cache_backend, cache_type_of, CacheEntryInfo, SQLiteCacheBackend, FileCacheBackend, SQLITE_FILENAME, NON_EXPIRING_CACHE_TYPES, ACCESS_FLUSH_THRESHOLD
+from modules.run_context import RunCounters, count_for_run
 
 # Logger für dieses Modul
 logger = logging.getLogger(__name__)
@@ -21,59 +30,541 @@ def get_cache_path(cache_type: str, key: str, extension: str = "json") -> str:
     filename = f"{cache_type}_{key}.{extension}"
     return os.path.join(config.CACHE_DIR, filename)
 
-def is_cache_valid(cache_file: str) -> bool:
-    """Überprüft, ob die Cache-Datei existiert und noch gültig ist."""
-    if not os.path.exists(cache_file): return False
-    try:
-        file_age = time.time() - os.path.getmtime(cache_file)
-        is_valid = file_age < config.MAX_CACHE_AGE_SECONDS
-        logger.debug(f"Cache check für {os.path.basename(cache_file)}: Alter={file_age:.0f}s, Gültig={is_valid}") # DEBUG Level
-        return is_valid
-    except OSError as e: logger.warning(f"Fehler beim Prüfen des Cache-Alters für {cache_file}: {e}"); return False
-
-def load_from_cache(cache_file: str) -> Any | None:
-    """Lädt Daten aus einer Cache-Datei."""
-    if not is_cache_valid(cache_file): return None
+# --- Negativ-Cache: TTL je Fehlerklasse ---
+# Vorübergehende Fehler (Timeouts, 5xx, Netzwerk) werden nur kurz gecacht, dauerhafte (4xx, kein HTML) lange.
+# Nicht aufgeführte Klassen (z.B. "extraction") nutzen MAX_CACHE_AGE_SECONDS.
+SHORT_TTL_ERROR_CLASSES = ("timeout", "server_error", "network", "empty", "unexpected")
+LONG_TTL_ERROR_CLASSES = ("client_error", "content_type")
+
+def negative_cache_ttl(error_class: Optional[str]) -> int:
+    """TTL in Sekunden für einen Negativ-Eintrag der angegebenen Fehlerklasse."""
+    if error_class in SHORT_TTL_ERROR_CLASSES: return config.NEGATIVE_CACHE_TTL_SHORT
+    if error_class in LONG_TTL_ERROR_CLASSES: return config.NEGATIVE_CACHE_TTL_LONG
+    return config.MAX_CACHE_AGE_SECONDS
+
+def cache_entry_ttl(data: Any) -> int:
+    """TTL eines Eintrags: Negativ-Einträge [None, fehler, {"error_class": ...}] nach Klasse, sonst MAX_CACHE_AGE_SECONDS."""
+    if isinstance(data, list) and len(data) == 3 and data[0] is None and isinstance(data[2], dict) and data[2].get("error_class"):
+        return negative_cache_ttl(data[2]["error_class"])
+    return config.MAX_CACHE_AGE_SECONDS
+
+# --- Speicher-Stufe (LRU, pro Prozess) vor dem Cache-Backend ---
+# Hält dekodierte Einträge samt Zeitstempel, Gültigkeit wird wie auf der Platte über cache_entry_ttl geprüft.
+# Treffer werden gesammelt und gebündelt als Lesezugriffe an das Backend gemeldet (LRU der Garbage Collection).
+# Löschungen über dieses Modul (clear_cache_for_query, clear_all_cache) entfernen die Einträge auch hier;
+# Änderungen anderer Prozesse sieht die Stufe erst nach Ablauf der TTL oder Verdrängung.
+class MemoryCacheTier:
+    """LRU-Cache mit Byte-Budget (Größe = unkomprimierte serialisierte Länge des Eintrags)."""
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes; self.bytes = 0
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._accessed: Dict[str, float] = {} # Treffer seit der letzten Meldung an das Backend
+        self._lock = threading.Lock()
+
+    def get(self, cache_file: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._entries.get(cache_file)
+            if entry is None: return None
+            self._entries.move_to_end(cache_file); self._accessed[cache_file] = time.time()
+        return copy.deepcopy(entry[0]), entry[1] # Kopie: Aufrufer dürfen die Daten verändern
+
+    def contains(self, cache_file: str) -> bool:
+        """Ohne Kopie und ohne als Zugriff zu zählen (für Existenz-/Alterprüfungen)."""
+        with self._lock: return cache_file in self._entries
+
+    def stored_at(self, cache_file: str) -> Optional[float]:
+        with self._lock:
+            entry = self._entries.get(cache_file)
+            return entry[1] if entry else None
+
+    def take_accessed(self, min_count: int = 0) -> Dict[str, float]:
+        """Gesammelte Treffer (und leert sie), sobald es mindestens min_count sind; sonst {}."""
+        with self._lock:
+            if not self._accessed or len(self._accessed) < min_count: return {}
+            accessed = self._accessed; self._accessed = {}
+            return accessed
+
+    def put(self, cache_file: str, data: Any, stored_at: float, size: int):
+        if size > self.max_bytes: self.pop(cache_file); return
+        data = copy.deepcopy(data)
+        with self._lock:
+            old = self._entries.pop(cache_file, None)
+            if old: self.bytes -= old[2]
+            self._entries[cache_file] = (data, stored_at, size); self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False); self.bytes -= evicted_size
+
+    def touch(self, cache_file: str, stored_at: float):
+        with self._lock:
+            entry = self._entries.get(cache_file)
+            if entry: self._entries[cache_file] = (entry[0], stored_at, entry[2])
+
+    def pop(self, cache_file: str):
+        with self._lock:
+            old = self._entries.pop(cache_file, None)
+            if old: self.bytes -= old[2]
+
+    def clear(self):
+        with self._lock: self._entries.clear(); self._accessed.clear(); self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock: return {"entries": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes}
+
+_memory_tier: Optional[MemoryCacheTier] = None
+_memory_tier_lock = threading.Lock()
+_tier_counters: Counter = Counter()
+
+def get_memory_tier() -> Optional[MemoryCacheTier]:
+    """Speicher-Stufe laut MEMORY_CACHE_BYTES (0 = aus); wird bei geändertem Budget neu angelegt."""
+    global _memory_tier
+    if config.MEMORY_CACHE_BYTES <= 0: return None
+    with _memory_tier_lock:
+        if _memory_tier is None or _memory_tier.max_bytes != config.MEMORY_CACHE_BYTES: _memory_tier = MemoryCacheTier(config.MEMORY_CACHE_BYTES)
+        return _memory_tier
+
+def _report_memory_access(tier: MemoryCacheTier, min_count: int = ACCESS_FLUSH_THRESHOLD):
+    accessed = tier.take_accessed(min_count)
+    if accessed: get_cache_backend().record_access_many(accessed)
+
+def flush_memory_access():
+    """Meldet alle gesammelten Treffer der Speicher-Stufe an das Backend (vor GC/Statistik und beim Beenden)."""
+    tier = _memory_tier
+    if tier is not None: _report_memory_access(tier, 0)
+
+atexit.register(flush_memory_access) # vor flush_all_access des Backends (atexit läuft in umgekehrter Reihenfolge)
+
+def _count_tier(name: str, count: int = 1):
+    with _memory_tier_lock: _tier_counters[name] += count
+    count_for_run("cache_tiers", name, count)
+
+def get_cache_tier_stats(run: Optional[RunCounters] = None) -> Dict[str, int]:
+    """
+    Treffer/Misses (kumuliert oder für einen Lauf) von Speicher- und Platten-Stufe (load_from_cache), beim geteilten Backend erhaltene Leases
+    und per Warten auf einen anderen Knoten gefüllte Misses, sowie aktuelle Belegung des Speichers und (prozessweit)
+    die im geteilten Cache nicht gespeicherten Einträge.
+    """
+    if run is not None: counters = run.snapshot("cache_tiers")
+    else:
+        with _memory_tier_lock: counters = Counter(_tier_counters)
+    stats = {name: counters[name] for name in ("memory_hits", "memory_misses", "disk_hits", "disk_misses", "shared_fill_leases", "shared_fill_waits")}
+    tier = get_memory_tier()
+    memory = tier.stats() if tier else {"entries": 0, "bytes": 0, "max_bytes": 0}
+    return {**stats, "memory_entries": memory["entries"], "memory_bytes": memory["bytes"], "memory_max_bytes": memory["max_bytes"],
+            "shared_write_failures": get_cache_backend().failed_writes}
+
+def is_cache_valid(cache_file: str, max_age: Optional[int] = None) -> bool:
+    """Überprüft, ob der Cache-Eintrag existiert und noch gültig ist (Standard-TTL oder max_age)."""
+    tier = get_memory_tier(); stored_at = tier.stored_at(cache_file) if tier else None
+    if stored_at is None:
+        try: stored_at = get_cache_backend().stored_at(cache_file)
+        except Exception as e: logger.warning(f"Fehler beim Prüfen des Cache-Alters für {cache_file}: {e}"); return False
+    if stored_at is None: return False
+    file_age = time.time() - stored_at
+    is_valid = file_age < (config.MAX_CACHE_AGE_SECONDS if max_age is None else max_age)
+    logger.debug(f"Cache check für {os.path.basename(cache_file)}: Alter={file_age:.0f}s, Gültig={is_valid}") # DEBUG Level
+    return is_valid
+
+def cache_exists(cache_file: str) -> bool:
+    """True, wenn ein (ggf. abgelaufener) Eintrag im Cache liegt."""
+    tier = get_memory_tier()
+    if tier and tier.contains(cache_file): return True
+    try: return get_cache_backend().exists(cache_file)
+    except Exception as e: logger.warning(f"Fehler beim Prüfen des Cache-Eintrags {cache_file}: {e}"); return False
+
+# --- Serialisierung: komprimiertes Binärformat mit Versions-Header ---
+# Rahmen: b"SGC" + Version (1 Byte) + Codec (1 Byte) + komprimiertes kompaktes JSON bzw. Text.
+# Einträge ohne Rahmen (altes Format: JSON mit indent=4 bzw. Klartext) werden weiterhin gelesen.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None # optional; ohne zstandard wird gzip verwendet
+
+CACHE_FORMAT_MAGIC = b"SGC"
+CACHE_FORMAT_VERSION = 1
+CODEC_NONE, CODEC_GZIP, CODEC_ZSTD = 0, 1, 2
+_CODEC_NAMES = {"none": CODEC_NONE, "gzip": CODEC_GZIP, "zstd": CODEC_ZSTD}
+
+def cache_codec() -> Optional[int]:
+    """Codec laut CACHE_COMPRESSION ("auto", "zstd", "gzip", "none"); None = altes JSON-Textformat ("legacy")."""
+    name = config.CACHE_COMPRESSION.lower()
+    if name == "legacy": return None
+    if name == "auto" or (name == "zstd" and zstandard is None): return CODEC_ZSTD if zstandard is not None else CODEC_GZIP
+    if name not in _CODEC_NAMES: raise ValueError(f"Unbekannte CACHE_COMPRESSION '{config.CACHE_COMPRESSION}' (erlaubt: auto, zstd, gzip, none, legacy)")
+    return _CODEC_NAMES[name]
+
+def _compress(codec: int, raw: bytes) -> bytes:
+    if codec == CODEC_ZSTD: return zstandard.ZstdCompressor(level=3).compress(raw)
+    if codec == CODEC_GZIP: return gzip.compress(raw, compresslevel=6, mtime=0)
+    return raw
+
+def _decompress(codec: int, body: bytes) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None: raise ValueError("Eintrag ist zstd-komprimiert, das Paket 'zstandard' ist nicht installiert")
+        return zstandard.ZstdDecompressor().decompress(body)
+    if codec == CODEC_GZIP: return gzip.decompress(body)
+    if codec == CODEC_NONE: return body
+    raise ValueError(f"Unbekannter Cache-Codec {codec}")
+
+def _encode_with_size(data: Any, cache_file: str) -> Tuple[bytes, int]:
+    """Gespeicherte Bytes und unkomprimierte Länge (Größe in der Speicher-Stufe)."""
+    codec = cache_codec()
+    if codec is None:
+        raw = json.dumps(data, ensure_ascii=False, indent=4).encode('utf-8') if cache_file.endswith(".json") else str(data).encode('utf-8')
+        return raw, len(raw)
+    raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode('utf-8') if cache_file.endswith(".json") else str(data).encode('utf-8')
+    return CACHE_FORMAT_MAGIC + struct.pack("BB", CACHE_FORMAT_VERSION, codec) + _compress(codec, raw), len(raw)
+
+def encode_cache_data(data: Any, cache_file: str) -> bytes:
+    """Serialisiert Daten für einen Cache-Eintrag (.json als JSON, sonst als Text), gerahmt und komprimiert laut CACHE_COMPRESSION."""
+    return _encode_with_size(data, cache_file)[0]
+
+def _decode_with_size(payload: bytes, cache_file: str) -> Tuple[Any, int]:
+    """Dekodierte Daten und unkomprimierte Länge (Größe in der Speicher-Stufe)."""
+    if payload[:3] == CACHE_FORMAT_MAGIC:
+        version, codec = struct.unpack("BB", payload[3:5])
+        if version > CACHE_FORMAT_VERSION: raise ValueError(f"Cache-Format Version {version} wird nicht unterstützt")
+        payload = _decompress(codec, payload[5:])
+    text = payload.decode('utf-8')
+    return (json.loads(text) if cache_file.endswith(".json") else text), len(payload)
+
+def decode_cache_data(payload: bytes, cache_file: str) -> Any:
+    """Gegenstück zu encode_cache_data; erkennt gerahmte Einträge am Header, alles andere ist altes Textformat."""
+    return _decode_with_size(payload, cache_file)[0]
+
+def _decode_entry(cache_file: str, payload: bytes) -> Optional[Tuple[Any, int]]:
+    """(Daten, unkomprimierte Länge) oder None, wenn der Eintrag nicht lesbar ist."""
+    try: return _decode_with_size(payload, cache_file)
+    except (ValueError, OSError, EOFError, struct.error) as e: logger.error(f"Fehler beim Dekodieren JSON-Cache {cache_file}: {e}"); return None # Log statt print
+
+def _is_fresh(data: Any, stored_at: float) -> bool:
+    """Gültigkeit eines Eintrags nach cache_entry_ttl (Negativ-Einträge je nach Fehlerklasse)."""
+    return time.time() - stored_at < cache_entry_ttl(data)
+
+def load_from_cache(cache_file: str, allow_expired: bool = False) -> Any | None:
+    """
+    Lädt Daten aus dem Cache (mit allow_expired auch abgelaufene Einträge, z.B. für HTTP-Revalidierung).
+    Die Gültigkeit richtet sich nach cache_entry_ttl, Negativ-Einträge laufen also je nach Fehlerklasse ab.
+    Zuerst wird die Speicher-Stufe gefragt, dann das Backend (Treffer dort landen in der Speicher-Stufe).
+    """
+    tier = get_memory_tier()
+    if tier:
+        cached = tier.get(cache_file)
+        if cached is not None:
+            _count_tier("memory_hits"); _report_memory_access(tier)
+            return cached[0] if allow_expired or _is_fresh(*cached) else None
+        _count_tier("memory_misses")
     try:
+        backend = get_cache_backend(); entry = backend.read(cache_file)
+        if entry is None: _count_tier("disk_misses"); return None
+        backend.record_access(cache_file)
         logger.debug(f"Lade aus Cache: {os.path.basename(cache_file)}") # Log statt print
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            if cache_file.endswith(".json"): return json.load(f)
-            else: return f.read()
-    except FileNotFoundError: logger.warning(f"Cache-Datei nicht gefunden (während Lesen): {cache_file}"); return None # Log statt print
-    except json.JSONDecodeError as e: logger.error(f"Fehler beim Dekodieren JSON-Cache {cache_file}: {e}"); return None # Log statt print
+        payload, stored_at = entry; decoded = _decode_entry(cache_file, payload)
+        if decoded is None: _count_tier("disk_misses"); return None
+        _count_tier("disk_hits"); data, size = decoded
+        if tier: tier.put(cache_file, data, stored_at, size)
+        return data if allow_expired or _is_fresh(data, stored_at) else None
     except Exception as e: logger.error(f"Allg. Fehler beim Lesen Cache {cache_file}: {e}", exc_info=True); return None # Log statt print
 
+def load_many_from_cache(cache_files: Iterable[str], allow_expired: bool = False) -> Dict[str, Any]:
+    """Lädt mehrere Einträge auf einmal (beim SQLite-Backend eine Abfrage pro 500 Schlüssel); fehlende/abgelaufene fehlen im Ergebnis."""
+    tier = get_memory_tier(); found: Dict[str, Tuple[Any, float]] = {}; missing = []
+    for cache_file in cache_files:
+        cached = tier.get(cache_file) if tier else None
+        if cached is not None: found[cache_file] = cached
+        else: missing.append(cache_file)
+    backend = get_cache_backend()
+    try: entries = backend.read_many(missing) if missing else {}
+    except Exception as e: logger.error(f"Allg. Fehler beim Lesen mehrerer Cache-Einträge: {e}", exc_info=True); entries = {}
+    if entries: backend.record_access_many(dict.fromkeys(entries, time.time()))
+    if found: _report_memory_access(tier)
+    for cache_file, (payload, stored_at) in entries.items():
+        decoded = _decode_entry(cache_file, payload)
+        if decoded is None: continue
+        found[cache_file] = (decoded[0], stored_at)
+        if tier: tier.put(cache_file, decoded[0], stored_at, decoded[1])
+    return {cache_file: data for cache_file, (data, stored_at) in found.items() if allow_expired or _is_fresh(data, stored_at)}
+
 def save_to_cache(data: Any, cache_file: str):
-    """Speichert Daten in einer Cache-Datei."""
+    """Speichert Daten im Cache (Backend und Speicher-Stufe)."""
     try:
-        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            if cache_file.endswith(".json"): json.dump(data, f, ensure_ascii=False, indent=4)
-            else: f.write(str(data))
+        payload, size = _encode_with_size(data, cache_file)
+        get_cache_backend().write(cache_file, payload, cache_entry_ttl(data))
+        tier = get_memory_tier()
+        if tier: tier.put(cache_file, data, time.time(), size)
         logger.debug(f"Im Cache gespeichert: {os.path.basename(cache_file)}") # Log statt print
     except Exception as e: logger.error(f"Fehler beim Speichern im Cache {cache_file}: {e}", exc_info=True) # Log statt print
+    maybe_start_gc()
+
+def save_many_to_cache(items: Dict[str, Any]):
+    """Speichert mehrere Einträge auf einmal (beim SQLite-Backend in einer Transaktion)."""
+    try:
+        encoded = {cache_file: _encode_with_size(data, cache_file) for cache_file, data in items.items()}
+        get_cache_backend().write_many([(cache_file, payload, cache_entry_ttl(items[cache_file])) for cache_file, (payload, _) in encoded.items()])
+        tier = get_memory_tier(); now = time.time()
+        for cache_file, (_, size) in encoded.items() if tier else ():
+            tier.put(cache_file, items[cache_file], now, size)
+    except Exception as e: logger.error(f"Fehler beim Speichern mehrerer Cache-Einträge: {e}", exc_info=True)
+    maybe_start_gc()
+
+def touch_cache(cache_file: str) -> bool:
+    """Setzt das Alter eines Cache-Eintrags zurück (TTL neu starten, z.B. nach HTTP 304)."""
+    if get_cache_backend().touch(cache_file):
+        tier = get_memory_tier()
+        if tier: tier.touch(cache_file, time.time())
+        logger.debug(f"Cache-TTL erneuert: {os.path.basename(cache_file)}"); return True
+    logger.warning(f"Cache-TTL für {cache_file} nicht erneuert (Eintrag fehlt)."); return False
+
+# --- Single-Flight im geteilten Cache ---
+# Mehrere Knoten mit demselben Backend (CACHE_BACKEND=redis): Bei einem Miss holt nur der Knoten mit der Lease
+# die Daten vom Ursprung (SerpApi, Webseite), die anderen warten (höchstens CACHE_FILL_WAIT_SECONDS) auf seinen Eintrag.
+FILL_POLL_SECONDS = 0.1
+
+def await_shared_fill(cache_file: str) -> Any | None:
+    """
+    Für einen fehlenden Eintrag: None, wenn der Aufrufer ihn füllen soll (Lease erhalten, nicht geteiltes Backend oder
+    Wartezeit nach CACHE_FILL_WAIT_SECONDS erreicht), sonst der inzwischen von einem anderen Knoten geschriebene Eintrag.
+    Die Lease endet mit dem Schreiben des Eintrags, mit release_fill_lease oder nach CACHE_FILL_LEASE_SECONDS.
+    """
+    backend = get_cache_backend()
+    if not backend.shared: return None
+    try:
+        if backend.acquire_lease(cache_file, config.CACHE_FILL_LEASE_SECONDS): _count_tier("shared_fill_leases"); return None
+        logger.debug(f"{os.path.basename(cache_file)} wird von einem anderen Knoten gefüllt, warte...")
+        give_up = time.monotonic() + min(config.CACHE_FILL_WAIT_SECONDS, config.CACHE_FILL_LEASE_SECONDS) # Worker nicht lange blockieren
+        while time.monotonic() < give_up:
+            time.sleep(FILL_POLL_SECONDS)
+            if backend.exists(cache_file):
+                data = load_from_cache(cache_file, allow_expired=True)
+                if data is not None: _count_tier("shared_fill_waits"); return data
+        backend.acquire_lease(cache_file, config.CACHE_FILL_LEASE_SECONDS) # Füller ausgefallen oder zu langsam: selbst übernehmen
+    except Exception as e: logger.warning(f"Single-Flight für {os.path.basename(cache_file)} nicht möglich, fülle selbst: {e}")
+    return None
+
+def release_fill_lease(cache_file: str):
+    """Gibt die Lease frei, wenn der Eintrag nicht geschrieben wird (z.B. Fehler, die nicht gecacht werden)."""
+    backend = get_cache_backend()
+    if backend.shared: backend.release_lease(cache_file)
+
+# --- Inhaltsadressierte Texte ---
+# Extrahierte Texte liegen einmal unter ihrem SHA-256 (CONTENT_CACHE_TYPE); Text-Cache-Einträge je URL verweisen nur
+# auf den Hash. Identische Texte (Syndikation, Spiegel, URL-Varianten) werden so einmal gespeichert, und abgeleitete
+# Ergebnisse (Lemmata, Entitäten, Sentiment) lassen sich über get_derived_artifact_file am Inhalt festmachen.
+CONTENT_CACHE_TYPE = "content_v1"
+
+def text_content_hash(text: str) -> str:
+    """SHA-256 eines Texts (Schlüssel des inhaltsadressierten Speichers)."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def get_content_file(content_hash: str) -> str:
+    return get_cache_path(CONTENT_CACHE_TYPE, content_hash, extension="json")
+
+def store_text_content(text: str) -> Tuple[str, bool]:
+    """Legt einen Text unter seinem Hash ab; ein vorhandener Eintrag wird nur aufgefrischt. Rückgabe: (hash, war_vorhanden)."""
+    content_hash = text_content_hash(text); content_file = get_content_file(content_hash)
+    if cache_exists(content_file) and touch_cache(content_file): return content_hash, True
+    save_to_cache(text, content_file); return content_hash, False
+
+def load_text_content(content_hash: str) -> Optional[str]:
+    """Text zu einem Hash oder None. Inhalte veralten nicht, die Gültigkeit bestimmt der verweisende Eintrag."""
+    text = load_from_cache(get_content_file(content_hash), allow_expired=True)
+    return text if isinstance(text, str) else None
+
+def get_derived_artifact_file(kind: str, content_hash: str, *settings) -> str:
+    """Pfad eines aus einem Text abgeleiteten Ergebnisses (z.B. Lemmata) für Inhalts-Hash und Einstellungen."""
+    return get_cache_path(kind, get_cache_key(kind, content_hash, *settings), extension="json")
+
+# --- Roh-HTML-Cache (komprimiert) ---
+# Eintrag: gzip(JSON-Metadaten + "\n" + HTML-Bytes). Der extrahierte Text wird daraus abgeleitet, sodass neue
+# Extraktions-Einstellungen keinen erneuten Download erfordern.
+RAW_CACHE_TYPE = "raw_v1"
+
+def normalize_url(url: str) -> str:
+    """Normalisiert eine URL für Cache-Schlüssel: Schema/Host klein, Standard-Port und Fragment entfernt."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower(); netloc = parts.netloc.lower()
+    if (scheme, netloc.rsplit(":", 1)[-1]) in (("http", "80"), ("https", "443")): netloc = netloc.rsplit(":", 1)[0]
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+def is_stripped_param(name: str) -> bool:
+    """True, wenn ein Query-Parameter laut URL_STRIP_PARAMS entfernt wird (Muster wie 'utm_*' erlaubt)."""
+    return any(fnmatch.fnmatchcase(name.lower(), pattern.strip().lower()) for pattern in config.URL_STRIP_PARAMS if pattern.strip())
+
+def canonicalize_url(url: str) -> str:
+    """
+    Kanonische Form einer URL für Cache-Schlüssel und Deduplizierung: normalize_url, dazu Tracking-Parameter
+    (URL_STRIP_PARAMS) entfernt, restliche Parameter sortiert, optional (Standard: aus) 'www.' (URL_STRIP_WWW) und
+    abschließender Slash (URL_STRIP_TRAILING_SLASH) entfernt. Der Pfad bleibt case-sensitiv.
+    """
+    scheme, netloc, path, query, _ = urlsplit(normalize_url(url))
+    if config.URL_STRIP_WWW and netloc.startswith("www."): netloc = netloc[4:]
+    if config.URL_STRIP_TRAILING_SLASH and len(path) > 1: path = path.rstrip("/") or "/"
+    params = sorted((name, value) for name, value in parse_qsl(query, keep_blank_values=True) if not is_stripped_param(name))
+    return urlunsplit((scheme, netloc, path, urlencode(params), ""))
+
+def get_raw_cache_file(url: str) -> str:
+    """Pfad der Roh-HTML-Cache-Datei für eine URL (Schlüssel aus der kanonischen URL)."""
+    return get_cache_path(RAW_CACHE_TYPE, get_cache_key(RAW_CACHE_TYPE, canonicalize_url(url)), extension="html.gz")
+
+def save_raw_html(url: str, content: bytes, meta: Dict[str, Any]):
+    """Speichert das Roh-HTML einer URL komprimiert zusammen mit Metadaten (Inhaltstyp, Hash, Validatoren)."""
+    cache_file = get_raw_cache_file(url)
+    try:
+        header = json.dumps({"url": url, **meta}, ensure_ascii=False).encode('utf-8')
+        get_cache_backend().write(cache_file, gzip.compress(header + b"\n" + content, compresslevel=6), config.MAX_CACHE_AGE_SECONDS)
+        logger.debug(f"Roh-HTML im Cache gespeichert: {os.path.basename(cache_file)} ({len(content)} Bytes)")
+    except Exception as e: logger.error(f"Fehler beim Speichern des Roh-HTML {cache_file}: {e}", exc_info=True)
+    maybe_start_gc()
+
+def load_raw_html(url: str, allow_expired: bool = False) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+    """Lädt (html_bytes, meta) aus dem Roh-HTML-Cache oder None."""
+    cache_file = get_raw_cache_file(url)
+    try:
+        backend = get_cache_backend(); entry = backend.read(cache_file)
+        if entry is None or not (allow_expired or time.time() - entry[1] < config.MAX_CACHE_AGE_SECONDS): return None
+        backend.record_access(cache_file)
+        header, _, content = gzip.decompress(entry[0]).partition(b"\n")
+        return content, json.loads(header.decode('utf-8'))
+    except (OSError, EOFError, ValueError) as e: logger.error(f"Fehler beim Lesen des Roh-HTML-Cache {cache_file}: {e}"); return None
 
 def clear_cache_for_query(query: str, num_results: int, language: str):
-    """Löscht spezifische Cache-Dateien für eine Abfrage."""
-    serp_key = get_cache_key("serp", query, num_results, language); serp_file = get_cache_path("serp", serp_key, extension="json")
-    if os.path.exists(serp_file):
-        try: os.remove(serp_file); logger.info(f"SERP Cache gelöscht: {os.path.basename(serp_file)}") # Log statt print
-        except OSError as e: logger.error(f"Fehler beim Löschen SERP Cache {serp_file}: {e}") # Log statt print
+    """Löscht spezifische Cache-Einträge für eine Abfrage."""
+    serp_key = get_cache_key("serp_v2", query, num_results, language); serp_file = get_cache_path("serp_v2", serp_key, extension="json")
+    tier = get_memory_tier()
+    if tier: tier.pop(serp_file)
+    try:
+        if get_cache_backend().delete(serp_file): logger.info(f"SERP Cache gelöscht: {os.path.basename(serp_file)}") # Log statt print
+    except Exception as e: logger.error(f"Fehler beim Löschen SERP Cache {serp_file}: {e}") # Log statt print
     # Hinweis zum Text-Cache bleibt relevant
     logger.info("Hinweis: Text-Caches werden nicht automatisch gelöscht. Ggf. --clear-cache verwenden.") # Log statt print
 
 
 def clear_all_cache():
-    """Löscht den gesamten Inhalt des Cache-Verzeichnisses."""
+    """Löscht alle Einträge des Cache-Backends (beim Datei-Backend den Inhalt des Cache-Verzeichnisses) und der Speicher-Stufe."""
+    tier = get_memory_tier()
+    if tier: tier.clear()
     if os.path.exists(config.CACHE_DIR):
         try:
-            # Sicherer: Inhalt löschen statt Verzeichnis selbst, falls Rechte fehlen
-            for filename in os.listdir(config.CACHE_DIR):
-                file_path = os.path.join(config.CACHE_DIR, filename)
-                try:
-                    if os.path.isfile(file_path) or os.path.islink(file_path): os.unlink(file_path)
-                    elif os.path.isdir(file_path): shutil.rmtree(file_path)
-                except Exception as e: logger.error(f'Fehler beim Löschen von {file_path} im Cache. Grund: {e}') # Log statt print
+            get_cache_backend().clear()
             logger.info(f"Cache-Verzeichnis '{config.CACHE_DIR}' wurde geleert.") # Log statt print
         except Exception as e: logger.error(f"Fehler beim Leeren des Cache-Verzeichnisses '{config.CACHE_DIR}': {e}", exc_info=True) # Log statt print
-    else: logger.warning("Cache-Verzeichnis existiert nicht.") # Log statt print
\ No newline at end of file
+    else: logger.warning("Cache-Verzeichnis existiert nicht.") # Log statt print
+
+def migrate_cache_to_sqlite(batch_size: int = 500, remove_files: bool = False) -> Dict[str, int]:
+    """
+    Übernimmt die Einzeldateien aus CACHE_DIR (Datei-Backend) in das SQLite-Backend, in Transaktionen zu je
+    batch_size Einträgen. Zeitstempel = mtime, die Ablaufzeit folgt der TTL des Eintrags. Mit remove_files werden
+    übernommene Dateien gelöscht.
+    """
+    target = SQLiteCacheBackend(os.path.join(config.CACHE_DIR, SQLITE_FILENAME))
+    stats = {"migrated": 0, "bytes": 0, "failed": 0}; rows = []; migrated_files = []
+
+    def flush():
+        target.write_rows(rows)
+        for path in migrated_files if remove_files else []:
+            try: os.remove(path)
+            except OSError as e: logger.warning(f"Migrierte Datei {path} nicht gelöscht: {e}")
+        rows.clear(); migrated_files.clear()
+
+    for path, size, mtime, _, _ in list(FileCacheBackend().entries()):
+        try:
+            with open(path, 'rb') as f: payload = f.read()
+            ttl = cache_entry_ttl(decode_cache_data(payload, path)) if path.endswith(".json") else config.MAX_CACHE_AGE_SECONDS
+        except (OSError, ValueError) as e: logger.warning(f"Cache-Datei {path} nicht lesbar, übersprungen: {e}"); stats["failed"] += 1; continue
+        rows.append(target.row_for(path, payload, ttl, stored_at=mtime)); migrated_files.append(path)
+        stats["migrated"] += 1; stats["bytes"] += size
+        if len(rows) >= batch_size: flush()
+    if rows: flush()
+    logger.info(f"Cache-Migration: {stats['migrated']} Einträge ({stats['bytes']} Bytes) nach {target.db_path} übernommen, {stats['failed']} fehlgeschlagen.")
+    return stats
+
+# --- Größenlimit und Garbage Collection ---
+# Läuft automatisch (höchstens alle CACHE_GC_INTERVAL_SECONDS, ausgelöst beim Schreiben) in einem Hintergrund-Thread
+# oder über "cli.py cache gc". Gelöscht wird in kleinen Portionen, sodass laufende Analysen nicht warten müssen.
+GC_TARGET_RATIO = 0.9 # nach LRU-Verdrängung bleibt Luft bis zum nächsten Lauf
+GC_BATCH_SIZE = 200
+AGE_BUCKETS = (("<1h", 3600), ("<1d", 86400), ("<7d", 7 * 86400), ("<30d", 30 * 86400), (">=30d", float("inf")))
+
+_gc_lock = threading.Lock()
+_gc_state = {"running": False, "last_run": 0.0}
+
+def _entry_path(info: CacheEntryInfo) -> str:
+    return os.path.join(config.CACHE_DIR, os.path.basename(info.name))
+
+def _entry_expired(info: CacheEntryInfo, now: float) -> bool:
+    """
+    Abgelaufen laut gespeicherter Ablaufzeit (SQLite) bzw. TTL des Eintrags. Beim Datei-Backend wird ein JSON-Eintrag
+    nur dekodiert, wenn sein Alter zwischen kürzester und längster möglicher TTL liegt.
+    Inhaltsadressierte Typen (NON_EXPIRING_CACHE_TYPES) laufen nie ab, sie werden nur per LRU verdrängt.
+    """
+    if cache_type_of(info.name) in NON_EXPIRING_CACHE_TYPES: return False
+    if info.expires_at is not None: return now >= info.expires_at
+    age = now - info.stored_at
+    if not info.name.endswith(".json"): return age >= config.MAX_CACHE_AGE_SECONDS
+    ttls = (config.NEGATIVE_CACHE_TTL_SHORT, config.NEGATIVE_CACHE_TTL_LONG, config.MAX_CACHE_AGE_SECONDS)
+    if age < min(ttls): return False
+    if age >= max(ttls): return True
+    entry = get_cache_backend().read(_entry_path(info))
+    decoded = _decode_entry(info.name, entry[0]) if entry else None
+    return decoded is None or age >= cache_entry_ttl(decoded[0])
+
+def _delete_entries(entries: List[CacheEntryInfo]) -> int:
+    """Löscht Einträge portionsweise aus Backend und Speicher-Stufe; Rückgabe: freigegebene Bytes."""
+    backend = get_cache_backend(); tier = get_memory_tier(); freed = 0
+    for start in range(0, len(entries), GC_BATCH_SIZE):
+        batch = entries[start:start + GC_BATCH_SIZE]; paths = [_entry_path(info) for info in batch]
+        try: backend.delete_many(paths)
+        except Exception as e: logger.error(f"Fehler beim Löschen von Cache-Einträgen: {e}"); continue
+        for path in paths if tier else (): tier.pop(path)
+        freed += sum(info.size for info in batch)
+        time.sleep(0) # anderen Threads (Downloads, Cache-Zugriffe) Vorrang lassen
+    return freed
+
+def collect_garbage(max_bytes: Optional[int] = None) -> Dict[str, int]:
+    """
+    Entfernt zuerst abgelaufene Einträge und verdrängt danach, falls der Cache noch größer als max_bytes
+    (Standard CACHE_MAX_BYTES, 0 = unbegrenzt) ist, die am längsten nicht gelesenen Einträge bis auf
+    GC_TARGET_RATIO des Limits.
+    """
+    max_bytes = config.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    flush_memory_access(); backend = get_cache_backend(); backend.flush_access(); now = time.time()
+    entries = list(backend.entries())
+    stats = {"scanned": len(entries), "expired_removed": 0, "lru_removed": 0, "bytes_freed": 0, "bytes_before": sum(info.size for info in entries)}
+    expired = [info for info in entries if _entry_expired(info, now)]
+    stats["expired_removed"] = len(expired); stats["bytes_freed"] = _delete_entries(expired)
+    remaining_bytes = stats["bytes_before"] - stats["bytes_freed"]
+    if 0 < max_bytes < remaining_bytes:
+        expired_names = {info.name for info in expired}; target = int(max_bytes * GC_TARGET_RATIO); victims = []
+        for info in sorted((info for info in entries if info.name not in expired_names), key=lambda info: info.accessed_at):
+            if remaining_bytes <= target: break
+            victims.append(info); remaining_bytes -= info.size
+        stats["lru_removed"] = len(victims); stats["bytes_freed"] += _delete_entries(victims)
+    stats["bytes_after"] = stats["bytes_before"] - stats["bytes_freed"]
+    logger.info(f"Cache-GC: {stats['expired_removed']} abgelaufene und {stats['lru_removed']} verdrängte Einträge gelöscht, "
+                f"{stats['bytes_freed']} Bytes freigegeben ({stats['bytes_after']} Bytes belegt).")
+    return stats
+
+def _background_gc():
+    try: collect_garbage()
+    except Exception as e: logger.error(f"Fehler bei der Cache-GC: {e}", exc_info=True)
+    finally:
+        with _gc_lock: _gc_state["running"] = False
+
+def maybe_start_gc() -> bool:
+    """Startet die GC im Hintergrund, wenn ein Limit gesetzt ist, keine läuft und CACHE_GC_INTERVAL_SECONDS vergangen sind."""
+    if config.CACHE_MAX_BYTES <= 0 or config.CACHE_GC_INTERVAL_SECONDS <= 0: return False
+    now = time.time()
+    with _gc_lock:
+        if _gc_state["running"] or now - _gc_state["last_run"] < config.CACHE_GC_INTERVAL_SECONDS: return False
+        _gc_state.update(running=True, last_run=now)
+    threading.Thread(target=_background_gc, name="cache-gc", daemon=True).start()
+    return True
+
+def cache_statistics() -> Dict[str, Dict[str, Any]]:
+    """Anzahl, Bytes, abgelaufene Einträge und Altershistogramm je Cache-Typ (z.B. serp_v2, text_v2, raw_v1)."""
+    flush_memory_access(); get_cache_backend().flush_access(); now = time.time(); stats: Dict[str, Dict[str, Any]] = {}
+    for info in get_cache_backend().entries():
+        type_stats = stats.setdefault(cache_type_of(info.name), {"entries": 0, "bytes": 0, "expired": 0, "ages": {label: 0 for label, _ in AGE_BUCKETS}})
+        type_stats["entries"] += 1; type_stats["bytes"] += info.size; type_stats["expired"] += int(_entry_expired(info, now))
+        age = now - info.stored_at
+        type_stats["ages"][next(label for label, limit in AGE_BUCKETS if age < limit)] += 1
+    return dict(sorted(stats.items()))
@@ -14,21 +14,91 @@ logger = logging.getLogger(__name__)
 # Eigene Module importieren
 try:
     import config
-    from cache_utils import clear_all_cache, clear_cache_for_query
+    from cache_utils import clear_all_cache, clear_cache_for_query, migrate_cache_to_sqlite, collect_garbage, cache_statistics, AGE_BUCKETS
     # Importiere aus core_analysis
-    from core_analysis import run_analysis, validate_openai_key, HTML_TEMPLATE # HTML_TEMPLATE hier importieren
+    from core_analysis import run_analysis, run_batch_analysis, prewarm_cache, validate_openai_key, HTML_TEMPLATE # HTML_TEMPLATE hier importieren
 except ImportError as e:
     logger.critical(f"Import-Fehler in cli.py: {e}", exc_info=True)
     sys.exit(1)
 
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB": return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def read_keyword_file(path: str):
+    """Keywords aus einer Datei (eines pro Zeile, leere Zeilen und '#'-Kommentare werden ignoriert); beendet bei Fehlern."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f: queries = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    except OSError as e: logger.critical(f"Keyword-Datei '{path}' nicht lesbar: {e}"); sys.exit(1)
+    if not queries: logger.critical(f"Keyword-Datei '{path}' enthält keine Keywords."); sys.exit(1)
+    return queries
+
+# --- Cache-Verwaltung: "cli.py cache stats" / "cli.py cache gc" / "cli.py cache warm" ---
+def cache_main(argv):
+    parser = argparse.ArgumentParser(prog="cli.py cache", description="Cache-Verwaltung")
+    parser.add_argument("-c", "--config", metavar="JSON_FILE", help="Pfad zu einer optionalen JSON-Konfigurationsdatei.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="Einträge, Größe und Altersverteilung je Cache-Typ anzeigen.")
+    gc_parser = subparsers.add_parser("gc", help="Abgelaufene Einträge löschen und bis zum Größenlimit verdrängen (LRU).")
+    gc_parser.add_argument("--max-bytes", type=int, default=None, metavar="BYTES",
+                           help=f"Größenlimit für diesen Lauf (Standard: CACHE_MAX_BYTES = {config.CACHE_MAX_BYTES}, 0 = nur Abgelaufene).")
+    warm_parser = subparsers.add_parser("warm", help="SERPs und Texte einer Keyword-Liste in den Cache laden (ohne NLP/OpenAI).")
+    warm_parser.add_argument("keyword_file", metavar="FILE", help="Datei mit einem Keyword pro Zeile.")
+    warm_parser.add_argument("-l", "--language", default=None, choices=config.SPACY_MODEL_MAP.keys(), help=f"Sprache (Standard: '{config.LANGUAGE}').")
+    warm_parser.add_argument("-n", "--num-results", type=int, default=None, metavar="N", help=f"Suchergebnisse pro Keyword (Standard: {config.RESULTS_COUNT}).")
+    warm_parser.add_argument("--serp-workers", type=int, default=4, metavar="W", help="Parallele SerpApi-Abrufe (Standard: 4).")
+    warm_parser.add_argument("--connections", type=int, default=None, metavar="C", help=f"Gleichzeitige Verbindungen für Seitenabrufe (Standard: {config.ASYNC_MAX_CONNECTIONS}).")
+    warm_parser.add_argument("--per-host", type=int, default=None, metavar="H", help=f"Obergrenze gleichzeitiger Verbindungen pro Domain (Standard: {config.ASYNC_PER_HOST_LIMIT}).")
+    warm_parser.add_argument("--extract-workers", type=int, default=None, metavar="P", help=f"Prozesse für die Trafilatura-Extraktion (Standard: {config.EXTRACT_PROCESSES}).")
+    args = parser.parse_args(argv)
+    config.load_config_from_json(args.config) if args.config else config.load_config_from_json()
+
+    if args.command == "warm":
+        if not config.SERP_API_KEY: logger.critical("FEHLER: Kein SerpApi API-Schlüssel gefunden. Abbruch."); return 1
+        queries = read_keyword_file(args.keyword_file)
+        report = prewarm_cache(queries, num_results=args.num_results or config.RESULTS_COUNT, language=args.language or config.LANGUAGE,
+                               serp_workers=args.serp_workers, max_connections=args.connections, per_host_limit=args.per_host, extract_workers=args.extract_workers)
+        text_cache = report["text_cache"]
+        print("\n" + "=" * 50)
+        print(f"SERPs: {report['queries'] - len(report['serp_failed'])}/{report['queries']} in {report['serp_seconds']:.1f}s")
+        print(f"Texte: {report['texts_ok']}/{report['urls']} in {report['text_seconds']:.1f}s ({report['urls_per_second']} URLs/s), "
+              f"{text_cache['hits']} schon im Cache, {report['skipped']} laut Skip-Liste übersprungen, {format_bytes(report['downloads']['bytes_downloaded'])} geladen")
+        failures = report["serp_failed"] + report["texts_failed"]
+        if failures:
+            print(f"Fehler ({len(failures)}):")
+            for target, reason in failures[:10]: print(f"  - {target} ({reason})")
+            if len(failures) > 10: print("  ...")
+        print(f"Dauer: {report['duration_seconds']:.1f}s"); print("=" * 50 + "\n")
+        return 0 if not report["serp_failed"] else 1
+
+    if args.command == "gc":
+        stats = collect_garbage(max_bytes=args.max_bytes)
+        print(f"Geprüft: {stats['scanned']} Einträge ({format_bytes(stats['bytes_before'])})")
+        print(f"Gelöscht: {stats['expired_removed']} abgelaufen, {stats['lru_removed']} verdrängt ({format_bytes(stats['bytes_freed'])} freigegeben)")
+        print(f"Belegt: {format_bytes(stats['bytes_after'])}"); return 0
+
+    stats = cache_statistics(); labels = [label for label, _ in AGE_BUCKETS]
+    print(f"Cache: {config.CACHE_DIR} (Backend: {config.CACHE_BACKEND}, Limit: {format_bytes(config.CACHE_MAX_BYTES) if config.CACHE_MAX_BYTES > 0 else 'keins'})")
+    print(f"{'Typ':<12} {'Einträge':>9} {'Größe':>10} {'Abgel.':>7} " + " ".join(f"{label:>7}" for label in labels))
+    for cache_type, type_stats in stats.items():
+        print(f"{cache_type:<12} {type_stats['entries']:>9} {format_bytes(type_stats['bytes']):>10} {type_stats['expired']:>7} "
+              + " ".join(f"{type_stats['ages'][label]:>7}" for label in labels))
+    print(f"{'Gesamt':<12} {sum(t['entries'] for t in stats.values()):>9} {format_bytes(sum(t['bytes'] for t in stats.values())):>10} "
+          f"{sum(t['expired'] for t in stats.values()):>7}")
+    return 0
+
 # --- Main Execution Block ---
 def main():
+    if sys.argv[1:2] == ["cache"]: sys.exit(cache_main(sys.argv[2:]))
     # --- Argument Parser Setup ---
     parser = argparse.ArgumentParser(
         description="SEO Gap Analysis Tool",
         formatter_class=argparse.RawTextHelpFormatter
     )
-    parser.add_argument("query", help="Die Suchanfrage/Keyword für die Analyse.")
+    parser.add_argument("query", nargs="?", help="Die Suchanfrage/Keyword für die Analyse.")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Datei mit einem Keyword pro Zeile; URLs, die in mehreren SERPs vorkommen, werden nur einmal abgerufen.")
     parser.add_argument("-r", "--reference", metavar="FILE",
                         help="Pfad zu einer optionalen Referenztextdatei (.txt).")
     parser.add_argument("-o", "--output", metavar="PREFIX",
@@ -43,7 +113,15 @@ def main():
     parser.add_argument("--cluster", action="store_true", help="Keyword-Clustering aktivieren.")
     parser.add_argument("--sentiment", action="store_true", help="Sentiment-Analyse aktivieren.")
     parser.add_argument("--workers", type=int, default=5, metavar="W",
-                        help="Anzahl paralleler Worker (Standard: 5).")
+                        help="Anzahl paralleler Download-Worker (Standard: 5).")
+    parser.add_argument("--extract-workers", type=int, default=None, metavar="P",
+                        help=f"Prozesse für die Trafilatura-Extraktion (0 = im Download-Worker, Standard: {config.EXTRACT_PROCESSES}, CPU-Kerne: {os.cpu_count()}).")
+    parser.add_argument("--stream-nlp", action=argparse.BooleanOptionalAction, default=None,
+                        help="Spacy-Vorverarbeitung schon während der Downloads starten (Standard: an).")
+    parser.add_argument("--engine", choices=["thread", "async"], default=None,
+                        help=f"Download-Engine: 'thread' (ThreadPoolExecutor) oder 'async' (asyncio, viele Verbindungen, Limit pro Host). Standard: '{config.FETCH_ENGINE}'.")
+    parser.add_argument("--deadline", type=float, default=None, metavar="SEK", dest="fetch_deadline",
+                        help=f"Fetch-Deadline in Sekunden: danach werden offene URLs abgebrochen, die Analyse läuft mit mind. {config.FETCH_MIN_TEXTS} Texten weiter (0 = aus, Standard: {config.FETCH_DEADLINE_SECONDS:g}).")
 
     cache_group = parser.add_mutually_exclusive_group()
     cache_group.add_argument("--no-cache", dest="use_cache", action="store_false",
@@ -52,6 +130,8 @@ def main():
                              help="Cache für diese Query löschen.")
     cache_group.add_argument("--clear-cache", action="store_true",
                              help="Gesamten Cache löschen und beenden.")
+    cache_group.add_argument("--migrate-cache", action="store_true",
+                             help="Cache-Dateien in die SQLite-Datenbank übernehmen (danach CACHE_BACKEND=sqlite setzen) und beenden.")
 
     parser.add_argument("-c", "--config", metavar="JSON_FILE",
                         help="Pfad zu einer optionalen JSON-Konfigurationsdatei.")
@@ -59,24 +139,35 @@ def main():
     args = parser.parse_args()
 
     # --- Vorabaktionen ---
-    if args.clear_cache:
-        logger.info("Lösche gesamten Cache...")
-        clear_all_cache(); logger.info("Cache geleert."); sys.exit(0)
-
     if args.config:
         logger.info(f"Lade Konfiguration aus Datei: {args.config}")
         config.load_config_from_json(args.config)
     else:
         config.load_config_from_json() # Versuche Standard config.json
 
+    if args.clear_cache: # nach dem Laden der Konfiguration (CACHE_DIR/CACHE_BACKEND)
+        logger.info("Lösche gesamten Cache...")
+        clear_all_cache(); logger.info("Cache geleert."); sys.exit(0)
+
+    if args.migrate_cache:
+        logger.info("Übernehme Cache-Dateien in SQLite...")
+        stats = migrate_cache_to_sqlite()
+        print(f"{stats['migrated']} Einträge ({stats['bytes']} Bytes) übernommen, {stats['failed']} fehlgeschlagen."); sys.exit(0 if not stats["failed"] else 1)
+
+    if bool(args.query) == bool(args.batch):
+        parser.error("Entweder eine Query oder --batch FILE angeben.")
+    queries = [args.query]
+    if args.batch: queries = read_keyword_file(args.batch)
+
     # KORREKTUR der Zuweisung:
     effective_language = args.language if args.language is not None else config.LANGUAGE
     effective_num_results = args.num_results if args.num_results is not None else config.RESULTS_COUNT
 
     # Cache für spezifische Query invalidieren
     if args.invalidate_cache:
-        logger.info(f"Invalidiere Cache für Query='{args.query}', Num={effective_num_results}, Lang={effective_language}...")
-        clear_cache_for_query(args.query, effective_num_results, effective_language)
+        for query in queries:
+            logger.info(f"Invalidiere Cache für Query='{query}', Num={effective_num_results}, Lang={effective_language}...")
+            clear_cache_for_query(query, effective_num_results, effective_language)
 
     # --- Validierungen ---
     openai_available = validate_openai_key(config.OPENAI_API_KEY)
@@ -89,15 +180,32 @@ def main():
     if not (1 <= effective_num_results <= 100):
          logger.critical(f"FEHLER: Ungültige Anzahl Ergebnisse ({effective_num_results}). Muss zwischen 1 und 100 liegen. Abbruch."); sys.exit(1)
 
+    analysis_kwargs = dict(
+        language=effective_language, num_results=effective_num_results,
+        reference_file=args.reference, use_cache=args.use_cache,
+        include_ner=args.ner, include_clustering=args.cluster, include_sentiment=args.sentiment,
+        max_workers=args.workers, output_format=args.format, fetch_engine=args.engine,
+        extract_workers=args.extract_workers, stream_preprocessing=args.stream_nlp,
+        fetch_deadline_seconds=args.fetch_deadline
+    )
+
+    # --- Batch ---
+    if args.batch:
+        logger.info(f"Starte Batch mit {len(queries)} Keywords: Lang={effective_language}, Num={effective_num_results}")
+        try: batch_results = run_batch_analysis(queries, **analysis_kwargs)
+        except Exception as e: logger.critical("Unerwarteter Fehler im Batch.", exc_info=True); print(f"\nEin unerwarteter Programmfehler ist aufgetreten: {e}"); sys.exit(1)
+        print("\n" + "=" * 50)
+        for query, result in zip(queries, batch_results):
+            saved = result.get("fetch_stats", {}).get("url_dedup", {}).get("saved_requests", 0)
+            if result.get("success"): print(f"OK     {query} ({result.get('duration_seconds', 0):.1f}s, {saved} Abrufe eingespart)")
+            else: print(f"FEHLER {query}: {result.get('error', 'Details siehe Log.')}")
+        print("=" * 50 + "\n")
+        sys.exit(0 if all(result.get("success") for result in batch_results) else 1)
+
     # --- Analyse starten ---
     logger.info(f"Starte Analyse für '{args.query}' mit Parametern: Lang={effective_language}, Num={effective_num_results}")
     try:
-        analysis_result = run_analysis(
-            query=args.query, language=effective_language, num_results=effective_num_results,
-            output_prefix=args.output, reference_file=args.reference, use_cache=args.use_cache,
-            include_ner=args.ner, include_clustering=args.cluster, include_sentiment=args.sentiment,
-            max_workers=args.workers, output_format=args.format
-        )
+        analysis_result = run_analysis(query=args.query, output_prefix=args.output, **analysis_kwargs)
 
         # --- Ergebnisverarbeitung ---
         if analysis_result.get("success"):
@@ -121,6 +229,8 @@ def main():
                 print("-" * 30); print(f"Warnung: {len(analysis_result['failed_urls'])} URL(s) konnten nicht verarbeitet werden:");
                 for url, reason in analysis_result["failed_urls"][:5]: print(f"  - {url} ({reason})")
                 if len(analysis_result['failed_urls']) > 5: print("  ..."); print("(Details siehe JSON-Zusammenfassung)")
+            if analysis_result.get("skipped_urls"):
+                print(f"Hinweis: {len(analysis_result['skipped_urls'])} URL(s) laut Skip-Liste übersprungen (Details siehe JSON-Zusammenfassung).")
             print("=" * 50 + "\n")
         else: logger.error(f"Analyse fehlgeschlagen: {analysis_result.get('error', 'Unbekannter Fehler')}"); print(f"\nFEHLER bei der Analyse: {analysis_result.get('error', 'Details siehe Log.')}"); sys.exit(1)
     except Exception as e: logger.critical("Unerwarteter Fehler im CLI-Hauptablauf.", exc_info=True); print(f"\nEin unerwarteter Programmfehler ist aufgetreten: {e}"); print("Details wurden in die Log-Datei geschrieben."); sys.exit(1)
@@ -35,12 +35,80 @@ SPACY_MODEL = os.getenv("SPACY_MODEL", SPACY_MODEL_MAP.get(LANGUAGE, "de_core_ne
 # --- Verzeichnisse und Caching ---
 OUTPUT_DIR = os.getenv("OUTPUT_DIR", "output")
 CACHE_DIR = os.path.join(OUTPUT_DIR, "cache")
+SKIP_LIST_FILE = os.path.join(OUTPUT_DIR, "skip_list.json")
 MAX_CACHE_AGE_SECONDS = int(os.getenv("MAX_CACHE_AGE_SECONDS", 7 * 24 * 60 * 60)) # 7 Tage Standard
+# Cache-Backend: "file" (eine Datei pro Eintrag), "sqlite" (eine Datenbank cache.sqlite3 im CACHE_DIR, WAL-Modus)
+# oder "redis" (geteilter Server mit Redis-Protokoll für mehrere Knoten, siehe CACHE_REDIS_URL)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "file")
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_REDIS_PREFIX = os.getenv("CACHE_REDIS_PREFIX", "seo-gap:")
+# Geteilter Cache: so lange füllt nur ein Knoten einen fehlenden Eintrag, die anderen warten auf sein Ergebnis
+CACHE_FILL_LEASE_SECONDS = float(os.getenv("CACHE_FILL_LEASE_SECONDS", 30))
+# Höchstens so lange wartet ein Knoten auf den Eintrag eines anderen, danach füllt er selbst (blockiert einen Worker-Thread)
+CACHE_FILL_WAIT_SECONDS = float(os.getenv("CACHE_FILL_WAIT_SECONDS", 3))
+# Serialisierung der Cache-Einträge: "auto" (zstd, falls installiert, sonst gzip), "zstd", "gzip", "none" (gerahmt, unkomprimiert)
+# oder "legacy" (JSON mit Einrückung wie früher). Einträge im alten Format werden immer gelesen.
+CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "auto")
+# Byte-Budget der LRU-Speicher-Stufe vor dem Cache (pro Prozess, 0 = aus)
+MEMORY_CACHE_BYTES = int(os.getenv("MEMORY_CACHE_BYTES", 64 * 1024 * 1024))
+# Größenlimit des Caches in Bytes (0 = unbegrenzt) und Mindestabstand der automatischen GC (0 = nur über "cli.py cache gc")
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 2 * 1024 ** 3))
+CACHE_GC_INTERVAL_SECONDS = int(os.getenv("CACHE_GC_INTERVAL_SECONDS", 300))
 
 # --- NEU: Extraktionskonfiguration ---
 # Mindestlänge des extrahierten Textes, damit er als gültig betrachtet wird
 MIN_EXTRACT_LENGTH = int(os.getenv("MIN_EXTRACT_LENGTH", 150))
 
+# --- HTTP-Verbindungspool für Seitendownloads ---
+# Anzahl gleichzeitig vorgehaltener Host-Pools und max. Keep-Alive-Verbindungen pro Host
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 50))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 10))
+# Maximale Bytes pro Seite; längere HTML-Bodies werden abgeschnitten
+MAX_DOWNLOAD_BYTES = int(os.getenv("MAX_DOWNLOAD_BYTES", 5 * 1024 * 1024))
+# Roh-HTML komprimiert cachen (Texte lassen sich dann ohne Netzwerk neu extrahieren)
+CACHE_RAW_HTML = os.getenv("CACHE_RAW_HTML", "true").lower() == "true"
+# TTL für gecachte Fehler: kurz für Timeouts/5xx/Netzwerk, lang für 4xx und Nicht-HTML
+NEGATIVE_CACHE_TTL_SHORT = int(os.getenv("NEGATIVE_CACHE_TTL_SHORT", 3600)) # 1 Stunde
+NEGATIVE_CACHE_TTL_LONG = int(os.getenv("NEGATIVE_CACHE_TTL_LONG", 30 * 86400)) # 30 Tage
+# Parallele Requests pro registrierter Domain (Startwert und Obergrenze des adaptiven Limits)
+DOMAIN_INITIAL_CONCURRENCY = int(os.getenv("DOMAIN_INITIAL_CONCURRENCY", 2))
+DOMAIN_MAX_CONCURRENCY = int(os.getenv("DOMAIN_MAX_CONCURRENCY", 8))
+# Fetch-Deadline in Sekunden (0 = aus); danach werden offene URLs abgebrochen, wenn mind. FETCH_MIN_TEXTS Texte da sind
+FETCH_DEADLINE_SECONDS = float(os.getenv("FETCH_DEADLINE_SECONDS", 0))
+FETCH_MIN_TEXTS = int(os.getenv("FETCH_MIN_TEXTS", 3))
+# Circuit Breaker pro Host (Fehler in Folge bis "open", Cool-down bis zum Probeaufruf) und Retry-Budget pro Lauf
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("CIRCUIT_COOLDOWN_SECONDS", 30))
+RETRY_BUDGET_PER_RUN = int(os.getenv("RETRY_BUDGET_PER_RUN", 20))
+# URL-Kanonisierung (Cache-Schlüssel, Deduplizierung): zu entfernende Query-Parameter (Muster mit *); www. und Slash am Ende
+# nur auf Wunsch (können auf manchen Sites andere Inhalte sein und ändern die Cache-Schlüssel)
+URL_STRIP_PARAMS = [p for p in os.getenv("URL_STRIP_PARAMS", "utm_*,gclid,dclid,fbclid,msclkid,yclid,mc_cid,mc_eid,_ga,_gl,igshid,ref_src").split(",") if p.strip()]
+URL_STRIP_WWW = os.getenv("URL_STRIP_WWW", "false").lower() == "true"
+URL_STRIP_TRAILING_SLASH = os.getenv("URL_STRIP_TRAILING_SLASH", "false").lower() == "true"
+# Gelernte Skip-Liste: Erfolgsquote der Extraktion je Domain/URL-Muster (Datei liegt im OUTPUT_DIR, überlebt --clear-cache)
+SKIP_LIST_ENABLED = os.getenv("SKIP_LIST_ENABLED", "true").lower() == "true"
+SKIP_MIN_ATTEMPTS = int(os.getenv("SKIP_MIN_ATTEMPTS", 3)) # Versuche, bevor ein Muster bewertet wird
+SKIP_SUCCESS_THRESHOLD = float(os.getenv("SKIP_SUCCESS_THRESHOLD", 0.2)) # darunter wird übersprungen
+SKIP_REFILL_FROM_SERP = os.getenv("SKIP_REFILL_FROM_SERP", "false").lower() == "true" # zusätzliche SERP-Ergebnisse als Ersatz
+
+# --- Download-Engine ("thread" = ThreadPoolExecutor, "async" = asyncio/httpx) ---
+FETCH_ENGINE = os.getenv("FETCH_ENGINE", "thread")
+ASYNC_MAX_CONNECTIONS = int(os.getenv("ASYNC_MAX_CONNECTIONS", 200)) # Gleichzeitige Verbindungen insgesamt
+ASYNC_PER_HOST_LIMIT = int(os.getenv("ASYNC_PER_HOST_LIMIT", 4)) # Obergrenze gleichzeitiger Requests pro registrierter Domain (async, adaptiv)
+# Prozesse für die Trafilatura-Extraktion (0 = Extraktion im Download-Worker, kein Prozesspool)
+EXTRACT_PROCESSES = int(os.getenv("EXTRACT_PROCESSES", 0))
+# Spacy-Vorverarbeitung startet pro Text, sobald dessen Download fertig ist (statt nach allen Downloads)
+STREAM_PREPROCESSING = os.getenv("STREAM_PREPROCESSING", "true").lower() == "true"
+# Spacy-Vorverarbeitung über nlp.pipe: Texte pro Batch und Prozesse (1 = im aufrufenden Prozess, >1 = Multiprocessing)
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", 32))
+SPACY_N_PROCESS = int(os.getenv("SPACY_N_PROCESS", 1))
+# Geladene Spacy-Modelle bleiben pro Prozess im Speicher; über dem Budget wird das am längsten ungenutzte entladen (0 = unbegrenzt)
+SPACY_MODEL_MEMORY_BYTES = int(os.getenv("SPACY_MODEL_MEMORY_BYTES", 1024 * 1024 * 1024))
+# Lemmata/Entitäten je Textinhalt und Modellversion cachen (wiederholte Analysen ohne Spacy-Arbeit)
+NLP_CACHE_ENABLED = os.getenv("NLP_CACHE_ENABLED", "true").lower() == "true"
+# Beim Start der Web-App vorab zu ladende Modelle (Sprachcodes wie "de,en" oder Modellnamen)
+SPACY_PRELOAD_MODELS = [m.strip() for m in os.getenv("SPACY_PRELOAD_MODELS", "").split(",") if m.strip()]
+
 # --- Sicherstellen, dass Verzeichnisse existieren ---
 try:
     os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -57,7 +125,14 @@ def load_config_from_json(config_path: str = "config.json"):
     """
     global LANGUAGE, RESULTS_COUNT, OPENAI_MODEL, OPENAI_TEMPERATURE, OPENAI_MAX_TOKENS, \
            SERP_API_URL, SPACY_MODEL, OUTPUT_DIR, CACHE_DIR, MAX_CACHE_AGE_SECONDS, \
-           SPACY_MODEL_MAP, MIN_EXTRACT_LENGTH # MIN_EXTRACT_LENGTH hinzugefügt
+           SPACY_MODEL_MAP, MIN_EXTRACT_LENGTH, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, \
+           FETCH_ENGINE, ASYNC_MAX_CONNECTIONS, ASYNC_PER_HOST_LIMIT, EXTRACT_PROCESSES, \
+           STREAM_PREPROCESSING, MAX_DOWNLOAD_BYTES, CACHE_RAW_HTML, \
+           NEGATIVE_CACHE_TTL_SHORT, NEGATIVE_CACHE_TTL_LONG, DOMAIN_INITIAL_CONCURRENCY, DOMAIN_MAX_CONCURRENCY, \
+           FETCH_DEADLINE_SECONDS, FETCH_MIN_TEXTS, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN_SECONDS, RETRY_BUDGET_PER_RUN, \
+           URL_STRIP_PARAMS, URL_STRIP_WWW, URL_STRIP_TRAILING_SLASH, \
+           SKIP_LIST_ENABLED, SKIP_LIST_FILE, SKIP_MIN_ATTEMPTS, SKIP_SUCCESS_THRESHOLD, SKIP_REFILL_FROM_SERP, CACHE_BACKEND, CACHE_COMPRESSION, MEMORY_CACHE_BYTES, CACHE_MAX_BYTES, CACHE_GC_INTERVAL_SECONDS, \
+           CACHE_REDIS_URL, CACHE_REDIS_PREFIX, CACHE_FILL_LEASE_SECONDS, CACHE_FILL_WAIT_SECONDS, SPACY_BATCH_SIZE, SPACY_N_PROCESS, SPACY_MODEL_MEMORY_BYTES, SPACY_PRELOAD_MODELS, NLP_CACHE_ENABLED
 
     if config_path and os.path.exists(config_path):
         try:
@@ -76,11 +151,50 @@ def load_config_from_json(config_path: str = "config.json"):
             SPACY_MODEL = config_data.get("SPACY_MODEL", SPACY_MODEL_MAP.get(LANGUAGE, "de_core_news_sm"))
             OUTPUT_DIR = config_data.get("OUTPUT_DIR", OUTPUT_DIR)
             MAX_CACHE_AGE_SECONDS = int(config_data.get("MAX_CACHE_AGE_SECONDS", MAX_CACHE_AGE_SECONDS)) # Sicherstellen, dass int
+            CACHE_BACKEND = config_data.get("CACHE_BACKEND", CACHE_BACKEND)
+            CACHE_REDIS_URL = config_data.get("CACHE_REDIS_URL", CACHE_REDIS_URL); CACHE_REDIS_PREFIX = config_data.get("CACHE_REDIS_PREFIX", CACHE_REDIS_PREFIX)
+            CACHE_FILL_LEASE_SECONDS = float(config_data.get("CACHE_FILL_LEASE_SECONDS", CACHE_FILL_LEASE_SECONDS))
+            CACHE_FILL_WAIT_SECONDS = float(config_data.get("CACHE_FILL_WAIT_SECONDS", CACHE_FILL_WAIT_SECONDS))
+            CACHE_COMPRESSION = config_data.get("CACHE_COMPRESSION", CACHE_COMPRESSION)
+            MEMORY_CACHE_BYTES = int(config_data.get("MEMORY_CACHE_BYTES", MEMORY_CACHE_BYTES))
+            CACHE_MAX_BYTES = int(config_data.get("CACHE_MAX_BYTES", CACHE_MAX_BYTES)); CACHE_GC_INTERVAL_SECONDS = int(config_data.get("CACHE_GC_INTERVAL_SECONDS", CACHE_GC_INTERVAL_SECONDS))
             # NEU: MIN_EXTRACT_LENGTH laden
             MIN_EXTRACT_LENGTH = int(config_data.get("MIN_EXTRACT_LENGTH", MIN_EXTRACT_LENGTH)) # Sicherstellen, dass int
+            HTTP_POOL_CONNECTIONS = int(config_data.get("HTTP_POOL_CONNECTIONS", HTTP_POOL_CONNECTIONS))
+            HTTP_POOL_MAXSIZE = int(config_data.get("HTTP_POOL_MAXSIZE", HTTP_POOL_MAXSIZE))
+            MAX_DOWNLOAD_BYTES = int(config_data.get("MAX_DOWNLOAD_BYTES", MAX_DOWNLOAD_BYTES))
+            CACHE_RAW_HTML = bool(config_data.get("CACHE_RAW_HTML", CACHE_RAW_HTML))
+            NEGATIVE_CACHE_TTL_SHORT = int(config_data.get("NEGATIVE_CACHE_TTL_SHORT", NEGATIVE_CACHE_TTL_SHORT))
+            NEGATIVE_CACHE_TTL_LONG = int(config_data.get("NEGATIVE_CACHE_TTL_LONG", NEGATIVE_CACHE_TTL_LONG))
+            DOMAIN_INITIAL_CONCURRENCY = int(config_data.get("DOMAIN_INITIAL_CONCURRENCY", DOMAIN_INITIAL_CONCURRENCY))
+            DOMAIN_MAX_CONCURRENCY = int(config_data.get("DOMAIN_MAX_CONCURRENCY", DOMAIN_MAX_CONCURRENCY))
+            FETCH_DEADLINE_SECONDS = float(config_data.get("FETCH_DEADLINE_SECONDS", FETCH_DEADLINE_SECONDS))
+            FETCH_MIN_TEXTS = int(config_data.get("FETCH_MIN_TEXTS", FETCH_MIN_TEXTS))
+            CIRCUIT_FAILURE_THRESHOLD = int(config_data.get("CIRCUIT_FAILURE_THRESHOLD", CIRCUIT_FAILURE_THRESHOLD))
+            CIRCUIT_COOLDOWN_SECONDS = float(config_data.get("CIRCUIT_COOLDOWN_SECONDS", CIRCUIT_COOLDOWN_SECONDS))
+            RETRY_BUDGET_PER_RUN = int(config_data.get("RETRY_BUDGET_PER_RUN", RETRY_BUDGET_PER_RUN))
+            URL_STRIP_PARAMS = config_data.get("URL_STRIP_PARAMS", URL_STRIP_PARAMS)
+            if isinstance(URL_STRIP_PARAMS, str): URL_STRIP_PARAMS = [p for p in URL_STRIP_PARAMS.split(",") if p.strip()] # auch "a,b" erlaubt
+            URL_STRIP_WWW = bool(config_data.get("URL_STRIP_WWW", URL_STRIP_WWW))
+            URL_STRIP_TRAILING_SLASH = bool(config_data.get("URL_STRIP_TRAILING_SLASH", URL_STRIP_TRAILING_SLASH))
+            SKIP_LIST_ENABLED = bool(config_data.get("SKIP_LIST_ENABLED", SKIP_LIST_ENABLED))
+            SKIP_MIN_ATTEMPTS = int(config_data.get("SKIP_MIN_ATTEMPTS", SKIP_MIN_ATTEMPTS))
+            SKIP_SUCCESS_THRESHOLD = float(config_data.get("SKIP_SUCCESS_THRESHOLD", SKIP_SUCCESS_THRESHOLD))
+            SKIP_REFILL_FROM_SERP = bool(config_data.get("SKIP_REFILL_FROM_SERP", SKIP_REFILL_FROM_SERP))
+            FETCH_ENGINE = config_data.get("FETCH_ENGINE", FETCH_ENGINE)
+            ASYNC_MAX_CONNECTIONS = int(config_data.get("ASYNC_MAX_CONNECTIONS", ASYNC_MAX_CONNECTIONS))
+            ASYNC_PER_HOST_LIMIT = int(config_data.get("ASYNC_PER_HOST_LIMIT", ASYNC_PER_HOST_LIMIT))
+            EXTRACT_PROCESSES = int(config_data.get("EXTRACT_PROCESSES", EXTRACT_PROCESSES))
+            STREAM_PREPROCESSING = bool(config_data.get("STREAM_PREPROCESSING", STREAM_PREPROCESSING))
+            SPACY_BATCH_SIZE = int(config_data.get("SPACY_BATCH_SIZE", SPACY_BATCH_SIZE)); SPACY_N_PROCESS = int(config_data.get("SPACY_N_PROCESS", SPACY_N_PROCESS))
+            SPACY_MODEL_MEMORY_BYTES = int(config_data.get("SPACY_MODEL_MEMORY_BYTES", SPACY_MODEL_MEMORY_BYTES))
+            NLP_CACHE_ENABLED = bool(config_data.get("NLP_CACHE_ENABLED", NLP_CACHE_ENABLED))
+            SPACY_PRELOAD_MODELS = config_data.get("SPACY_PRELOAD_MODELS", SPACY_PRELOAD_MODELS)
+            if isinstance(SPACY_PRELOAD_MODELS, str): SPACY_PRELOAD_MODELS = [m.strip() for m in SPACY_PRELOAD_MODELS.split(",") if m.strip()] # auch "de,en" erlaubt
 
             # Cache-Verzeichnis neu berechnen, falls OUTPUT_DIR geändert wurde
             CACHE_DIR = os.path.join(OUTPUT_DIR, "cache")
+            SKIP_LIST_FILE = os.path.join(OUTPUT_DIR, "skip_list.json")
 
             # Sicherstellen, dass Verzeichnisse existieren, falls geändert
             os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -90,7 +204,15 @@ def load_config_from_json(config_path: str = "config.json"):
             known_keys = {
                 "LANGUAGE", "RESULTS_COUNT", "OPENAI_MODEL", "OPENAI_TEMPERATURE",
                 "OPENAI_MAX_TOKENS", "SERP_API_URL", "SPACY_MODEL", "OUTPUT_DIR",
-                "MAX_CACHE_AGE_SECONDS", "MIN_EXTRACT_LENGTH" # MIN_EXTRACT_LENGTH hinzugefügt
+                "MAX_CACHE_AGE_SECONDS", "MIN_EXTRACT_LENGTH", # MIN_EXTRACT_LENGTH hinzugefügt
+                "HTTP_POOL_CONNECTIONS", "HTTP_POOL_MAXSIZE", "FETCH_ENGINE", "ASYNC_MAX_CONNECTIONS",
+                "ASYNC_PER_HOST_LIMIT", "EXTRACT_PROCESSES", "STREAM_PREPROCESSING", "MAX_DOWNLOAD_BYTES", "CACHE_RAW_HTML",
+                "NEGATIVE_CACHE_TTL_SHORT", "NEGATIVE_CACHE_TTL_LONG", "DOMAIN_INITIAL_CONCURRENCY", "DOMAIN_MAX_CONCURRENCY",
+                "FETCH_DEADLINE_SECONDS", "FETCH_MIN_TEXTS", "CIRCUIT_FAILURE_THRESHOLD", "CIRCUIT_COOLDOWN_SECONDS",
+                "RETRY_BUDGET_PER_RUN", "URL_STRIP_PARAMS", "URL_STRIP_WWW", "URL_STRIP_TRAILING_SLASH",
+                "SKIP_LIST_ENABLED", "SKIP_MIN_ATTEMPTS", "SKIP_SUCCESS_THRESHOLD", "SKIP_REFILL_FROM_SERP", "CACHE_BACKEND", "CACHE_COMPRESSION", "MEMORY_CACHE_BYTES",
+                "CACHE_MAX_BYTES", "CACHE_GC_INTERVAL_SECONDS", "CACHE_REDIS_URL", "CACHE_REDIS_PREFIX", "CACHE_FILL_LEASE_SECONDS", "CACHE_FILL_WAIT_SECONDS",
+                "SPACY_BATCH_SIZE", "SPACY_N_PROCESS", "SPACY_MODEL_MEMORY_BYTES", "SPACY_PRELOAD_MODELS", "NLP_CACHE_ENABLED"
             }
             for key in config_data:
                 if "API_KEY" in key.upper():
@@ -8,9 +8,12 @@ import logging
 import re
 import shutil
 import time
+import queue
+import threading
 import traceback
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any, Optional, Tuple
+import contextvars
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Set, Tuple, Callable
 
 # --- Third Party Imports ---
 import openai
@@ -24,12 +27,22 @@ try:
     import config
     from cache_utils import (
         clear_all_cache, clear_cache_for_query, load_from_cache,
-        save_to_cache, get_cache_key, get_cache_path
+        save_to_cache, get_cache_key, get_cache_path, canonicalize_url, get_cache_tier_stats, text_content_hash
     )
     from modules.serp_api import get_serp_results, SerpResults
-    from modules.extractor import extract_text_from_url
+    from modules.extractor import (
+        extract_text_from_url, get_connection_pool_stats, get_text_cache_stats, get_extraction_pool, lookup_text_cache,
+        get_download_stats, pop_download_sizes, get_negative_cache_stats, pop_fetch_latencies,
+        is_deadline_error, get_url_dedup_stats, record_fetch_event,
+        download_url_content, check_downloaded_content, run_trafilatura, finalize_extracted_text, trafilatura_failure
+    )
+    from modules.run_context import start_run_counters, submit_in_context
+    from modules.async_fetcher import fetch_texts_async
+    from modules.domain_scheduler import DomainScheduler
+    from modules.resilience import get_circuit_breaker, get_resilience_stats, start_retry_budget
+    from modules.skip_list import get_outcome_store, get_skip_list_stats, is_transient_error, plan_urls, record_skip_event, OutcomeStore
     import modules.tf_idf as tfidf_module
-    from modules.tf_idf import load_spacy_model
+    from modules.model_registry import get_model_registry
     from modules.openai_helper import generate_recommendations
     from modules.visualization import generate_wordcloud
 except ImportError as e:
@@ -97,13 +110,85 @@ def sanitize_filename(filename: str) -> str:
 # --- Kernanalyse-Hilfsfunktionen ---
 def _setup_analysis(language: str) -> Optional[spacy.language.Language]:
     spacy_model_name = config.get_spacy_model_for_language(language)
-    logger.info(f"Lade Spacy-Modell: {spacy_model_name}...")
-    nlp = load_spacy_model(spacy_model_name)
+    logger.info(f"Hole Spacy-Modell: {spacy_model_name}...")
+    nlp = get_model_registry().get(spacy_model_name) # einmal pro Prozess geladen, von allen Läufen geteilt
     if nlp is None: logger.error(f"Spacy-Modell '{spacy_model_name}' konnte nicht geladen werden.")
     return nlp
 
+def _run_staged_extraction(
+    urls: List[str], use_cache: bool, max_workers: int, extraction_pool: Executor, collect, deadline_seconds: Optional[float] = None,
+    cache_hits: Optional[Set[str]] = None
+) -> None:
+    """
+    Zweistufige Pipeline: Downloads in max_workers Threads über den DomainScheduler (reihum, adaptives Limit pro Domain),
+    Trafilatura im Prozesspool. Die Rohbytes gehen unverändert (ohne Dekodierung/Kopie) vom Download an den Extraktionsprozess.
+    Die Cache-Prüfung (samt Neu-Ableitung aus dem Roh-HTML) läuft in den Download-Threads, nicht seriell im Aufrufer.
+    Nach deadline_seconds werden offene URLs mit Deadline-Fehler gemeldet; Cache-Treffer landen in cache_hits.
+    """
+    validators_of: Dict[str, Optional[Dict[str, str]]] = {}
+
+    def download(url: str):
+        cached, result = _lookup_or_download(url, use_cache)
+        if cached is not None:
+            if cache_hits is not None: cache_hits.add(url)
+            return cached
+        if result.cached_result: return result.cached_result
+        error_msg = result.error_msg or check_downloaded_content(url, result.content, result.content_type, use_cache)
+        if error_msg: return None, error_msg
+        validators_of[url] = result.validators
+        return extraction_pool.submit(run_trafilatura, result.content) # Domain-Slot wird frei, Extraktion läuft weiter
+
+    def extracted(url: str, future: Future) -> Tuple[Optional[str], Optional[str]]:
+        try: text_content = future.result()
+        except Exception as trafila_error: return trafilatura_failure(url, trafila_error, use_cache)
+        return finalize_extracted_text(url, text_content, use_cache, validators_of.get(url))
+
+    with tqdm(total=len(urls), desc="Extrahiere Texte", unit="url") as progress:
+        def on_result(url: str, text: Optional[str], error_msg: Optional[str]):
+            collect(url, text, error_msg); progress.update(1)
+        DomainScheduler(max_workers).run(urls, download, on_result, deadline_seconds, complete=extracted)
+
+def _lookup_or_download(url: str, use_cache: bool):
+    """Download-Stufe: (Cache-Ergebnis, None) bei Treffer, sonst (None, Download) mit Revalidierung eines abgelaufenen Eintrags."""
+    cached, stale = lookup_text_cache(url) if use_cache else (None, None)
+    if cached is not None: return cached, None
+    return None, download_url_content(url, use_cache, stale)
+
+# Ergebnisse eines Batches pro kanonischer URL: (text, error_msg)
+FetchMemo = Dict[str, Tuple[Optional[str], Optional[str]]]
+
+def _dedupe_urls(urls: List[str], fetch_memo: Optional[FetchMemo] = None) -> Tuple[List[str], List[Tuple[str, Optional[str], Optional[str]]]]:
+    """
+    Entfernt URLs, deren kanonische Form schon weiter oben in der SERP steht (die erste bleibt), und trennt URLs ab,
+    deren Ergebnis bereits im Batch-Memo liegt. Gibt (abzurufende URLs, [(url, text, error_msg) aus dem Memo]) zurück.
+    """
+    seen = set(); to_fetch: List[str] = []; reused: List[Tuple[str, Optional[str], Optional[str]]] = []; duplicates = 0
+    for url in urls:
+        canonical = canonicalize_url(url)
+        if canonical in seen: duplicates += 1; logger.info(f"Doppelte URL übersprungen: {url}"); continue
+        seen.add(canonical)
+        if fetch_memo is not None and canonical in fetch_memo: reused.append((url, *fetch_memo[canonical]))
+        else: to_fetch.append(url)
+    if duplicates: record_fetch_event("url_duplicates", duplicates)
+    if reused: record_fetch_event("url_batch_reused", len(reused)); logger.info(f"{len(reused)} URL(s) aus früheren Keywords des Batches übernommen.")
+    return to_fetch, reused
+
+def _refill_urls(query: str, num_results: int, language: str, use_cache: bool, known_urls: List[str], count: int, store: OutcomeStore) -> List[str]:
+    """Fragt SerpApi nach weiteren Ergebnissen und liefert bis zu count neue URLs, die nicht übersprungen würden."""
+    serp_data = get_serp_results(query, num_results=min(100, num_results + count), use_cache=use_cache, language=language)
+    if serp_data.get("error"): logger.warning(f"Nachfüllen aus der SERP fehlgeschlagen: {serp_data['error']}"); return []
+    known = {canonicalize_url(url) for url in known_urls}; candidates = []
+    for result in serp_data.get("organic_results", []):
+        if "url" not in result or canonicalize_url(result["url"]) in known: continue
+        known.add(canonicalize_url(result["url"])); candidates.append(result["url"])
+    refill, _ = plan_urls(candidates, store)
+    if refill[:count]: record_skip_event("refilled", len(refill[:count])); logger.info(f"{len(refill[:count])} Ersatz-URL(s) aus der SERP nachgefüllt.")
+    return refill[:count]
+
 def _fetch_data(
-    query: str, num_results: int, language: str, use_cache: bool, max_workers: int
+    query: str, num_results: int, language: str, use_cache: bool, max_workers: int, engine: str = "thread",
+    extract_workers: int = 0, on_text: Optional[Callable[[str, str], None]] = None, deadline_seconds: Optional[float] = None,
+    fetch_memo: Optional[FetchMemo] = None, skipped_urls: Optional[List[Tuple[str, str]]] = None
 ) -> Tuple[List[str], List[str], List[Tuple[str, str]], List[str]]:
     logger.info(f"Rufe SERP-Daten für '{query}' ab (Sprache: {language}, Anzahl: {num_results}, Cache: {use_cache})...")
     serp_data: SerpResults = get_serp_results(query, num_results=num_results, use_cache=use_cache, language=language)
@@ -112,23 +197,125 @@ def _fetch_data(
     if not organic_results: logger.error("Keine organischen SERP-Ergebnisse erhalten."); return [], [], [("SERP API", "Keine organischen Ergebnisse")], related_questions
     urls = [result["url"] for result in organic_results if "url" in result]; logger.info(f"-> {len(urls)} URLs extrahiert.")
     if not urls: return [], [], [("SERP API", "Keine URLs in Ergebnissen")], related_questions
-    logger.info(f"Extrahiere Texte von {len(urls)} URLs mit {max_workers} Worker(n)...")
-    results_map: Dict[str, Tuple[Optional[str], Optional[str]]] = {}; failed_urls_with_reason: List[Tuple[str, str]] = []
+    serp_urls = urls; urls, reused = _dedupe_urls(urls, fetch_memo)
+    # Gelernte Skip-Liste: Ziele, die fast nie Text liefern, überspringen (getrennt von Fehlern gemeldet), schwache zuletzt
+    outcome_store = get_outcome_store() if config.SKIP_LIST_ENABLED else None
+    if outcome_store:
+        urls, skipped = plan_urls(urls, outcome_store)
+        if skipped:
+            logger.info(f"{len(skipped)} URL(s) laut Skip-Liste übersprungen: {', '.join(url for url, _ in skipped)}")
+            record_skip_event("skipped", len(skipped))
+            if skipped_urls is not None: skipped_urls.extend(skipped)
+            if config.SKIP_REFILL_FROM_SERP: urls += _refill_urls(query, num_results, language, use_cache, serp_urls, len(skipped), outcome_store)
+    failed_urls_with_reason: List[Tuple[str, str]] = []
     valid_texts: List[str] = []; valid_urls: List[str] = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_url = {executor.submit(extract_text_from_url, url, use_cache): url for url in urls}
-        for future in tqdm(as_completed(future_to_url), total=len(urls), desc="Extrahiere Texte", unit="url"):
-            url = future_to_url[future]
-            try:
-                text, error_msg = future.result(); results_map[url] = (text, error_msg)
-                if error_msg: logger.warning(f"Fehler Extraktion {url}: {error_msg}"); failed_urls_with_reason.append((url, error_msg))
-                elif text: valid_texts.append(text); valid_urls.append(url)
-                else: err = "Kein Text/Fehler."; logger.warning(f"Problem {url}: {err}"); failed_urls_with_reason.append((url, err))
-            except Exception as exc: logger.error(f"Executor-Fehler {url}: {exc}", exc_info=True); results_map[url] = (None, f"Exec-Fehler: {exc}"); failed_urls_with_reason.append((url, f"Exec-Fehler: {exc}"))
+    cache_hits: Set[str] = set() # Ergebnisse ohne Abruf (Text-Cache inkl. gecachter Fehler): nicht in die Skip-Liste
+
+    def collect(url: str, text: Optional[str], error_msg: Optional[str], from_memo: bool = False):
+        # Für spätere Keywords merken; Deadline-Abbrüche nicht, die URL bekommt dort eine neue Chance
+        if fetch_memo is not None and not (error_msg and is_deadline_error(error_msg)): fetch_memo[canonicalize_url(url)] = (text, error_msg)
+        fetched = not from_memo and url not in cache_hits
+        if outcome_store and fetched and not (error_msg and is_transient_error(error_msg)): outcome_store.record(url, bool(text) and not error_msg)
+        if error_msg: logger.warning(f"Fehler Extraktion {url}: {error_msg}"); failed_urls_with_reason.append((url, error_msg))
+        elif text:
+            valid_texts.append(text); valid_urls.append(url)
+            if on_text: on_text(url, text) # z.B. Streaming-Vorverarbeitung, noch während andere Downloads laufen
+        else: err = "Kein Text/Fehler."; logger.warning(f"Problem {url}: {err}"); failed_urls_with_reason.append((url, err))
+
+    for url, text, error_msg in reused: collect(url, text, error_msg, from_memo=True)
+    if not urls: logger.info("-> Keine URLs mehr abzurufen (bereits im Batch abgerufen oder übersprungen)."); return valid_texts, valid_urls, failed_urls_with_reason, related_questions
+
+    # Optionaler Prozesspool für Trafilatura (extract_workers <= 0: Extraktion im Download-Worker)
+    extraction_pool = get_extraction_pool(extract_workers)
+    if extraction_pool: logger.info(f"Trafilatura-Extraktion in {extract_workers} Prozess(en).")
+
+    if engine == "async":
+        logger.info(f"Extrahiere Texte von {len(urls)} URLs (async, max. {config.ASYNC_MAX_CONNECTIONS} Verbindungen, {config.ASYNC_PER_HOST_LIMIT}/Domain)...")
+        with tqdm(total=len(urls), desc="Extrahiere Texte", unit="url") as progress:
+            def on_result(result):
+                collect(*result); progress.update(1)
+            try: fetch_texts_async(urls, use_cache=use_cache, extract_workers=max_workers, extraction_pool=extraction_pool, on_result=on_result, deadline_seconds=deadline_seconds, cache_hits=cache_hits)
+            except Exception as exc:
+                logger.error(f"Fehler im async Abruf: {exc}", exc_info=True)
+                done = set(valid_urls) | {url for url, _ in failed_urls_with_reason}
+                failed_urls_with_reason.extend((url, f"Exec-Fehler: {exc}") for url in urls if url not in done)
+    elif extraction_pool:
+        logger.info(f"Lade {len(urls)} URLs mit {max_workers} Download-Thread(s)...")
+        _run_staged_extraction(urls, use_cache, max_workers, extraction_pool, collect, deadline_seconds, cache_hits)
+    else:
+        logger.info(f"Extrahiere Texte von {len(urls)} URLs mit {max_workers} Worker(n), max. {config.DOMAIN_MAX_CONCURRENCY} pro Domain...")
+        with tqdm(total=len(urls), desc="Extrahiere Texte", unit="url") as progress:
+            def on_result(url: str, text: Optional[str], error_msg: Optional[str]):
+                collect(url, text, error_msg); progress.update(1)
+            # Reihum über die Domains, adaptives Limit pro Domain (vermeidet 429 bei vielen Workern)
+            DomainScheduler(max_workers).run(urls, lambda url: extract_text_from_url(url, use_cache, cache_hits), on_result, deadline_seconds)
+    if outcome_store: outcome_store.save()
     logger.info(f"-> Text von {len(valid_texts)} URLs extrahiert.");
     if failed_urls_with_reason: logger.warning(f"-> Fehler bei {len(failed_urls_with_reason)} URLs.")
     return valid_texts, valid_urls, failed_urls_with_reason, related_questions
 
+class _StreamingPreprocessor:
+    """
+    Startet die Vorverarbeitung, sobald Texte aus dem Download kommen.
+    Ein einzelner NLP-Thread, damit das Spacy-Modell nie parallel genutzt wird: er nimmt alle bis dahin eingetroffenen
+    Texte (bis SPACY_BATCH_SIZE) und schickt sie gemeinsam durch analyze_texts (nlp.pipe); nur der TF-IDF-Fit wartet auf den vollen Korpus.
+    Mit include_ner entstehen die Entitäten im selben Durchlauf. Identische Texte (gleicher Inhalts-Hash) werden nur einmal verarbeitet.
+    """
+    def __init__(self, nlp: spacy.language.Language, include_ner: bool = False):
+        self._nlp = nlp; self._include_ner = include_ner; self._futures: Dict[str, Future] = {}; self._by_content: Dict[str, Future] = {}
+        self._pending: "queue.Queue[Optional[Tuple[str, Future]]]" = queue.Queue()
+        # im Kontext des Laufs, damit die Spacy-Zähler in dessen RunCounters landen
+        self._thread = threading.Thread(target=contextvars.copy_context().run, args=(self._run,), name="nlp-stream", daemon=True); self._thread.start()
+
+    def submit(self, url: str, text: str):
+        content_hash = text_content_hash(text)
+        if content_hash not in self._by_content:
+            future: Future = Future(); self._by_content[content_hash] = future; self._pending.put((text, future))
+        self._futures[url] = self._by_content[content_hash]
+
+    def _next_batch(self) -> Optional[List[Tuple[str, Future]]]:
+        """Blockiert bis zum ersten Text, nimmt dann alles Wartende mit; None nach close()."""
+        item = self._pending.get(); batch = []
+        while item is not None:
+            if item[1].set_running_or_notify_cancel(): batch.append(item)
+            if len(batch) >= config.SPACY_BATCH_SIZE: return batch
+            try: item = self._pending.get_nowait()
+            except queue.Empty: return batch
+        self._pending.put(None) # Ende erst nach dem aktuellen Batch
+        return batch or None
+
+    def _run(self):
+        while (batch := self._next_batch()) is not None:
+            if not batch: continue
+            try: results = tfidf_module.analyze_texts([text for text, _ in batch], self._nlp, include_ner=self._include_ner, n_process=1) # kleine Batches: Prozessstart lohnt nicht
+            except Exception as e:
+                for _, future in batch: future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results): future.set_result(result)
+
+    def results(self, urls: List[str]) -> Optional[List[str]]:
+        """Vorverarbeitete Texte in der Reihenfolge von urls, oder None (-> Fallback auf Vorverarbeitung in der Analyse)."""
+        if any(url not in self._futures for url in urls): return None
+        try: return [self._futures[url].result()[0] for url in urls]
+        except Exception as e: logger.warning(f"Streaming-Vorverarbeitung fehlgeschlagen, verarbeite neu: {e}", exc_info=True); return None
+
+    def entities(self, urls: List[str]) -> Optional[List[List[Tuple[str, str, int]]]]:
+        """Entitäten je URL aus demselben Durchlauf (nur mit include_ner und nach erfolgreichem results())."""
+        if not self._include_ner or any(url not in self._futures or not self._futures[url].done() for url in urls): return None
+        try: return [self._futures[url].result()[1] for url in urls]
+        except Exception: return None
+
+    def close(self):
+        for future in self._by_content.values(): future.cancel()
+        self._pending.put(None)
+
+def _latency_percentiles(latencies: List[float]) -> Dict[str, Any]:
+    """p50/p95/p99 (Nearest-Rank) und Maximum der Abrufdauern in Sekunden."""
+    if not latencies: return {"count": 0, "p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(latencies)
+    rank = lambda p: ordered[max(0, -(-len(ordered) * p // 100) - 1)]
+    return {"count": len(ordered), "p50": round(rank(50), 3), "p95": round(rank(95), 3), "p99": round(rank(99), 3), "max": round(ordered[-1], 3)}
+
 def _load_reference_text(reference_file_path: Optional[str]) -> Optional[str]:
     if not reference_file_path: return None
     logger.info(f"Lade Referenztext von: {reference_file_path}...")
@@ -142,13 +329,15 @@ def _load_reference_text(reference_file_path: Optional[str]) -> Optional[str]:
 
 def _perform_core_analysis(
     texts: List[str], urls: List[str], nlp: spacy.language.Language, reference_text: Optional[str],
-    include_ner: bool, include_clustering: bool, include_sentiment: bool
+    include_ner: bool, include_clustering: bool, include_sentiment: bool,
+    preprocessed_texts: Optional[List[str]] = None, preprocessed_entities: Optional[List[List[Tuple[str, str, int]]]] = None
 ) -> Tuple[Optional[pd.DataFrame], Dict[str, Any]]:
     logger.info("Führe Kernanalyse durch (TF-IDF, NER, Clustering, Sentiment)...")
     try:
         tfidf_df, analysis_summary = tfidf_module.perform_tf_idf_analysis(
             texts=texts, urls=urls, nlp=nlp, reference_text=reference_text,
-            include_ner=include_ner, include_clustering=include_clustering, include_sentiment=include_sentiment
+            include_ner=include_ner, include_clustering=include_clustering, include_sentiment=include_sentiment,
+            preprocessed_texts=preprocessed_texts, preprocessed_entities=preprocessed_entities
         )
         if tfidf_df is None and isinstance(analysis_summary, dict) and "error" in analysis_summary:
             logger.error(f"Fehler in perform_tf_idf_analysis: {analysis_summary['error']}")
@@ -187,7 +376,8 @@ def _save_results(
     output_format: str, output_base_path: str, query: str, language: str, num_results_requested: int,
     num_valid_urls: int, analysis_options: Dict, tfidf_df: Optional[pd.DataFrame], analysis_summary: Dict,
     related_questions: List[str], failed_urls: List, recommendations: Optional[str],
-    wordcloud_file_path: Optional[str], timestamp: str, use_cache: bool, reference_file: Optional[str]
+    wordcloud_file_path: Optional[str], timestamp: str, use_cache: bool, reference_file: Optional[str],
+    fetch_stats: Optional[Dict[str, Any]] = None, skipped_urls: Optional[List] = None
 ) -> Dict[str, str]:
     logger.info(f"Speichere Ergebnisse '{output_format}' unter: {output_base_path}*"); output_files: Dict[str, str] = {}
     if output_format in ["csv", "all"] and tfidf_df is not None and not tfidf_df.empty:
@@ -197,7 +387,7 @@ def _save_results(
         except Exception as e: logger.error(f"Fehler Speichern CSV: {e}", exc_info=True)
     elif output_format in ["csv", "all"]: logger.warning("Überspringe CSV (keine Daten).")
     try:
-        summary_json_file = f"{output_base_path}_summary.json"; json_data = { "query": query, "language": language, "timestamp": timestamp, "num_results_requested": num_results_requested, "num_results_processed": num_valid_urls, "reference_file_used": os.path.basename(reference_file) if reference_file else "Nein", "cache_used": use_cache, "analysis_options": analysis_options, "analysis_summary": analysis_summary, "related_questions": related_questions, "recommendations": recommendations, "failed_urls": failed_urls, "wordcloud_file": os.path.basename(wordcloud_file_path) if wordcloud_file_path else None }
+        summary_json_file = f"{output_base_path}_summary.json"; json_data = { "query": query, "language": language, "timestamp": timestamp, "num_results_requested": num_results_requested, "num_results_processed": num_valid_urls, "reference_file_used": os.path.basename(reference_file) if reference_file else "Nein", "cache_used": use_cache, "analysis_options": analysis_options, "analysis_summary": analysis_summary, "related_questions": related_questions, "recommendations": recommendations, "failed_urls": failed_urls, "skipped_urls": skipped_urls or [], "fetch_stats": fetch_stats or {}, "wordcloud_file": os.path.basename(wordcloud_file_path) if wordcloud_file_path else None }
         with open(summary_json_file, 'w', encoding='utf-8') as f: json.dump(json_data, f, ensure_ascii=False, indent=4)
         if output_format in ["json", "all"]: logger.info(f"-> JSON gespeichert: {os.path.basename(summary_json_file)}")
         output_files["summary_json"] = summary_json_file
@@ -225,11 +415,18 @@ def run_analysis(
     query: str, language: str = "de", num_results: int = 10,
     output_prefix: Optional[str] = None, reference_file: Optional[str] = None,
     use_cache: bool = True, include_ner: bool = False, include_clustering: bool = False,
-    include_sentiment: bool = False, max_workers: int = 5, output_format: str = "all"
+    include_sentiment: bool = False, max_workers: int = 5, output_format: str = "all",
+    fetch_engine: Optional[str] = None, extract_workers: Optional[int] = None,
+    stream_preprocessing: Optional[bool] = None, fetch_deadline_seconds: Optional[float] = None,
+    fetch_memo: Optional[FetchMemo] = None
 ) -> Dict[str, Any]:
     start_time = time.time(); timestamp = time.strftime('%Y%m%d-%H%M%S')
     logger.info("-" * 50); logger.info(f"Starte Analyse für: '{query}' (Sprache: {language}, Zeit: {timestamp})")
-    logger.info(f"Parameter: Num Results={num_results}, Workers={max_workers}, Cache={'an' if use_cache else 'aus'}, Format={output_format}")
+    fetch_engine = fetch_engine or config.FETCH_ENGINE
+    extract_workers = config.EXTRACT_PROCESSES if extract_workers is None else extract_workers
+    stream_preprocessing = config.STREAM_PREPROCESSING if stream_preprocessing is None else stream_preprocessing
+    fetch_deadline_seconds = (config.FETCH_DEADLINE_SECONDS if fetch_deadline_seconds is None else fetch_deadline_seconds) or None
+    logger.info(f"Parameter: Num Results={num_results}, Workers={max_workers}, Extraktionsprozesse={extract_workers}, Engine={fetch_engine}, Deadline={f'{fetch_deadline_seconds:g}s' if fetch_deadline_seconds else 'aus'}, Cache={'an' if use_cache else 'aus'}, Format={output_format}")
     analysis_options = {"ner": include_ner, "cluster": include_clustering, "sentiment": include_sentiment}
     # DEBUG LOG: Zeige die empfangenen Optionen
     logger.debug(f"Analyse-Optionen für diesen Lauf: {analysis_options}")
@@ -239,14 +436,74 @@ def run_analysis(
     nlp = _setup_analysis(language)
     if not nlp: return {"success": False, "error": f"Spacy-Modell '{language}' nicht geladen.", "query": query, "language": language}
 
-    texts, valid_urls, failed_urls, related_questions = _fetch_data(query, num_results, language, use_cache, max_workers)
+    run_counters = start_run_counters(); skipped_urls: List[Tuple[str, str]] = [] # Zähler nur dieses Laufs (auch aus den Workern)
+    retry_budget = start_retry_budget(); fetch_started = time.time()
+    streaming = _StreamingPreprocessor(nlp, include_ner=include_ner) if stream_preprocessing else None
+    try:
+        texts, valid_urls, failed_urls, related_questions = _fetch_data(
+            query, num_results, language, use_cache, max_workers, engine=fetch_engine, extract_workers=extract_workers,
+            on_text=streaming.submit if streaming else None, deadline_seconds=fetch_deadline_seconds, fetch_memo=fetch_memo,
+            skipped_urls=skipped_urls
+        )
+        preprocessed_texts = streaming.results(valid_urls) if streaming and texts else None
+        preprocessed_entities = streaming.entities(valid_urls) if preprocessed_texts is not None else None
+    finally:
+        if streaming: streaming.close()
+    fetch_stats: Dict[str, Any] = {
+        "connection_pool": get_connection_pool_stats(run_counters),
+        "text_cache": get_text_cache_stats(run_counters),
+        "downloads": get_download_stats(run_counters),
+        "negative_cache": get_negative_cache_stats(run_counters),
+        "url_dedup": get_url_dedup_stats(run_counters),
+        "skip_list": get_skip_list_stats(run_counters),
+        "cache_tiers": get_cache_tier_stats(run_counters) # Belegung des Speichers absolut
+    }
+    fetched_urls = list(valid_urls) + [url for url, _ in failed_urls]
+    fetch_stats["downloads"]["bytes_by_url"] = pop_download_sizes(fetched_urls)
+    fetch_stats["latency"] = _latency_percentiles(list(pop_fetch_latencies(fetched_urls).values()))
+    deadline_failures = sum(1 for _, reason in failed_urls if is_deadline_error(reason))
+    fetch_stats["deadline"] = {"seconds": fetch_deadline_seconds, "cancelled": deadline_failures}
+    fetch_stats["resilience"] = {
+        **get_resilience_stats(run_counters), "retry_budget": retry_budget.summary(),
+        "state_changes": get_circuit_breaker().events_since(fetch_started), "open_circuits": get_circuit_breaker().states()
+    }
+    pool = fetch_stats["connection_pool"]; text_cache = fetch_stats["text_cache"]; downloads = fetch_stats["downloads"]
+    logger.info(f"Verbindungspool: {pool['requests']} Requests, {pool['connections_opened']} neue Verbindungen, {pool['connections_reused']} wiederverwendet.")
+    logger.info(f"Text-Cache: {text_cache['hits']} Treffer, {text_cache['revalidated']} revalidiert (304), {text_cache['refetched']} neu geladen, {text_cache['rederived']} aus Roh-HTML abgeleitet, {text_cache['misses']} Misses, {text_cache['content_shared']} Texte mit bereits gespeichertem Inhalt.")
+    logger.info(f"Downloads: {downloads['bytes_downloaded']} Bytes gelesen, {downloads['truncated']} abgeschnitten, {downloads['aborted_non_html']} Nicht-HTML vor dem Body abgebrochen.")
+    tiers = fetch_stats["cache_tiers"]
+    logger.info(f"Cache-Stufen: Speicher {tiers['memory_hits']} Treffer/{tiers['memory_misses']} Misses ({tiers['memory_bytes']}/{tiers['memory_max_bytes']} Bytes), Platte {tiers['disk_hits']} Treffer/{tiers['disk_misses']} Misses.")
+    negative = fetch_stats["negative_cache"]
+    if negative["saved_requests"]:
+        by_class = ", ".join(f"{name}={count}" for name, count in negative.items() if count and name != "saved_requests")
+        logger.info(f"Negativ-Cache: {negative['saved_requests']} Abrufe eingespart ({by_class}).")
+    dedup = fetch_stats["url_dedup"]
+    if dedup["saved_requests"]: logger.info(f"URL-Kanonisierung: {dedup['saved_requests']} Abrufe eingespart ({dedup['duplicates']} Duplikate in der SERP, {dedup['batch_reused']} aus dem Batch übernommen).")
+    if skipped_urls: logger.info(f"Skip-Liste: {len(skipped_urls)} URL(s) übersprungen, {fetch_stats['skip_list']['refilled']} aus der SERP nachgefüllt.")
+    resilience = fetch_stats["resilience"]; budget = resilience["retry_budget"]
+    logger.info(f"Retries: {budget['used']}/{budget['limit']} genutzt, {budget['denied']} verweigert; Circuit Breaker: {len(resilience['state_changes'])} Zustandswechsel, {resilience['fast_failed']} Aufrufe sofort abgelehnt.")
+    latency = fetch_stats["latency"]
+    if latency["count"]: logger.info(f"Abrufdauer ({latency['count']} URLs): p50={latency['p50']}s, p95={latency['p95']}s, p99={latency['p99']}s, max={latency['max']}s.")
+    if deadline_failures and len(texts) < config.FETCH_MIN_TEXTS:
+        err_msg = f"Nur {len(texts)} Texte vor Ablauf der Fetch-Deadline ({fetch_deadline_seconds:g}s), mindestens {config.FETCH_MIN_TEXTS} benötigt."
+        logger.error(err_msg)
+        return {"success": False, "error": err_msg, "query": query, "language": language, "failed_urls": failed_urls, "skipped_urls": skipped_urls, "fetch_stats": fetch_stats}
+    if deadline_failures: logger.warning(f"Fetch-Deadline: Analyse läuft mit {len(texts)} Texten weiter, {deadline_failures} URL(s) abgebrochen.")
     if not texts:
         err_msg = "; ".join([f"{url}: {reason}" for url, reason in failed_urls]) if failed_urls else "Keine Texte/SERPs."
         logger.error(f"Keine Texte zur Analyse verfügbar. Fehler: {err_msg}")
-        return {"success": False, "error": f"Keine Texte zur Analyse verfügbar. Details: {err_msg}", "query": query, "language": language, "failed_urls": failed_urls}
+        return {"success": False, "error": f"Keine Texte zur Analyse verfügbar. Details: {err_msg}", "query": query, "language": language, "failed_urls": failed_urls, "skipped_urls": skipped_urls}
 
     reference_text = _load_reference_text(reference_file)
-    tfidf_df, analysis_summary = _perform_core_analysis(texts, valid_urls, nlp, reference_text, include_ner, include_clustering, include_sentiment)
+    tfidf_df, analysis_summary = _perform_core_analysis(texts, valid_urls, nlp, reference_text, include_ner, include_clustering, include_sentiment, preprocessed_texts=preprocessed_texts, preprocessed_entities=preprocessed_entities)
+
+    nlp_stats = fetch_stats["nlp"] = {key: round(value, 3) for key, value in tfidf_module.get_nlp_stats(run_counters).items()}
+    nlp_stats["disabled_components"] = tfidf_module.disabled_components(nlp, include_ner=include_ner)
+    cache_lookups = nlp_stats.get("cache_hits", 0) + nlp_stats.get("cache_misses", 0)
+    nlp_stats["cache_hit_ratio"] = round(nlp_stats.get("cache_hits", 0) / cache_lookups, 3) if cache_lookups else None
+    component_times = ", ".join(f"{key[len('seconds_'):]} {value:.2f}s" for key, value in nlp_stats.items() if key.startswith("seconds_"))
+    logger.info(f"Spacy: {nlp_stats.get('docs', 0)} Docs, {component_times or 'keine Zeitmessung'}; nicht ausgeführt: {', '.join(nlp_stats['disabled_components']) or '-'}.")
+    if cache_lookups: logger.info(f"NLP-Cache: {nlp_stats.get('cache_hits', 0)} von {cache_lookups} Texten ohne Spacy ({nlp_stats['cache_hit_ratio']:.0%}).")
 
     # DEBUG LOG: Gib die Keys des Summarys nach der Kernanalyse aus
     logger.debug(f"Keys im analysis_summary nach _perform_core_analysis: {analysis_summary.keys() if isinstance(analysis_summary, dict) else 'Kein Dict'}")
@@ -267,7 +524,8 @@ def run_analysis(
         num_results_requested=num_results, num_valid_urls=len(valid_urls), analysis_options=analysis_options,
         tfidf_df=tfidf_df, analysis_summary=analysis_summary, related_questions=related_questions,
         failed_urls=failed_urls, recommendations=recommendations, wordcloud_file_path=wordcloud_file_path,
-        timestamp=timestamp, use_cache=use_cache, reference_file=reference_file
+        timestamp=timestamp, use_cache=use_cache, reference_file=reference_file, fetch_stats=fetch_stats,
+        skipped_urls=skipped_urls
     )
 
     end_time = time.time(); duration = end_time - start_time
@@ -277,7 +535,79 @@ def run_analysis(
         "success": True, "query": query, "language": language, "output_files": output_files,
         "tfidf_dataframe": tfidf_df.to_dict('records') if tfidf_df is not None and not tfidf_df.empty else [],
         "analysis_summary": analysis_summary, "related_questions": related_questions,
-        "recommendations": recommendations, "failed_urls": failed_urls, "wordcloud_file_path": wordcloud_file_path,
-        "duration_seconds": duration
+        "recommendations": recommendations, "failed_urls": failed_urls, "skipped_urls": skipped_urls, "wordcloud_file_path": wordcloud_file_path,
+        "fetch_stats": fetch_stats, "duration_seconds": duration
     }
-    return result_dict
\ No newline at end of file
+    return result_dict
+
+def run_batch_analysis(queries: List[str], **kwargs) -> List[Dict[str, Any]]:
+    """
+    Führt run_analysis für mehrere Keywords nacheinander aus. URLs, die in mehreren SERPs vorkommen,
+    werden nur einmal abgerufen (gemeinsames Memo pro kanonischer URL, auch ohne Cache).
+    """
+    fetch_memo: FetchMemo = {}; results = []
+    for index, query in enumerate(queries, 1):
+        logger.info(f"Batch: Keyword {index}/{len(queries)}: '{query}'")
+        results.append(run_analysis(query, fetch_memo=fetch_memo, **kwargs))
+    saved = sum(result.get("fetch_stats", {}).get("url_dedup", {}).get("saved_requests", 0) for result in results)
+    logger.info(f"Batch abgeschlossen: {sum(1 for r in results if r.get('success'))}/{len(queries)} erfolgreich, {saved} Abrufe durch Deduplizierung eingespart.")
+    return results
+
+def prewarm_cache(
+    queries: List[str], num_results: Optional[int] = None, language: Optional[str] = None, serp_workers: int = 4,
+    max_connections: Optional[int] = None, per_host_limit: Optional[int] = None, extract_workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Füllt den Cache für eine Keyword-Liste vor: SERPs parallel (serp_workers), danach alle Texte der SERPs in einem
+    async Abruf (max_connections, per_host_limit). URLs aus mehreren SERPs werden einmal geladen, die Skip-Liste gilt.
+    Keine NLP-, TF-IDF- oder OpenAI-Schritte. Gibt Durchsatz und Fehler zurück.
+    Ohne Angabe gelten RESULTS_COUNT, LANGUAGE und EXTRACT_PROCESSES der aktuellen Konfiguration (auch nach load_config_from_json).
+    """
+    num_results = config.RESULTS_COUNT if num_results is None else num_results
+    language = config.LANGUAGE if language is None else language
+    extract_workers = config.EXTRACT_PROCESSES if extract_workers is None else extract_workers
+    started = time.time(); run_counters = start_run_counters()
+    retry_budget = start_retry_budget(config.RETRY_BUDGET_PER_RUN * max(1, len(queries))) # Budget wie bei Einzelläufen, pro Keyword
+    report: Dict[str, Any] = {"queries": len(queries), "serp_failed": [], "urls": 0, "skipped": 0, "texts_ok": 0, "texts_failed": []}
+    logger.info(f"Cache-Vorwärmen: {len(queries)} Keywords, {serp_workers} SERP-Abrufe parallel...")
+    urls_by_query: Dict[str, List[str]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, serp_workers), thread_name_prefix="prewarm-serp") as serp_pool:
+        serp_futures = {submit_in_context(serp_pool, get_serp_results, query, num_results=num_results, use_cache=True, language=language): query for query in queries}
+        for future in tqdm(as_completed(serp_futures), total=len(serp_futures), desc="SERPs", unit="keyword"):
+            query = serp_futures[future]
+            try: serp_data = future.result()
+            except Exception as exc: serp_data = {"error": f"Exec-Fehler: {exc}"}
+            if serp_data.get("error"): report["serp_failed"].append((query, serp_data["error"])); continue
+            urls_by_query[query] = [result["url"] for result in serp_data.get("organic_results", []) if "url" in result]
+    report["serp_seconds"] = round(time.time() - started, 2)
+    urls, _ = _dedupe_urls([url for query in queries for url in urls_by_query.get(query, [])]) # Reihenfolge der Keyword-Datei
+    outcome_store = get_outcome_store() if config.SKIP_LIST_ENABLED else None
+    if outcome_store: urls, skipped = plan_urls(urls, outcome_store); report["skipped"] = len(skipped)
+    report["urls"] = len(urls); cache_hits: Set[str] = set()
+
+    def on_result(result):
+        url, text, error_msg = result
+        if outcome_store and url not in cache_hits and not (error_msg and is_transient_error(error_msg)): outcome_store.record(url, bool(text) and not error_msg)
+        if text and not error_msg: report["texts_ok"] += 1
+        else: report["texts_failed"].append((url, error_msg or "Kein Text/Fehler."))
+        progress.update(1)
+
+    texts_started = time.time()
+    if urls:
+        max_connections = max_connections or config.ASYNC_MAX_CONNECTIONS; extraction_pool = get_extraction_pool(extract_workers)
+        logger.info(f"Lade {len(urls)} URLs (async, max. {max_connections} Verbindungen, {per_host_limit or config.ASYNC_PER_HOST_LIMIT}/Domain)...")
+        with tqdm(total=len(urls), desc="Texte", unit="url") as progress:
+            # Threads für Cache-Zugriffe (und Trafilatura ohne Prozesspool) wachsen mit der Zahl der Verbindungen
+            fetch_texts_async(urls, use_cache=True, max_connections=max_connections, per_host_limit=per_host_limit,
+                              extract_workers=min(32, max_connections), extraction_pool=extraction_pool, on_result=on_result, cache_hits=cache_hits)
+    if outcome_store: outcome_store.save()
+    text_seconds = time.time() - texts_started; duration = time.time() - started
+    report.update({
+        "text_seconds": round(text_seconds, 2), "duration_seconds": round(duration, 2),
+        "urls_per_second": round(len(urls) / text_seconds, 2) if urls and text_seconds > 0 else 0.0,
+        "text_cache": get_text_cache_stats(run_counters), "downloads": get_download_stats(run_counters),
+        "retry_budget": retry_budget.summary()
+    })
+    logger.info(f"Cache-Vorwärmen abgeschlossen in {duration:.1f}s: {len(queries) - len(report['serp_failed'])}/{len(queries)} SERPs, "
+                f"{report['texts_ok']}/{len(urls)} Texte ({report['urls_per_second']} URLs/s), {report['skipped']} übersprungen.")
+    return report
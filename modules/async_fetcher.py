@@ -0,0 +1,211 @@
+# SEO-GAP-ANALYSIS/modules/async_fetcher.py
+import os
+import sys
+import time
+import asyncio
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception, RetryError
+
+logger = logging.getLogger(__name__)
+
+try:
+    import config
+    from modules.extractor import (
+        REQUEST_HEADERS, lookup_text_cache, revalidated_result, record_fetch_event, conditional_headers, response_validators,
+        check_downloaded_content, run_trafilatura, finalize_extracted_text, trafilatura_failure, describe_http_status_error,
+        cache_extraction_failure, read_capped_body, record_download_size, DOWNLOAD_CHUNK_SIZE, store_raw_content, classify_fetch_error,
+        record_fetch_latency, describe_deadline_error, describe_circuit_open_error
+    )
+    from modules.resilience import CircuitOpenError, get_circuit_breaker, retry_within_budget
+    from modules.run_context import run_in_executor_in_context
+    from modules.domain_scheduler import AsyncDomainLimiter
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import config
+    from modules.extractor import (
+        REQUEST_HEADERS, lookup_text_cache, revalidated_result, record_fetch_event, conditional_headers, response_validators,
+        check_downloaded_content, run_trafilatura, finalize_extracted_text, trafilatura_failure, describe_http_status_error,
+        cache_extraction_failure, read_capped_body, record_download_size, DOWNLOAD_CHUNK_SIZE, store_raw_content, classify_fetch_error,
+        record_fetch_latency, describe_deadline_error, describe_circuit_open_error
+    )
+    from modules.resilience import CircuitOpenError, get_circuit_breaker, retry_within_budget
+    from modules.run_context import run_in_executor_in_context
+    from modules.domain_scheduler import AsyncDomainLimiter
+
+# Ergebnis pro URL in Abschlussreihenfolge: (url, text, error_msg)
+FetchResult = Tuple[str, Optional[str], Optional[str]]
+
+# Retry Konfiguration analog zu modules/extractor.py (Netzwerkfehler und 5xx)
+RETRY_EXCEPTIONS_ASYNC = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+def log_retry_async(retry_state):
+    exception = retry_state.outcome.exception() if retry_state.outcome else "Unknown Exception"
+    logger.warning(
+        f"Netzwerkfehler beim async Abruf (Versuch {retry_state.attempt_number}): {exception.__class__.__name__}. "
+        f"Warte {retry_state.next_action.sleep:.2f}s..."
+    )
+
+@retry(
+    stop=stop_after_attempt(2),
+    wait=wait_exponential(multiplier=1, min=2, max=5),
+    retry=retry_if_exception(
+        lambda e: isinstance(e, RETRY_EXCEPTIONS_ASYNC) or \
+                  (isinstance(e, httpx.HTTPStatusError) and e.response.status_code >= 500)
+    ) & retry_within_budget(),
+    before_sleep=log_retry_async
+)
+async def _fetch_url_content_async(client: httpx.AsyncClient, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    """Sendet den Request gestreamt: nur die Header sind gelesen, der Aufrufer muss die Antwort schließen."""
+    logger.debug(f"-> Versuche async Download von {url}...")
+    host = _host_of(url); breaker = get_circuit_breaker()
+    breaker.before_call(host)
+    try: response = await client.send(client.build_request("GET", url, headers=headers), stream=True)
+    except RETRY_EXCEPTIONS_ASYNC: breaker.record_failure(host); raise
+    except Exception: breaker.record_success(host); raise # kein Host-Problem, gibt den Probeaufruf frei
+    except BaseException: breaker.release_trial(host); raise # CancelledError (Deadline): Host sonst dauerhaft gesperrt
+    (breaker.record_failure if response.status_code >= 500 else breaker.record_success)(host)
+    if response.status_code == 304: return response # Revalidierung: unverändert
+    try: response.raise_for_status()
+    except httpx.HTTPStatusError: await response.aclose(); raise
+    return response
+
+async def _read_capped_body_async(url: str, response: httpx.Response) -> bytes:
+    """Async-Pendant zu extractor._read_html_body: liest höchstens MAX_DOWNLOAD_BYTES."""
+    max_bytes = config.MAX_DOWNLOAD_BYTES
+    chunks = []; total = 0
+    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+        chunks.append(chunk); total += len(chunk)
+        if total > max_bytes: break
+    content, truncated = read_capped_body(chunks, max_bytes)
+    if truncated: logger.warning(f"Antwort von {url} nach {max_bytes} Bytes abgeschnitten.")
+    record_download_size(url, len(content), truncated)
+    return content
+
+def _host_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+async def _fetch_one(
+    client: httpx.AsyncClient, url: str, use_cache: bool, limiter: AsyncDomainLimiter, executor: ThreadPoolExecutor,
+    extraction_pool: Optional[Executor] = None, cache_hits: Optional[Set[str]] = None
+) -> FetchResult:
+    loop = asyncio.get_running_loop()
+    cached, stale = await run_in_executor_in_context(loop, executor, lookup_text_cache, url) if use_cache else (None, None)
+    if cached is not None:
+        if cache_hits is not None: cache_hits.add(url)
+        return url, cached[0], cached[1]
+    domain = await limiter.acquire(url); started = time.monotonic() # Abrufdauer ohne Wartezeit auf den Domain-Slot
+    result = await _download_and_extract(client, url, use_cache, stale, limiter, domain, started, executor, extraction_pool)
+    limiter.record(domain, time.monotonic() - started, result[2]) # Limit der Domain an Latenz und Überlast-Fehler anpassen
+    return result
+
+async def _download_and_extract(
+    client: httpx.AsyncClient, url: str, use_cache: bool, stale, limiter: AsyncDomainLimiter, domain: str, started: float,
+    executor: ThreadPoolExecutor, extraction_pool: Optional[Executor] = None
+) -> FetchResult:
+    """Download im Domain-Slot (wird nach dem Download freigegeben), danach Extraktion; Fehler werden gecacht wie bisher."""
+    loop = asyncio.get_running_loop()
+    try:
+        try:
+            response = await _fetch_url_content_async(client, url, conditional_headers(stale["validators"]) if stale else None)
+            try:
+                content_type = response.headers.get('Content-Type', '').lower()
+                if response.status_code == 304 or 'html' not in content_type: content = None
+                else: content = await _read_capped_body_async(url, response)
+            finally: await response.aclose() # Nicht-HTML: Verbindung ohne Body-Download schließen
+        finally: record_fetch_latency(url, time.monotonic() - started); limiter.release(domain)
+        if stale and response.status_code == 304:
+            text, error_msg = await run_in_executor_in_context(loop, executor, revalidated_result, url, stale)
+            return url, text, error_msg
+        if stale: record_fetch_event("text_cache_refetched")
+        if content is None: record_fetch_event("downloads_aborted_non_html"); record_download_size(url, 0)
+        validators = response_validators(response.headers)
+        if content: validators = await run_in_executor_in_context(loop, executor, store_raw_content, url, content, content_type, validators, use_cache)
+        error_msg = await run_in_executor_in_context(loop, executor, check_downloaded_content, url, content, content_type, use_cache)
+        if error_msg: return url, None, error_msg
+        # Trafilatura läuft im Prozesspool (bzw. Thread-Pool), damit der Event-Loop frei bleibt
+        try: text_content = await loop.run_in_executor(extraction_pool or executor, run_trafilatura, content)
+        except Exception as trafila_error:
+            text, error_msg = await run_in_executor_in_context(loop, executor, trafilatura_failure, url, trafila_error, use_cache)
+            return url, text, error_msg
+        text, error_msg = await run_in_executor_in_context(loop, executor, finalize_extracted_text, url, text_content, use_cache, validators)
+        return url, text, error_msg
+    except httpx.HTTPStatusError as e:
+        error_class = classify_fetch_error(e)
+        if 400 <= e.response.status_code < 500:
+            error_msg = describe_http_status_error(e.response.status_code, e.response.reason_phrase)
+            logger.warning(f"{error_msg} beim Abruf von {url}")
+        else:
+            error_msg = f"Netzwerkfehler (RequestException): {e.__class__.__name__}"
+            logger.error(f"Fehler bei Extraktion von {url}: {error_msg}")
+    except httpx.HTTPError as e:
+        error_class = classify_fetch_error(e)
+        error_msg = f"Netzwerkfehler (RequestException): {e.__class__.__name__}"
+        logger.error(f"Fehler bei Extraktion von {url}: {error_msg}")
+    except RetryError as e:
+        original_exception = e.__cause__ if e.__cause__ else e
+        error_msg = f"Netzwerkfehler nach Retries: {original_exception.__class__.__name__}"
+        error_class = classify_fetch_error(original_exception)
+        logger.error(f"Fehler bei Extraktion von {url} nach allen Retries: {error_msg}")
+    except CircuitOpenError as e:
+        error_msg = describe_circuit_open_error(e); error_class = "circuit_open"
+        logger.warning(f"{error_msg} ({url})")
+    except Exception as e:
+        error_msg = f"Unerwarteter Extraktionsfehler: {e}"; error_class = "unexpected"
+        logger.exception(f"Schwerwiegender Fehler bei Extraktion von {url}")
+    text, error_msg = await run_in_executor_in_context(loop, executor, cache_extraction_failure, url, error_msg, use_cache, error_class)
+    return url, text, error_msg
+
+async def _fetch_all(
+    urls: List[str], use_cache: bool, max_connections: int, per_host_limit: int, extract_workers: int,
+    extraction_pool: Optional[Executor] = None, on_result=None, deadline_seconds: Optional[float] = None, cache_hits: Optional[Set[str]] = None
+) -> List[FetchResult]:
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    timeout = httpx.Timeout(15.0)
+    results: List[FetchResult] = []
+    # eTLD+1 wie im DomainScheduler, adaptiv bis höchstens per_host_limit gleichzeitige Requests pro Domain
+    limiter = AsyncDomainLimiter(initial_limit=min(config.DOMAIN_INITIAL_CONCURRENCY, per_host_limit), max_limit=per_host_limit)
+    executor = ThreadPoolExecutor(max_workers=extract_workers, thread_name_prefix="extract"); expired = False
+    try:
+        async with httpx.AsyncClient(headers=REQUEST_HEADERS, limits=limits, timeout=timeout, follow_redirects=True) as client:
+            tasks = [asyncio.ensure_future(_fetch_one(client, url, use_cache, limiter, executor, extraction_pool, cache_hits)) for url in urls]
+            try:
+                for next_done in asyncio.as_completed(tasks, timeout=deadline_seconds or None):
+                    result = await next_done; results.append(result)
+                    if on_result: on_result(result)
+            except asyncio.TimeoutError:
+                # Nachzügler abbrechen; sie landen mit Deadline-Grund bei den Fehlern
+                expired = True
+                for task in tasks: task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                done_urls = {result[0] for result in results}
+                for url in urls:
+                    if url in done_urls: continue
+                    result = (url, None, describe_deadline_error(deadline_seconds)); results.append(result)
+                    if on_result: on_result(result)
+                logger.warning(f"Fetch-Deadline ({deadline_seconds:g}s) erreicht: {len(urls) - len(done_urls)} URL(s) abgebrochen.")
+    finally: executor.shutdown(wait=not expired, cancel_futures=True) # laufende Extraktionen nicht abwarten
+    logger.debug(f"Domain-Limits nach dem async Abruf: {limiter.stats()}")
+    return results
+
+def fetch_texts_async(
+    urls: List[str], use_cache: bool = True, max_connections: Optional[int] = None,
+    per_host_limit: Optional[int] = None, extract_workers: int = 5, extraction_pool: Optional[Executor] = None,
+    on_result=None, deadline_seconds: Optional[float] = None, cache_hits: Optional[Set[str]] = None
+) -> List[FetchResult]:
+    """
+    Lädt alle URLs nebenläufig mit asyncio/httpx und extrahiert die Texte in einem Thread-Pool
+    (oder, falls übergeben, im Prozesspool extraction_pool).
+    Gibt (url, text, error_msg) in Abschlussreihenfolge zurück; on_result wird pro URL aufgerufen.
+    Gleichzeitige Requests pro registrierter Domain passen sich wie im DomainScheduler an (höchstens per_host_limit).
+    Mit deadline_seconds werden nach Ablauf alle offenen Abrufe abgebrochen und mit Deadline-Fehler gemeldet.
+    URLs, deren Ergebnis ohne Abruf aus dem Cache kam, werden vor on_result in cache_hits eingetragen.
+    """
+    max_connections = max_connections or config.ASYNC_MAX_CONNECTIONS
+    per_host_limit = per_host_limit or config.ASYNC_PER_HOST_LIMIT
+    logger.debug(f"Async-Abruf von {len(urls)} URLs (max. {max_connections} Verbindungen, {per_host_limit}/Domain, {extract_workers} Extraktions-Threads)")
+    return asyncio.run(_fetch_all(urls, use_cache, max_connections, per_host_limit, max(1, extract_workers), extraction_pool, on_result, deadline_seconds, cache_hits))
@@ -0,0 +1,182 @@
+# SEO-GAP-ANALYSIS/modules/domain_scheduler.py
+import os
+import sys
+import time
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from tld import get_fld
+
+logger = logging.getLogger(__name__)
+
+try:
+    import config
+    from modules.extractor import is_congestion_error, describe_deadline_error
+    from modules.run_context import submit_in_context
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import config
+    from modules.extractor import is_congestion_error, describe_deadline_error
+    from modules.run_context import submit_in_context
+
+# Latenz über LATENCY_FACTOR x bester Latenz gilt als Überlast: das Limit wächst dann nicht weiter
+LATENCY_FACTOR = 2.0
+
+def registered_domain(url: str) -> str:
+    """Registrierte Domain (eTLD+1) einer URL, z.B. 'example.co.uk'; Fallback auf den Hostnamen (IPs, localhost)."""
+    return get_fld(url, fail_silently=True) or (urlsplit(url).hostname or "").lower()
+
+class _DomainState:
+    """Parallelitätslimit einer Domain (AIMD) und Zähler für die Laufzusammenfassung."""
+    def __init__(self, limit: float):
+        self.limit = limit; self.in_flight = 0; self.best_latency: Optional[float] = None
+        self.requests = 0; self.congestion_events = 0
+        self.queue: Deque[str] = deque()
+
+    def record(self, latency: float, congested: bool, min_limit: int, max_limit: int):
+        """Additive Erhöhung (ca. +1 pro vollem Fenster) bei Erfolg, Halbierung bei Überlast-Fehlern."""
+        self.requests += 1
+        if congested:
+            self.congestion_events += 1; self.limit = max(float(min_limit), self.limit / 2); return
+        self.best_latency = latency if self.best_latency is None else min(self.best_latency, latency)
+        if latency <= self.best_latency * LATENCY_FACTOR: self.limit = min(float(max_limit), self.limit + 1.0 / self.limit)
+
+class DomainScheduler:
+    """
+    Verteilt URLs reihum über die registrierten Domains auf einen Thread-Pool und begrenzt die laufenden
+    Requests pro Domain. Das Limit passt sich an Latenz und Fehler an (additiv wachsen, bei 429/5xx/Timeouts halbieren).
+    Zustand und Buchhaltung liegen im aufrufenden Thread, die Worker führen nur fetch(url) aus.
+    """
+    def __init__(self, max_workers: int, initial_limit: Optional[int] = None, max_limit: Optional[int] = None, min_limit: int = 1):
+        self.max_workers = max(1, max_workers); self.min_limit = max(1, min_limit)
+        self.initial_limit = initial_limit or config.DOMAIN_INITIAL_CONCURRENCY
+        self.max_limit = max(self.initial_limit, max_limit or config.DOMAIN_MAX_CONCURRENCY)
+        self._domains: "OrderedDict[str, _DomainState]" = OrderedDict()
+        self._rotation: Deque[str] = deque()
+
+    def _enqueue(self, urls: List[str]):
+        for url in urls:
+            domain = registered_domain(url)
+            if domain not in self._domains:
+                self._domains[domain] = _DomainState(float(self.initial_limit)); self._rotation.append(domain)
+            self._domains[domain].queue.append(url)
+
+    def _next_url(self) -> Optional[Tuple[str, str]]:
+        """Nächste URL im Round-Robin über Domains mit freiem Slot, oder None."""
+        for _ in range(len(self._rotation)):
+            domain = self._rotation[0]; self._rotation.rotate(-1)
+            state = self._domains[domain]
+            if state.queue and state.in_flight < int(state.limit): return domain, state.queue.popleft()
+        return None
+
+    def run(
+        self, urls: List[str], fetch: Callable[[str], Union[Tuple[Optional[str], Optional[str]], Future]],
+        on_result: Callable[[str, Optional[str], Optional[str]], None], deadline_seconds: Optional[float] = None,
+        complete: Optional[Callable[[str, Future], Tuple[Optional[str], Optional[str]]]] = None
+    ):
+        """
+        Führt fetch(url) -> (text, error_msg) für alle URLs aus; on_result(url, text, error_msg) in Abschlussreihenfolge.
+        Mit complete darf fetch statt des Ergebnisses ein Future einer Folgestufe liefern (z.B. Extraktion im Prozesspool):
+        der Domain-Slot ist dann frei, das Ergebnis liefert complete(url, future) im aufrufenden Thread.
+        Nach deadline_seconds werden wartende und laufende URLs mit Deadline-Fehler gemeldet (laufende Threads
+        beenden sich im Hintergrund und füllen noch den Cache).
+        """
+        self._enqueue(urls)
+        deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        in_flight: Dict[Future, Tuple[str, str, float]] = {}; follow_ups: Dict[Future, Tuple[str, str, float]] = {}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fetch")
+        try:
+            while True:
+                while len(in_flight) < self.max_workers:
+                    picked = self._next_url()
+                    if picked is None: break
+                    domain, url = picked; self._domains[domain].in_flight += 1
+                    in_flight[submit_in_context(executor, fetch, url)] = (url, domain, time.monotonic())
+                if not in_flight and not follow_ups: break
+                timeout = max(0.0, deadline - time.monotonic()) if deadline else None
+                done, _ = wait([*in_flight, *follow_ups], timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in follow_ups:
+                        url, _, _ = follow_ups.pop(future)
+                        try: on_result(url, *complete(url, future))
+                        except Exception as exc: logger.error(f"Fehler in der Folgestufe {url}: {exc}", exc_info=True); on_result(url, None, f"Exec-Fehler: {exc}")
+                        continue
+                    url, domain, started = in_flight.pop(future)
+                    try: result = future.result()
+                    except Exception as exc:
+                        logger.error(f"Executor-Fehler {url}: {exc}", exc_info=True); result = (None, f"Exec-Fehler: {exc}")
+                    staged = complete is not None and isinstance(result, Future)
+                    text, error_msg = (None, None) if staged else result
+                    state = self._domains[domain]; state.in_flight -= 1
+                    state.record(time.monotonic() - started, bool(error_msg) and is_congestion_error(error_msg), self.min_limit, self.max_limit)
+                    if staged: follow_ups[result] = (url, domain, started)
+                    else: on_result(url, text, error_msg)
+                if deadline and time.monotonic() >= deadline: in_flight.update(follow_ups); self._expire(in_flight, on_result, deadline_seconds); break
+        finally: executor.shutdown(wait=deadline is None, cancel_futures=True)
+        logger.debug(f"Domain-Limits nach dem Abruf: {self.stats()}")
+
+    def _expire(self, in_flight: Dict[Future, Tuple[str, str, float]], on_result, deadline_seconds: float):
+        """Deadline erreicht: laufende und noch wartende URLs als abgebrochen melden."""
+        error_msg = describe_deadline_error(deadline_seconds)
+        expired = [url for url, _, _ in in_flight.values()]
+        for future in in_flight: future.cancel()
+        in_flight.clear()
+        for state in self._domains.values():
+            expired.extend(state.queue); state.queue.clear(); state.in_flight = 0
+        if not expired: return
+        logger.warning(f"Fetch-Deadline ({deadline_seconds:g}s) erreicht: {len(expired)} URL(s) abgebrochen.")
+        for url in expired: on_result(url, None, error_msg)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Pro Domain: aktuelles Limit, Anzahl Requests und Überlast-Ereignisse."""
+        return _domain_stats(self._domains)
+
+def _domain_stats(domains: Dict[str, _DomainState]) -> Dict[str, Dict[str, float]]:
+    return {domain: {"limit": round(state.limit, 2), "requests": state.requests, "congestion_events": state.congestion_events}
+            for domain, state in domains.items()}
+
+class AsyncDomainLimiter:
+    """
+    Pendant zum DomainScheduler für die asyncio-Engine: gleicher Domain-Schlüssel (eTLD+1) und gleiches adaptives Limit
+    pro Domain. Tasks warten in acquire auf einen freien Slot ihrer Domain; release gibt ihn nach dem Download frei,
+    record passt das Limit an das Ergebnis an. Nur im Event-Loop benutzen (kein Lock nötig).
+    """
+    def __init__(self, initial_limit: Optional[int] = None, max_limit: Optional[int] = None, min_limit: int = 1):
+        self.min_limit = max(1, min_limit); self.initial_limit = initial_limit or config.DOMAIN_INITIAL_CONCURRENCY
+        self.max_limit = max(self.initial_limit, max_limit or config.DOMAIN_MAX_CONCURRENCY)
+        self._domains: Dict[str, _DomainState] = {}; self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+
+    async def acquire(self, url: str) -> str:
+        """Wartet auf einen Slot der Domain von url und gibt die Domain zurück (für release/record)."""
+        domain = registered_domain(url)
+        state = self._domains.setdefault(domain, _DomainState(float(self.initial_limit))); waiters = self._waiters.setdefault(domain, deque())
+        while state.in_flight >= int(state.limit):
+            waiter = asyncio.get_running_loop().create_future(); waiters.append(waiter)
+            try: await waiter
+            except asyncio.CancelledError:
+                if waiter in waiters: waiters.remove(waiter)
+                elif not waiter.cancelled(): self._wake(domain) # schon geweckt: freien Slot an den nächsten weitergeben
+                raise
+        state.in_flight += 1
+        return domain
+
+    def release(self, domain: str):
+        self._domains[domain].in_flight -= 1; self._wake(domain)
+
+    def record(self, domain: str, latency: float, error_msg: Optional[str]):
+        """AIMD wie im DomainScheduler: Überlast-Fehler halbieren das Limit, schnelle Erfolge erhöhen es."""
+        self._domains[domain].record(latency, bool(error_msg) and is_congestion_error(error_msg), self.min_limit, self.max_limit)
+        self._wake(domain)
+
+    def _wake(self, domain: str):
+        state = self._domains[domain]; waiters = self._waiters[domain]; free = int(state.limit) - state.in_flight
+        while free > 0 and waiters:
+            waiter = waiters.popleft()
+            if not waiter.done(): waiter.set_result(None); free -= 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return _domain_stats(self._domains)
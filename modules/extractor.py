@@ -1,14 +1,23 @@
 # SEO-GAP-ANALYSIS/modules/extractor.py
 import os
+import time
+import hashlib
 import requests
 import trafilatura
 import sys
+import threading
+import atexit
+import multiprocessing
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 import tenacity
 from tenacity import (
     retry, stop_after_attempt, wait_exponential, retry_if_exception_type,
     RetryError, retry_if_exception
 )
-from typing import Optional, Tuple, Dict
+from typing import Optional, Tuple, Dict, Any, NamedTuple, Set
 import traceback
 import logging
 import requests.exceptions
@@ -17,14 +26,103 @@ logger = logging.getLogger(__name__)
 
 try:
     import config # Importiere das config-Modul
-    from cache_utils import get_cache_key, get_cache_path, load_from_cache, save_to_cache
+    from cache_utils import (
+        get_cache_key, get_cache_path, is_cache_valid, load_from_cache, save_to_cache, touch_cache, cache_exists,
+        get_raw_cache_file, save_raw_html, load_raw_html, cache_entry_ttl, canonicalize_url, SHORT_TTL_ERROR_CLASSES, LONG_TTL_ERROR_CLASSES,
+        store_text_content, load_text_content, get_content_file, await_shared_fill, release_fill_lease
+    )
+    from modules.resilience import CircuitOpenError, get_circuit_breaker, host_of, retry_within_budget
+    from modules.run_context import RunCounters, count_for_run
 except ImportError:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     import config
-    from cache_utils import get_cache_key, get_cache_path, load_from_cache, save_to_cache
+    from cache_utils import (
+        get_cache_key, get_cache_path, is_cache_valid, load_from_cache, save_to_cache, touch_cache, cache_exists,
+        get_raw_cache_file, save_raw_html, load_raw_html, cache_entry_ttl, canonicalize_url, SHORT_TTL_ERROR_CLASSES, LONG_TTL_ERROR_CLASSES,
+        store_text_content, load_text_content, get_content_file, await_shared_fill, release_fill_lease
+    )
+    from modules.resilience import CircuitOpenError, get_circuit_breaker, host_of, retry_within_budget
+    from modules.run_context import RunCounters, count_for_run
 
 # KORREKTUR: Verwende den Wert direkt aus dem config-Modul
 MIN_TEXT_LENGTH = config.MIN_EXTRACT_LENGTH
+# Trafilatura-Optionen; gehen zusammen mit MIN_TEXT_LENGTH in den Schlüssel abgeleiteter Texte ein
+TRAFILATURA_OPTIONS = {"include_comments": False, "include_tables": False, "include_formatting": False}
+
+# --- Geteilter Verbindungspool (Keep-Alive) ---
+# Eine Session pro Prozess: alle ThreadPoolExecutor-Worker und alle Läufe im Flask-Prozess
+# teilen sich die Verbindungen, der Pool ist pro Host auf HTTP_POOL_MAXSIZE begrenzt.
+_http_session: Optional[requests.Session] = None
+_http_session_lock = threading.Lock()
+# Prozessweite Zähler (Verbindungspool, Text-Cache); die Zusammenfassung eines Laufs liest dessen RunCounters
+_fetch_counters: Counter = Counter()
+_fetch_counters_lock = threading.Lock()
+
+def record_fetch_event(name: str, count: int = 1):
+    with _fetch_counters_lock: _fetch_counters[name] += count
+    count_for_run("fetch", name, count)
+
+def _fetch_counts(run: Optional[RunCounters]) -> Counter:
+    if run is not None: return run.snapshot("fetch")
+    with _fetch_counters_lock: return Counter(_fetch_counters)
+
+class _CountingPoolMixin:
+    """Zählt Requests und neu aufgebaute Verbindungen eines urllib3-Pools."""
+    def _new_conn(self):
+        record_fetch_event("connections_opened")
+        return super()._new_conn()
+
+    def urlopen(self, *args, **kwargs):
+        record_fetch_event("requests")
+        return super().urlopen(*args, **kwargs)
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool): pass
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool): pass
+
+class _CountingHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _CountingHTTPConnectionPool, "https": _CountingHTTPSConnectionPool}
+
+def get_http_session() -> requests.Session:
+    """Gibt die prozessweit geteilte HTTP-Session mit begrenztem Pool pro Host zurück."""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                adapter = _CountingHTTPAdapter(pool_connections=config.HTTP_POOL_CONNECTIONS, pool_maxsize=config.HTTP_POOL_MAXSIZE, pool_block=True)
+                session.mount("http://", adapter); session.mount("https://", adapter)
+                logger.debug(f"HTTP-Session erstellt (Pools={config.HTTP_POOL_CONNECTIONS}, max. {config.HTTP_POOL_MAXSIZE} Verbindungen/Host)")
+                _http_session = session
+    return _http_session
+
+def get_connection_pool_stats(run: Optional[RunCounters] = None) -> Dict[str, int]:
+    """Zähler des Verbindungspools (Requests, neue und wiederverwendete Verbindungen); kumuliert oder für einen Lauf (run)."""
+    counters = _fetch_counts(run); requests_count = counters["requests"]; opened = counters["connections_opened"]
+    return {"requests": requests_count, "connections_opened": opened, "connections_reused": max(0, requests_count - opened)}
+
+def get_text_cache_stats(run: Optional[RunCounters] = None) -> Dict[str, int]:
+    """Zähler des Text-Caches (kumuliert oder für einen Lauf): Treffer, per 304 revalidiert, neu geladen (abgelaufen),
+    ohne Netzwerk aus dem Roh-HTML-Cache abgeleitet, Misses und Texte, deren Inhalt schon gespeichert war."""
+    counters = _fetch_counts(run)
+    return {name: counters[f"text_cache_{name}"] for name in ("hits", "revalidated", "refetched", "rederived", "misses", "content_shared")}
+
+def get_negative_cache_stats(run: Optional[RunCounters] = None) -> Dict[str, int]:
+    """
+    Treffer auf gecachte Fehler je Fehlerklasse (kumuliert oder für einen Lauf). Jeder Treffer ist ein eingesparter Abruf;
+    bei Timeouts/5xx zusätzlich die Wartezeit der Retries.
+    """
+    counters = _fetch_counts(run)
+    stats = {error_class: counters[f"negative_cache_hits_{error_class}"]
+             for error_class in SHORT_TTL_ERROR_CLASSES + LONG_TTL_ERROR_CLASSES + ("extraction",)}
+    stats["saved_requests"] = sum(stats.values())
+    return stats
+
+def get_url_dedup_stats(run: Optional[RunCounters] = None) -> Dict[str, int]:
+    """Eingesparte Abrufe durch URL-Kanonisierung (kumuliert oder für einen Lauf): Duplikate innerhalb einer SERP und im Batch wiederverwendete URLs."""
+    counters = _fetch_counts(run); duplicates = counters["url_duplicates"]; reused = counters["url_batch_reused"]
+    return {"duplicates": duplicates, "batch_reused": reused, "saved_requests": duplicates + reused}
 
 # Retry Konfiguration (bleibt gleich)
 RETRY_EXCEPTIONS_EXTRACTOR = (
@@ -46,101 +144,390 @@ def log_retry_extractor(retry_state):
     retry=retry_if_exception(
         lambda e: isinstance(e, RETRY_EXCEPTIONS_EXTRACTOR) or \
                   (isinstance(e, requests.exceptions.HTTPError) and e.response is not None and e.response.status_code >= 500)
-    ),
+    ) & retry_within_budget(), # Circuit des Hosts und Retry-Budget des Laufs
     before_sleep=log_retry_extractor
 )
 def _fetch_url_content(url: str, headers: Dict) -> requests.Response:
+    """
+    Sendet den Request mit stream=True: zunächst werden nur die Header gelesen, der Body erst bei Bedarf.
+    Bei offenem Circuit des Hosts wird ohne Request CircuitOpenError geworfen.
+    """
     logger.debug(f"-> Versuche Download von {url}...")
-    response = requests.get(url, headers=headers, timeout=15, allow_redirects=True)
-    response.raise_for_status()
+    host = host_of(url); breaker = get_circuit_breaker()
+    breaker.before_call(host)
+    try: response = get_http_session().get(url, headers=headers, timeout=15, allow_redirects=True, stream=True)
+    except RETRY_EXCEPTIONS_EXTRACTOR: breaker.record_failure(host); raise
+    except Exception: breaker.record_success(host); raise # kein Host-Problem (z.B. ungültige URL), gibt den Probeaufruf frei
+    except BaseException: breaker.release_trial(host); raise
+    (breaker.record_failure if response.status_code >= 500 else breaker.record_success)(host)
+    try: response.raise_for_status()
+    except requests.exceptions.HTTPError: response.close(); raise # Verbindung vor einem Retry freigeben
     return response
 
-def extract_text_from_url(url: str, use_cache: bool = True) -> Tuple[Optional[str], Optional[str]]:
-    """Extrahiert Textinhalt von URL mit Trafilatura und Retries für Download."""
-    logger.debug(f"extract_text_from_url aufgerufen für '{url}', cache={use_cache}")
-    cache_key = get_cache_key("text_v2", url)
-    cache_file = get_cache_path("text_v2", cache_key, extension="json")
+# --- Byte-Begrenzung und Byte-Zählung pro URL ---
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+_MAX_TRACKED_DOWNLOADS = 10000 # Obergrenze für noch nicht abgeholte Byte-Zähler
+_download_sizes: "OrderedDict[str, int]" = OrderedDict()
+_fetch_latencies: "OrderedDict[str, float]" = OrderedDict() # Netzwerkzeit pro URL inkl. Retries
+
+def _remember(store: OrderedDict, url: str, value):
+    """Legt einen Wert pro URL ab; älteste Einträge fallen über _MAX_TRACKED_DOWNLOADS heraus. Aufruf unter _fetch_counters_lock."""
+    store[url] = value; store.move_to_end(url)
+    while len(store) > _MAX_TRACKED_DOWNLOADS: store.popitem(last=False)
+
+def read_capped_body(chunks, max_bytes: int) -> Tuple[bytes, bool]:
+    """Liest Chunks bis max_bytes und schneidet den Rest ab. Gibt (body, abgeschnitten) zurück."""
+    parts = []; total = 0
+    for chunk in chunks:
+        if not chunk: continue
+        if total + len(chunk) > max_bytes:
+            parts.append(chunk[:max_bytes - total]); return b"".join(parts), True
+        parts.append(chunk); total += len(chunk)
+    return b"".join(parts), False
+
+def record_download_size(url: str, size: int, truncated: bool = False):
+    """Merkt sich die gelesenen Bytes pro URL (für die Laufzusammenfassung) und zählt Gesamtbytes/Abschnitte."""
+    with _fetch_counters_lock:
+        _remember(_download_sizes, url, size)
+        _fetch_counters["bytes_downloaded"] += size
+        if truncated: _fetch_counters["downloads_truncated"] += 1
+    count_for_run("fetch", "bytes_downloaded", size)
+    if truncated: count_for_run("fetch", "downloads_truncated")
+
+def pop_download_sizes(urls) -> Dict[str, int]:
+    """Gibt die Byte-Zähler der URLs zurück und entfernt sie (Speicher bleibt begrenzt)."""
+    with _fetch_counters_lock: return {url: _download_sizes.pop(url) for url in urls if url in _download_sizes}
+
+def record_fetch_latency(url: str, seconds: float):
+    """Merkt sich die Abrufdauer (Netzwerk inkl. Retries, ohne Cache-Treffer) pro URL."""
+    with _fetch_counters_lock: _remember(_fetch_latencies, url, seconds)
+
+def pop_fetch_latencies(urls) -> Dict[str, float]:
+    """Gibt die Abrufdauern der URLs zurück und entfernt sie."""
+    with _fetch_counters_lock: return {url: _fetch_latencies.pop(url) for url in urls if url in _fetch_latencies}
+
+def get_download_stats(run: Optional[RunCounters] = None) -> Dict[str, int]:
+    """Download-Zähler (kumuliert oder für einen Lauf): gelesene Bytes, abgeschnittene Bodies, vor dem Body abgebrochene Nicht-HTML-Antworten."""
+    counters = _fetch_counts(run)
+    return {"bytes_downloaded": counters["bytes_downloaded"], "truncated": counters["downloads_truncated"],
+            "aborted_non_html": counters["downloads_aborted_non_html"]}
+
+def _read_html_body(url: str, response: requests.Response) -> bytes:
+    content, truncated = read_capped_body(response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE), config.MAX_DOWNLOAD_BYTES)
+    if truncated: logger.warning(f"Antwort von {url} nach {config.MAX_DOWNLOAD_BYTES} Bytes abgeschnitten.")
+    record_download_size(url, len(content), truncated)
+    return content
+
+class DownloadResult(NamedTuple):
+    """Ergebnis der Download-Stufe."""
+    content: Optional[bytes]
+    content_type: str
+    error_msg: Optional[str]
+    validators: Optional[Dict[str, str]] = None # ETag/Last-Modified und content_hash, werden mit dem Text gecacht
+    cached_result: Optional[Tuple[Optional[str], Optional[str]]] = None # bei HTTP 304: gespeicherter Text
+
+# Request-Header für Seitendownloads (sync und async)
+REQUEST_HEADERS = { "User-Agent": "...", "Accept": "...", "Accept-Language": "...", "Referer": "..." } # Gekürzt
+
+def get_text_cache_file(url: str) -> str:
+    """Pfad der Text-Cache-Datei für eine URL (Schlüssel aus der kanonischen URL, Tracking-Parameter etc. zählen nicht)."""
+    return get_cache_path("text_v2", get_cache_key("text_v2", canonicalize_url(url)), extension="json")
+
+def extraction_settings_key() -> str:
+    """Fingerabdruck der Extraktions-Einstellungen (Trafilatura-Version/-Optionen, Mindestlänge)."""
+    return get_cache_key(trafilatura.__version__, MIN_TEXT_LENGTH, sorted(TRAFILATURA_OPTIONS.items()))
+
+def get_derived_text_file(content_hash: str, settings_key: Optional[str] = None) -> str:
+    """Pfad des abgeleiteten Extraktionsergebnisses für einen Roh-HTML-Hash und die Extraktions-Einstellungen."""
+    return get_cache_path("extract_v1", get_cache_key("extract_v1", content_hash, settings_key or extraction_settings_key()), extension="json")
+
+def _parse_text_cache_entry(url: str, cached_data: Any) -> Optional[Tuple[Optional[str], Optional[str], Dict[str, str]]]:
+    """
+    Text-Cache-Eintrag: [text, error_msg] oder [text, error_msg, meta] (HTTP-Validatoren, content_hash, settings).
+    Mit meta["text_hash"] steht der Text im inhaltsadressierten Speicher; fehlt er dort, zählt der Eintrag als Miss.
+    """
+    if isinstance(cached_data, (list, tuple)) and len(cached_data) in (2, 3):
+        validators = cached_data[2] if len(cached_data) == 3 and isinstance(cached_data[2], dict) else {}
+        text = cached_data[0]
+        if text is None and validators.get("text_hash"):
+            text = load_text_content(validators["text_hash"])
+            if text is None: logger.debug(f"Text zu Hash {validators['text_hash'][:12]} fehlt im Cache ({url})."); return None
+        return text, cached_data[1], validators
+    logger.warning(f"Ungültiges Cache-Format für {url} gefunden, ignoriere Cache.")
+    return None
+
+def _text_cache_entry(text: Optional[str], error_msg: Optional[str], meta: Dict[str, Any]) -> list:
+    """Eintrag für den Text-Cache: der Text wird inhaltsadressiert gespeichert, der Eintrag verweist per text_hash darauf."""
+    if not text: return [None, error_msg, meta] if meta else [None, error_msg]
+    text_hash, shared = store_text_content(text)
+    if shared: record_fetch_event("text_cache_content_shared")
+    return [None, error_msg, {**meta, "text_hash": text_hash}]
 
+def lookup_text_cache(url: str) -> Tuple[Optional[Tuple[Optional[str], Optional[str]]], Optional[Dict[str, Any]]]:
+    """
+    Gibt (ergebnis, None) bei gültigem Cache-Eintrag zurück. Sonst (None, stale): stale enthält Text und
+    Validatoren eines abgelaufenen Eintrags, falls er per If-None-Match/If-Modified-Since revalidiert werden kann.
+    Wurde der Eintrag mit anderen Extraktions-Einstellungen erzeugt (oder fehlt er), wird der Text ohne
+    Netzwerk aus dem Roh-HTML-Cache neu abgeleitet, sofern dort ein gültiger Eintrag liegt.
+    """
+    cache_file = get_text_cache_file(url)
+    cached_data = load_from_cache(cache_file, allow_expired=True)
+    entry = _parse_text_cache_entry(url, cached_data) if cached_data is not None else None
+    settings_match = entry is None or entry[2].get("settings", extraction_settings_key()) == extraction_settings_key()
+    if entry is not None and settings_match and is_cache_valid(cache_file, cache_entry_ttl(cached_data)):
+        logger.debug(f"Cache hit für {url}"); record_fetch_event("text_cache_hits")
+        if entry[0] is None and entry[2].get("error_class"): record_fetch_event(f"negative_cache_hits_{entry[2]['error_class']}")
+        return (entry[0], entry[1]), None
+    rederived = rederive_from_raw_cache(url)
+    if rederived is not None: return rederived, None
+    if entry is None:
+        filled = await_shared_fill(cache_file) # geteilter Cache: nur ein Knoten lädt die Seite
+        entry = _parse_text_cache_entry(url, filled) if filled is not None else None
+        if entry is not None: logger.debug(f"Text für {url} von anderem Knoten übernommen."); record_fetch_event("text_cache_hits"); return (entry[0], entry[1]), None
+        record_fetch_event("text_cache_misses"); return None, None
+    text, _, meta = entry
+    if text and settings_match and conditional_headers(meta): return None, {"text": text, "validators": meta}
+    return None, None
+
+def rederive_from_raw_cache(url: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+    """
+    Leitet (text, error_msg) aus dem gültigen Roh-HTML-Eintrag ab: zuerst über das abgeleitete Ergebnis
+    (Hash + Einstellungen), sonst per Trafilatura. Gibt None zurück, wenn kein Roh-HTML vorliegt.
+    """
+    raw = load_raw_html(url)
+    if raw is None or not raw[1].get("content_hash"): return None
+    content, raw_meta = raw
+    meta = {key: raw_meta[key] for key in ("etag", "last_modified", "content_hash") if raw_meta.get(key)}
+    record_fetch_event("text_cache_rederived")
+    derived = load_from_cache(get_derived_text_file(meta["content_hash"]), allow_expired=True)
+    derived_entry = _parse_text_cache_entry(url, derived) if derived is not None else None
+    if derived_entry is not None:
+        logger.debug(f"-> {url}: abgeleiteter Text aus dem Cache (Hash {meta['content_hash'][:12]}).")
+        text, error_msg, _ = derived_entry
+        entry_meta = {**meta, "settings": extraction_settings_key(), **({} if text else {"error_class": "extraction"})}
+        save_to_cache(_text_cache_entry(text, error_msg, entry_meta), get_text_cache_file(url))
+        return text, error_msg
+    logger.debug(f"-> {url}: extrahiere neu aus dem Roh-HTML-Cache (ohne Netzwerk).")
+    try: text_content = run_trafilatura(content)
+    except Exception as trafila_error: return trafilatura_failure(url, trafila_error, True)
+    return finalize_extracted_text(url, text_content, True, meta)
+
+def load_cached_text(url: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+    """Gibt (text, error_msg) aus dem Text-Cache zurück oder None bei Cache-Miss."""
+    return lookup_text_cache(url)[0]
+
+def conditional_headers(validators: Dict[str, str]) -> Dict[str, str]:
+    headers = {}
+    if validators.get("etag"): headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"): headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+def response_validators(headers) -> Dict[str, str]:
+    validators = {"etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+    return {key: value for key, value in validators.items() if value}
+
+def revalidated_result(url: str, stale: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """HTTP 304: TTL des Eintrags (und des Roh-HTML) erneuern und gespeicherten Text ohne erneute Extraktion verwenden."""
+    touch_cache(get_text_cache_file(url)); record_fetch_event("text_cache_revalidated")
+    if stale["validators"].get("text_hash"): touch_cache(get_content_file(stale["validators"]["text_hash"]))
+    if cache_exists(get_raw_cache_file(url)): touch_cache(get_raw_cache_file(url))
+    logger.debug(f"-> {url} unverändert (304), verwende gecachten Text.")
+    return stale["text"], None
+
+# 4xx, die nur vorübergehend sind (Request Timeout, Too Many Requests): kurze TTL statt client_error
+TRANSIENT_CLIENT_STATUS_CLASSES = {408: "timeout", 429: "server_error"}
+
+def classify_fetch_error(exc: BaseException) -> str:
+    """Fehlerklasse eines Abruffehlers für den Negativ-Cache (requests und httpx)."""
+    response = getattr(exc, 'response', None)
+    status_code = getattr(response, 'status_code', None) if response is not None else None
+    if status_code in TRANSIENT_CLIENT_STATUS_CLASSES: return TRANSIENT_CLIENT_STATUS_CLASSES[status_code]
+    if isinstance(status_code, int) and 400 <= status_code < 500: return "client_error"
+    if isinstance(status_code, int) and status_code >= 500: return "server_error"
+    if "Timeout" in type(exc).__name__: return "timeout"
+    return "network"
+
+def cache_extraction_failure(url: str, error_msg: str, use_cache: bool, error_class: str = "unexpected") -> Tuple[None, str]:
+    """
+    Schreibt einen Fehler mit seiner Fehlerklasse (bestimmt die TTL) in den Text-Cache und gibt (None, error_msg) zurück.
+    Abgelehnte Aufrufe bei offenem Circuit werden nicht gecacht (die Sperre endet nach dem Cool-down).
+    """
+    if use_cache and error_class != "circuit_open": save_to_cache([None, error_msg, {"error_class": error_class}], get_text_cache_file(url))
+    elif use_cache: release_fill_lease(get_text_cache_file(url))
+    return None, error_msg
+
+def check_downloaded_content(url: str, downloaded_content: Optional[bytes], content_type: str, use_cache: bool = True) -> Optional[str]:
+    """Prüft Inhaltstyp und Inhalt vor der Extraktion. Gibt eine (gecachte) Fehlermeldung oder None zurück."""
+    if 'html' not in content_type:
+        error_msg = f"Inhaltstyp ist kein HTML ({content_type})"
+        logger.warning(f"{error_msg} für {url}")
+        return cache_extraction_failure(url, error_msg, use_cache, "content_type")[1]
+
+    if not downloaded_content:
+        error_msg = "Kein Inhalt heruntergeladen."
+        logger.warning(error_msg + f" für {url}")
+        return cache_extraction_failure(url, error_msg, use_cache, "empty")[1]
+    return None
+
+def run_trafilatura(downloaded_content: bytes) -> Optional[str]:
+    """CPU-Stufe: reine Trafilatura-Extraktion (Top-Level-Funktion, damit sie im ProcessPoolExecutor laufen kann)."""
+    return trafilatura.extract(downloaded_content, **TRAFILATURA_OPTIONS)
+
+def store_raw_content(url: str, content: bytes, content_type: str, validators: Dict[str, str], use_cache: bool = True) -> Dict[str, str]:
+    """Legt das Roh-HTML komprimiert im Cache ab. Gibt die Cache-Metadaten (Validatoren + content_hash) zurück."""
+    meta = {**validators, "content_hash": hashlib.sha256(content).hexdigest()}
+    if use_cache and config.CACHE_RAW_HTML: save_raw_html(url, content, {"content_type": content_type, **meta})
+    return meta
+
+def finalize_extracted_text(url: str, text_content: Optional[str], use_cache: bool = True, validators: Optional[Dict[str, str]] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Validiert das Trafilatura-Ergebnis (leer, Mindestlänge) und cached es mit den Metadaten aus der Download-Stufe
+    (HTTP-Validatoren, content_hash). Der Text selbst liegt inhaltsadressiert unter seinem Hash. Mit content_hash
+    wird das Ergebnis zusätzlich als abgeleiteter Eintrag unter Hash + Extraktions-Einstellungen gespeichert.
+    """
+    if not text_content: error_msg = "Trafilatura konnte keinen Hauptinhalt extrahieren."
+    # Verwende MIN_TEXT_LENGTH aus config
+    elif len(text_content) < MIN_TEXT_LENGTH: error_msg = f"Extrahierter Text zu kurz ({len(text_content)}/{MIN_TEXT_LENGTH})"
+    else: error_msg = None
+    if error_msg: logger.warning(error_msg + f" für {url}"); text_content = None
+    else: logger.debug(f"-> Erfolgreich Text ({len(text_content)} Zeichen) extrahiert von {url}")
     if use_cache:
-        cached_data = load_from_cache(cache_file)
-        if cached_data is not None:
-             if isinstance(cached_data, (list, tuple)) and len(cached_data) == 2:
-                 logger.debug(f"Cache hit für {url}")
-                 return cached_data[0], cached_data[1]
-             else:
-                 logger.warning(f"Ungültiges Cache-Format für {url} gefunden, ignoriere Cache.")
-
-    downloaded_content = None; error_msg = None; text_content = None; response = None
+        meta = {**validators, "settings": extraction_settings_key()} if validators else {}
+        if error_msg: meta["error_class"] = "extraction"
+        entry = _text_cache_entry(text_content, error_msg, meta)
+        save_to_cache(entry, get_text_cache_file(url))
+        if meta.get("content_hash"): # abgeleiteter Eintrag verweist auf denselben Text
+            save_to_cache([None, error_msg, {"text_hash": entry[2]["text_hash"]}] if text_content else [None, error_msg], get_derived_text_file(meta["content_hash"], meta["settings"]))
+    return text_content, error_msg
+
+def trafilatura_failure(url: str, trafila_error: BaseException, use_cache: bool = True) -> Tuple[None, str]:
+    error_msg = f"Trafilatura Fehler: {trafila_error}"
+    logger.error(f"{error_msg} für {url}", exc_info=trafila_error)
+    return cache_extraction_failure(url, error_msg, use_cache, "extraction")
+
+def extract_text_from_content(url: str, downloaded_content: Optional[bytes], content_type: str, use_cache: bool = True, validators: Optional[Dict[str, str]] = None) -> Tuple[Optional[str], Optional[str]]:
+    """Prüft den heruntergeladenen Inhalt, extrahiert den Haupttext mit Trafilatura und cached das Ergebnis."""
+    error_msg = check_downloaded_content(url, downloaded_content, content_type, use_cache)
+    if error_msg: return None, error_msg
+    logger.debug(f"-> Extrahiere Text mit Trafilatura für {url}...")
+    try: text_content = run_trafilatura(downloaded_content)
+    except Exception as trafila_error: return trafilatura_failure(url, trafila_error, use_cache)
+    return finalize_extracted_text(url, text_content, use_cache, validators)
+
+def describe_http_status_error(status_code: int, reason: Optional[str]) -> str:
+    """Fehlermeldung für HTTP-Client-Fehler (4xx), identisch für sync und async."""
+    return f"HTTP Client Fehler {status_code} ({reason or 'N/A'})"
+
+def describe_circuit_open_error(exc: CircuitOpenError) -> str:
+    """Fehlermeldung für Aufrufe, die wegen offenem Circuit ohne Request abgelehnt wurden."""
+    return f"Netzwerkfehler (Circuit offen): {exc}"
+
+def describe_deadline_error(deadline_seconds: float) -> str:
+    """Fehlermeldung für URLs, die bei Ablauf der Fetch-Deadline noch nicht fertig waren."""
+    return f"Fetch-Deadline überschritten ({deadline_seconds:g}s), abgebrochen"
+
+def is_deadline_error(error_msg: str) -> bool:
+    return error_msg.startswith("Fetch-Deadline überschritten")
+
+def is_congestion_error(error_msg: str) -> bool:
+    """True für Fehler, die auf Überlast des Hosts hindeuten (429, 5xx/Timeouts nach Retries, Netzwerkfehler)."""
+    return error_msg.startswith(("Netzwerkfehler", "HTTP Client Fehler 429 "))
+
+def download_url_content(url: str, use_cache: bool = True, stale: Optional[Dict[str, Any]] = None) -> DownloadResult:
+    """
+    Download-Stufe: lädt die Seite mit Retries über die geteilte Session.
+    Mit stale (aus lookup_text_cache) wird bedingt angefragt; bei 304 enthält cached_result den gespeicherten Text.
+    Der Inhaltstyp wird anhand der Header geprüft: Nicht-HTML wird vor dem Body abgebrochen, HTML wird
+    gestreamt und bei MAX_DOWNLOAD_BYTES abgeschnitten. Fehler werden gecacht.
+    """
+    error_msg = None; error_class = "unexpected"; response = None; started = time.monotonic()
     try:
-        headers = { "User-Agent": "...", "Accept": "...", "Accept-Language": "...", "Referer": "..." } # Gekürzt
+        headers = {**REQUEST_HEADERS, **conditional_headers(stale["validators"])} if stale else REQUEST_HEADERS
         response = _fetch_url_content(url, headers)
+        if stale and response.status_code == 304:
+            return DownloadResult(None, "", None, cached_result=revalidated_result(url, stale))
+        if stale: record_fetch_event("text_cache_refetched")
         content_type = response.headers.get('Content-Type', '').lower()
         if 'html' not in content_type:
-            error_msg = f"Inhaltstyp ist kein HTML ({content_type})"
-            logger.warning(f"{error_msg} für {url}")
-            if use_cache: save_to_cache([None, error_msg], cache_file)
-            return None, error_msg
-
-        downloaded_content = response.content
-        if not downloaded_content:
-             error_msg = "Kein Inhalt heruntergeladen."
-             logger.warning(error_msg + f" für {url}")
-             if use_cache: save_to_cache([None, error_msg], cache_file)
-             return None, error_msg
-
-        logger.debug(f"-> Extrahiere Text mit Trafilatura für {url}...")
-        try:
-            text_content = trafilatura.extract(downloaded_content, include_comments=False, include_tables=False, include_formatting=False)
-        except Exception as trafila_error:
-            error_msg = f"Trafilatura Fehler: {trafila_error}"
-            logger.error(f"{error_msg} für {url}", exc_info=True)
-            if use_cache: save_to_cache([None, error_msg], cache_file)
-            return None, error_msg
-
-        if not text_content:
-            error_msg = "Trafilatura konnte keinen Hauptinhalt extrahieren."
-            logger.warning(error_msg + f" für {url}")
-            if use_cache: save_to_cache([None, error_msg], cache_file)
-            return None, error_msg
-
-        # Verwende MIN_TEXT_LENGTH aus config
-        if len(text_content) < MIN_TEXT_LENGTH:
-            error_msg = f"Extrahierter Text zu kurz ({len(text_content)}/{MIN_TEXT_LENGTH})"
-            logger.warning(error_msg + f" für {url}")
-            if use_cache: save_to_cache([None, error_msg], cache_file)
-            return None, error_msg
-
-        logger.debug(f"-> Erfolgreich Text ({len(text_content)} Zeichen) extrahiert von {url}")
-        if use_cache: save_to_cache([text_content, None], cache_file)
-        return text_content, None
+            record_fetch_event("downloads_aborted_non_html"); record_download_size(url, 0)
+            logger.debug(f"-> {url}: Inhaltstyp '{content_type}', Body wird nicht gelesen.")
+            return DownloadResult(None, content_type, None)
+        content = _read_html_body(url, response)
+        meta = store_raw_content(url, content, content_type, response_validators(response.headers), use_cache) if content else None
+        return DownloadResult(content, content_type, None, meta)
 
     except requests.exceptions.RequestException as e:
         response_obj = getattr(e, 'response', None)
         status_code = response_obj.status_code if response_obj is not None else 'N/A'
+        error_class = classify_fetch_error(e)
         if isinstance(e, requests.exceptions.HTTPError) and 400 <= status_code < 500:
-            error_msg = f"HTTP Client Fehler {status_code} ({getattr(response_obj, 'reason', 'N/A')})"
+            error_msg = describe_http_status_error(status_code, getattr(response_obj, 'reason', None))
             logger.warning(f"{error_msg} beim Abruf von {url}")
         else:
             error_msg = f"Netzwerkfehler (RequestException): {e.__class__.__name__}"
             logger.error(f"Fehler bei Extraktion von {url}: {error_msg}", exc_info=True)
         response = response_obj
-        if use_cache: save_to_cache([None, error_msg], cache_file)
-        return None, error_msg
     except RetryError as e:
         original_exception = e.__cause__ if e.__cause__ else e
         error_msg = f"Netzwerkfehler nach Retries: {original_exception.__class__.__name__}"
+        error_class = classify_fetch_error(original_exception)
         logger.error(f"Fehler bei Extraktion von {url} nach allen Retries: {error_msg}", exc_info=e)
-        if use_cache: save_to_cache([None, error_msg], cache_file)
-        return None, error_msg
+    except CircuitOpenError as e:
+        error_msg = describe_circuit_open_error(e); error_class = "circuit_open"
+        logger.warning(f"{error_msg} ({url})")
     except Exception as e:
         error_msg = f"Unerwarteter Extraktionsfehler: {e}"
         logger.exception(f"Schwerwiegender Fehler bei Extraktion von {url}")
-        if use_cache: save_to_cache([None, error_msg], cache_file)
-        return None, error_msg
     finally:
         if response is not None:
             try:
                 response.close()
                 logger.debug(f"Response-Verbindung für {url} geschlossen.")
             except Exception as close_err:
-                logger.warning(f"Fehler beim Schließen der Response für {url}: {close_err}")
\ No newline at end of file
+                logger.warning(f"Fehler beim Schließen der Response für {url}: {close_err}")
+        record_fetch_latency(url, time.monotonic() - started)
+    return DownloadResult(None, "", cache_extraction_failure(url, error_msg, use_cache, error_class)[1])
+
+def extract_text_from_url(url: str, use_cache: bool = True, cache_hits: Optional[Set[str]] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Extrahiert Textinhalt von URL mit Trafilatura und Retries für Download.
+    URLs, deren Ergebnis ohne Abruf aus dem Cache kam (auch gecachte Fehler), werden in cache_hits eingetragen.
+    """
+    logger.debug(f"extract_text_from_url aufgerufen für '{url}', cache={use_cache}")
+
+    cached, stale = lookup_text_cache(url) if use_cache else (None, None)
+    if cached is not None:
+        if cache_hits is not None: cache_hits.add(url)
+        return cached
+
+    download = download_url_content(url, use_cache, stale)
+    if download.cached_result: return download.cached_result
+    if download.error_msg: return None, download.error_msg
+    return extract_text_from_content(url, download.content, download.content_type, use_cache, download.validators)
+
+# --- Prozess-Pool für die Trafilatura-Extraktion ---
+# Wird einmal pro Prozess angelegt und über Läufe hinweg wiederverwendet (Flask); "spawn" vermeidet
+# fork() aus einem Prozess mit laufenden Threads.
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+_extraction_pool_workers = 0
+_extraction_pool_lock = threading.Lock()
+
+def get_extraction_pool(workers: int) -> Optional[ProcessPoolExecutor]:
+    """Gibt den geteilten ProcessPoolExecutor für die Extraktion zurück (None bei workers <= 0)."""
+    global _extraction_pool, _extraction_pool_workers
+    if workers <= 0: return None
+    with _extraction_pool_lock:
+        if _extraction_pool is None or _extraction_pool_workers != workers or getattr(_extraction_pool, "_broken", False):
+            if _extraction_pool is not None: _extraction_pool.shutdown(wait=False)
+            logger.info(f"Starte Extraktions-Prozesspool mit {workers} Prozess(en)...")
+            _extraction_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _extraction_pool_workers = workers
+        return _extraction_pool
+
+def shutdown_extraction_pool():
+    global _extraction_pool, _extraction_pool_workers
+    with _extraction_pool_lock:
+        if _extraction_pool is not None: _extraction_pool.shutdown(wait=True)
+        _extraction_pool = None; _extraction_pool_workers = 0
+
+atexit.register(shutdown_extraction_pool)
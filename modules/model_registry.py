@@ -0,0 +1,131 @@
+# SEO-GAP-ANALYSIS/modules/model_registry.py
+import os
+import sys
+import gc
+import time
+import threading
+import logging
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import spacy
+
+logger = logging.getLogger(__name__)
+
+try:
+    import config
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import config
+
+from modules.tf_idf import load_spacy_model
+
+# Ein Spacy-Modell pro Name und Prozess, geteilt von allen Läufen/Requests. Die Analyse nutzt das Modell nur lesend
+# (nlp.pipe/nlp(...) mit disable=, kein select_pipes), daher können mehrere Threads dasselbe Objekt verwenden.
+
+class LoadedModel(NamedTuple):
+    nlp: spacy.language.Language
+    size: int # geschätzte Bytes (Größe der Modelldateien bzw. der Serialisierung)
+    load_seconds: float
+
+def estimate_model_bytes(model_name: str, nlp: spacy.language.Language) -> int:
+    """Größe der Modelldateien als Näherung für den Speicherbedarf; ohne Paketpfad die Länge der Serialisierung."""
+    try:
+        path = spacy.util.get_package_path(model_name) if spacy.util.is_package(model_name) else model_name
+        if os.path.isdir(path):
+            return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+    except Exception as e: logger.debug(f"Modellgröße für '{model_name}' nicht über die Dateien bestimmbar: {e}")
+    try: return len(nlp.to_bytes())
+    except Exception: return 0
+
+class ModelRegistry:
+    """
+    Lädt jedes Modell höchstens einmal (parallele Anfragen für dasselbe Modell warten auf den ersten Ladevorgang)
+    und hält die Modelle in LRU-Reihenfolge. Übersteigt die Summe das Budget (SPACY_MODEL_MEMORY_BYTES),
+    werden die am längsten ungenutzten Modelle entladen; das zuletzt geladene bleibt immer.
+    """
+    def __init__(self, max_bytes: Optional[int] = None, loader: Callable[[str], Optional[spacy.language.Language]] = load_spacy_model,
+                 sizer: Callable[[str, spacy.language.Language], int] = estimate_model_bytes):
+        self._max_bytes = max_bytes; self._loader = loader; self._sizer = sizer
+        self._models: "OrderedDict[str, LoadedModel]" = OrderedDict(); self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock(); self._stats: Counter = Counter()
+
+    @property
+    def max_bytes(self) -> int:
+        return config.SPACY_MODEL_MEMORY_BYTES if self._max_bytes is None else self._max_bytes
+
+    def _cached(self, model_name: str) -> Optional[spacy.language.Language]:
+        with self._lock:
+            entry = self._models.get(model_name)
+            if entry is None: return None
+            self._models.move_to_end(model_name); self._stats["hits"] += 1; return entry.nlp
+
+    def get(self, model_name: str) -> Optional[spacy.language.Language]:
+        """Geteiltes Modell; lädt es beim ersten Zugriff. None, wenn das Modell nicht geladen werden kann (wird nicht gemerkt)."""
+        nlp = self._cached(model_name)
+        if nlp is not None: return nlp
+        with self._lock: load_lock = self._loading.setdefault(model_name, threading.Lock())
+        with load_lock: # andere Modelle bleiben währenddessen abrufbar
+            nlp = self._cached(model_name)
+            if nlp is not None: return nlp
+            started = time.perf_counter(); nlp = self._loader(model_name); load_seconds = time.perf_counter() - started
+            if nlp is None:
+                with self._lock: self._stats["load_failures"] += 1
+                return None
+            entry = LoadedModel(nlp, self._sizer(model_name, nlp), load_seconds)
+            with self._lock:
+                self._models[model_name] = entry; self._stats["loads"] += 1; self._stats["load_seconds"] += load_seconds
+                evicted = self._evict_locked()
+        logger.info(f"Spacy-Modell '{model_name}' in {load_seconds:.1f}s geladen (~{entry.size / 1e6:.0f} MB), bleibt für weitere Läufe im Speicher.")
+        if evicted:
+            logger.info(f"Spacy-Modell(e) {', '.join(evicted)} entladen (Budget {self.max_bytes / 1e6:.0f} MB)."); gc.collect()
+        return nlp
+
+    def _evict_locked(self) -> List[str]:
+        evicted = []
+        while self.max_bytes > 0 and len(self._models) > 1 and sum(entry.size for entry in self._models.values()) > self.max_bytes:
+            name, _ = self._models.popitem(last=False); evicted.append(name); self._stats["evictions"] += 1
+        return evicted
+
+    def preload(self, model_names: Iterable[str]) -> Dict[str, bool]:
+        """Lädt die Modelle vorab (z.B. beim App-Start); Rückgabe: Name -> geladen."""
+        return {model_name: self.get(model_name) is not None for model_name in model_names}
+
+    def unload(self, model_name: str) -> bool:
+        with self._lock: return self._models.pop(model_name, None) is not None
+
+    def loaded(self) -> Dict[str, int]:
+        """Geladene Modelle (älteste Nutzung zuerst) mit geschätzter Größe."""
+        with self._lock: return {name: entry.size for name, entry in self._models.items()}
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {"hits": 0, "loads": 0, "load_failures": 0, "evictions": 0, "load_seconds": 0.0, **self._stats,
+                    "loaded_models": len(self._models), "loaded_bytes": sum(entry.size for entry in self._models.values())}
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_model_registry() -> ModelRegistry:
+    """Prozessweit geteilte Modell-Registry (run_analysis, Web-App, Batch-Läufe)."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None: _registry = ModelRegistry()
+    return _registry
+
+def resolve_model_names(entries: Iterable[str]) -> List[str]:
+    """Sprachcodes (Schlüssel von SPACY_MODEL_MAP) -> Modellnamen; andere Einträge gelten als Modellnamen."""
+    return list(dict.fromkeys(config.SPACY_MODEL_MAP.get(entry, entry) for entry in entries))
+
+def preload_models_in_background(entries: Iterable[str]) -> Optional[threading.Thread]:
+    """Startet das Vorladen in einem Hintergrund-Thread; Requests für ein Modell im Ladevorgang warten auf dieses."""
+    model_names = resolve_model_names(entries)
+    if not model_names: return None
+    def preload():
+        results = get_model_registry().preload(model_names)
+        failed = [name for name, ok in results.items() if not ok]
+        if failed: logger.warning(f"Vorladen fehlgeschlagen für: {', '.join(failed)}")
+    thread = threading.Thread(target=preload, name="spacy-preload", daemon=True); thread.start()
+    logger.info(f"Lade Spacy-Modelle vorab: {', '.join(model_names)}")
+    return thread
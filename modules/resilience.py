@@ -0,0 +1,164 @@
+# SEO-GAP-ANALYSIS/modules/resilience.py
+import os
+import sys
+import time
+import threading
+import logging
+import contextvars
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from tenacity import RetryCallState
+from tenacity.retry import retry_base
+
+logger = logging.getLogger(__name__)
+
+try:
+    import config
+    from modules.run_context import RunCounters, count_for_run
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import config
+    from modules.run_context import RunCounters, count_for_run
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+class CircuitOpenError(Exception):
+    """Aufruf wurde ohne Request abgelehnt, weil der Circuit des Hosts offen ist."""
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Circuit für {host} offen, nächster Versuch in {retry_in:.0f}s")
+        self.host = host; self.retry_in = retry_in
+
+def host_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+# --- Zähler (prozessweit und für den laufenden Lauf) ---
+_counters: Counter = Counter()
+_counters_lock = threading.Lock()
+
+def _count(name: str):
+    with _counters_lock: _counters[name] += 1
+    count_for_run("resilience", name)
+
+class _HostCircuit:
+    def __init__(self):
+        self.state = CLOSED; self.failures = 0; self.opened_at = 0.0; self.trial_in_flight = False
+
+class CircuitBreaker:
+    """
+    Circuit Breaker pro Host: nach failure_threshold aufeinanderfolgenden Fehlern (Netzwerk/5xx) "open",
+    alle Aufrufe scheitern sofort. Nach cooldown_seconds "half_open": genau ein Probeaufruf, Erfolg schließt,
+    Fehler öffnet erneut.
+    """
+    def __init__(self, failure_threshold: Optional[int] = None, cooldown_seconds: Optional[float] = None, max_events: int = 1000):
+        self.failure_threshold = failure_threshold or config.CIRCUIT_FAILURE_THRESHOLD
+        self.cooldown_seconds = config.CIRCUIT_COOLDOWN_SECONDS if cooldown_seconds is None else cooldown_seconds
+        self._circuits: Dict[str, _HostCircuit] = {}
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    def _transition(self, host: str, circuit: _HostCircuit, state: str):
+        logger.warning(f"Circuit für {host}: {circuit.state} -> {state}")
+        self._events.append({"host": host, "from": circuit.state, "to": state, "time": time.time()})
+        circuit.state = state; _count(f"circuit_{state}")
+
+    def before_call(self, host: str):
+        """Wirft CircuitOpenError, wenn der Host gerade gesperrt ist (open oder Probeaufruf läuft bereits)."""
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _HostCircuit())
+            if circuit.state == CLOSED: return
+            retry_in = circuit.opened_at + self.cooldown_seconds - time.monotonic()
+            if circuit.state == OPEN and retry_in <= 0: self._transition(host, circuit, HALF_OPEN)
+            if circuit.state == HALF_OPEN and not circuit.trial_in_flight: circuit.trial_in_flight = True; return
+        _count("fast_failed")
+        raise CircuitOpenError(host, max(0.0, retry_in))
+
+    def release_trial(self, host: str):
+        """Gibt einen abgebrochenen Probeaufruf (z.B. Deadline/Task-Abbruch) frei, ohne Erfolg oder Fehler zu werten."""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is not None: circuit.trial_in_flight = False
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            circuit = self._circuits.get(host)
+            return circuit is not None and circuit.state == OPEN
+
+    def record_success(self, host: str):
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _HostCircuit())
+            circuit.failures = 0; circuit.trial_in_flight = False
+            if circuit.state != CLOSED: self._transition(host, circuit, CLOSED)
+
+    def record_failure(self, host: str):
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _HostCircuit())
+            circuit.failures += 1; circuit.trial_in_flight = False
+            if circuit.state == HALF_OPEN or (circuit.state == CLOSED and circuit.failures >= self.failure_threshold):
+                circuit.opened_at = time.monotonic(); self._transition(host, circuit, OPEN)
+
+    def events_since(self, timestamp: float) -> List[Dict[str, Any]]:
+        with self._lock: return [event for event in self._events if event["time"] >= timestamp]
+
+    def states(self) -> Dict[str, str]:
+        with self._lock: return {host: circuit.state for host, circuit in self._circuits.items() if circuit.state != CLOSED}
+
+_circuit_breaker: Optional[CircuitBreaker] = None
+_circuit_breaker_lock = threading.Lock()
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Gibt den prozessweit geteilten Circuit Breaker zurück (Extractor, async Engine und SerpApi)."""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        with _circuit_breaker_lock:
+            if _circuit_breaker is None: _circuit_breaker = CircuitBreaker()
+    return _circuit_breaker
+
+# --- Retry-Budget pro Lauf ---
+class RetryBudget:
+    """Begrenzt die Summe aller Wiederholungsversuche eines Laufs (über alle Threads)."""
+    def __init__(self, max_retries: int):
+        self.max_retries = max_retries; self.used = 0; self.denied = 0
+        self._lock = threading.Lock()
+
+    def try_consume(self) -> bool:
+        with self._lock:
+            if self.used >= self.max_retries: self.denied += 1; return False
+            self.used += 1; return True
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock: return {"limit": self.max_retries, "used": self.used, "denied": self.denied}
+
+# Budget des laufenden Laufs; run_analysis/prewarm_cache setzen pro Lauf ein neues. Als ContextVar, damit parallele Läufe
+# (Flask-Requests, Vorwärmen) getrennte Budgets haben; Worker übernehmen es über modules.run_context.
+# Ohne Budget (z.B. direkte Modulaufrufe) ist die Zahl unbegrenzt.
+_run_budget: contextvars.ContextVar[Optional[RetryBudget]] = contextvars.ContextVar("retry_budget", default=None)
+
+def start_retry_budget(max_retries: Optional[int] = None) -> RetryBudget:
+    """Legt das Retry-Budget für den Lauf im aktuellen Kontext an und aktiviert es (auch für die von dort eingereichten Worker)."""
+    budget = RetryBudget(config.RETRY_BUDGET_PER_RUN if max_retries is None else max_retries)
+    _run_budget.set(budget)
+    return budget
+
+def get_resilience_stats(run: Optional[RunCounters] = None) -> Dict[str, int]:
+    """Zähler (kumuliert oder für einen Lauf): Zustandswechsel je Zielzustand, sofort abgelehnte Aufrufe, Retries (genutzt/verweigert)."""
+    if run is not None: counters = run.snapshot("resilience")
+    else:
+        with _counters_lock: counters = Counter(_counters)
+    return {name: counters[name] for name in ("circuit_open", "circuit_half_open", "circuit_closed", "fast_failed", "retries_used", "retries_denied")}
+
+class retry_within_budget(retry_base):
+    """
+    Tenacity-Retry-Bedingung (mit retry_if_exception per & kombinieren): erlaubt einen weiteren Versuch nur,
+    wenn der Circuit des Hosts (erstes String-Argument der dekorierten Funktion ist die URL) nicht offen ist
+    und das Retry-Budget des Laufs noch reicht.
+    """
+    def __call__(self, retry_state: RetryCallState) -> bool:
+        url = next((arg for arg in retry_state.args if isinstance(arg, str)), retry_state.kwargs.get("url", ""))
+        if url and get_circuit_breaker().is_open(host_of(url)): return False
+        budget = _run_budget.get()
+        if budget is not None and not budget.try_consume():
+            _count("retries_denied"); logger.warning(f"Retry-Budget ({budget.max_retries}) erschöpft, kein weiterer Versuch für {url}.")
+            return False
+        _count("retries_used"); return True
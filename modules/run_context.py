@@ -0,0 +1,42 @@
+# SEO-GAP-ANALYSIS/modules/run_context.py
+import asyncio
+import contextvars
+import functools
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Optional
+
+# Zustand eines Laufs (Retry-Budget, Zähler) liegt in ContextVars, damit parallele Läufe im selben Prozess
+# (Flask-Requests, prewarm_cache) sich nicht gegenseitig überschreiben. Thread-Pools übernehmen den Kontext
+# des aufrufenden Threads nicht von selbst; Aufgaben laufen daher in einer Kopie des Kontexts beim Einreichen.
+
+def submit_in_context(executor: Executor, fn: Callable[..., Any], *args, **kwargs) -> Future:
+    """executor.submit, wobei fn im Kontext des einreichenden Threads läuft (Laufzustand bleibt sichtbar)."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+def run_in_executor_in_context(loop: asyncio.AbstractEventLoop, executor: Executor, fn: Callable[..., Any], *args) -> "asyncio.Future":
+    """loop.run_in_executor mit dem Kontext der aufrufenden Task (asyncio kopiert ihn dort nicht)."""
+    return loop.run_in_executor(executor, functools.partial(contextvars.copy_context().run, fn, *args))
+
+class RunCounters:
+    """Zähler eines Laufs, getrennt nach Bereich (z.B. fetch); Thread-sicher."""
+    def __init__(self):
+        self._counters: Dict[str, Counter] = defaultdict(Counter); self._lock = threading.Lock()
+
+    def add(self, scope: str, name: str, count: float = 1):
+        with self._lock: self._counters[scope][name] += count
+
+    def snapshot(self, scope: str) -> Counter:
+        with self._lock: return Counter(self._counters[scope])
+
+_run_counters: contextvars.ContextVar[Optional[RunCounters]] = contextvars.ContextVar("run_counters", default=None)
+
+def start_run_counters() -> RunCounters:
+    """Neue Zähler für den Lauf im aktuellen Kontext; die Module zählen zusätzlich zu ihren prozessweiten Zählern hierhin."""
+    counters = RunCounters(); _run_counters.set(counters)
+    return counters
+
+def count_for_run(scope: str, name: str, count: float = 1):
+    counters = _run_counters.get()
+    if counters is not None: counters.add(scope, name, count)
@@ -12,7 +12,8 @@ logger = logging.getLogger(__name__)
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
-from cache_utils import get_cache_key, get_cache_path, load_from_cache, save_to_cache
+from cache_utils import get_cache_key, get_cache_path, load_from_cache, save_to_cache, await_shared_fill, release_fill_lease
+from modules.resilience import CircuitOpenError, get_circuit_breaker, host_of, retry_within_budget
 
 # --- Retry Konfiguration (bleibt) ---
 RETRY_EXCEPTIONS = (
@@ -34,13 +35,19 @@ def log_retry_attempt(retry_state):
     retry=retry_if_exception(
         lambda e: isinstance(e, RETRY_EXCEPTIONS) or \
                   (isinstance(e, requests.exceptions.HTTPError) and e.response is not None and e.response.status_code >= 500)
-    ),
+    ) & retry_within_budget(), # Circuit von SerpApi und Retry-Budget des Laufs
     before_sleep=log_retry_attempt
 )
 def _make_serp_api_request(url: str, params: Dict) -> requests.Response:
-    """Führt den eigentlichen API-Request durch (wird von tenacity wiederholt)."""
+    """Führt den eigentlichen API-Request durch (wird von tenacity wiederholt, scheitert sofort bei offenem Circuit)."""
     logger.debug(f"Sende Anfrage an {url} mit Parametern: {params}")
-    response = requests.get(url, params=params, timeout=20)
+    host = host_of(url); breaker = get_circuit_breaker()
+    breaker.before_call(host)
+    try: response = requests.get(url, params=params, timeout=20)
+    except RETRY_EXCEPTIONS: breaker.record_failure(host); raise
+    except Exception: breaker.record_success(host); raise
+    except BaseException: breaker.release_trial(host); raise
+    (breaker.record_failure if response.status_code >= 500 else breaker.record_success)(host)
     # raise_for_status prüft auf 4xx/5xx Fehler. Tenacity wiederholt nur bei 5xx (gemäß retry-Bedingung)
     response.raise_for_status()
     return response
@@ -71,6 +78,7 @@ def get_serp_results(
 
     if use_cache:
         cached_data = load_from_cache(cache_file)
+        if cached_data is None: cached_data = await_shared_fill(cache_file) # geteilter Cache: nur ein Knoten fragt SerpApi
         # Prüfen, ob Cache-Daten das erwartete Format haben
         if isinstance(cached_data, dict) and "organic_results" in cached_data and "related_questions" in cached_data:
             logger.info(f"-> SERP-Daten (inkl. PAA) aus Cache für '{query}'.")
@@ -83,6 +91,7 @@ def get_serp_results(
     if not config.SERP_API_KEY:
         logger.error("Kein SERP_API_KEY konfiguriert.")
         default_return["error"] = "SerpApi API Key fehlt."
+        if use_cache: release_fill_lease(cache_file) # sonst warten andere Knoten bis zum Ablauf der Lease
         return default_return
 
     # Parameter für SerpApi
@@ -150,19 +159,28 @@ def get_serp_results(
             save_to_cache(result_data, cache_file) # Speichere das gesamte Dictionary
         return result_data
 
+    except CircuitOpenError as e:
+        err_msg = f"SerpApi vorübergehend gesperrt: {e}"
+        logger.error(err_msg)
+        if use_cache: release_fill_lease(cache_file)
+        default_return["error"] = err_msg
+        return default_return
     except requests.exceptions.RequestException as e:
         status_code = e.response.status_code if hasattr(e, 'response') and e.response is not None else 'N/A'
         err_msg = f"Fehler beim Abrufen der Suchergebnisse nach Retries. Status: {status_code}. Fehler: {e}"
         logger.error(err_msg, exc_info=True)
+        if use_cache: release_fill_lease(cache_file)
         default_return["error"] = err_msg
         return default_return
     except json.JSONDecodeError as e:
         err_msg = f"Ungültige JSON-Antwort von SerpApi für '{query}': {e}"
         logger.error(err_msg)
+        if use_cache: release_fill_lease(cache_file)
         default_return["error"] = err_msg
         return default_return
     except Exception as e:
         err_msg = f"Unerwarteter Fehler beim Verarbeiten der SerpApi-Antwort für '{query}'"
         logger.exception(err_msg) # Logge den Traceback
+        if use_cache: release_fill_lease(cache_file)
         default_return["error"] = f"{err_msg}: {e}"
         return default_return
\ No newline at end of file
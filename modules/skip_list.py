@@ -0,0 +1,131 @@
+# SEO-GAP-ANALYSIS/modules/skip_list.py
+import os
+import sys
+import json
+import time
+import threading
+import logging
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+try:
+    import config
+    from modules.domain_scheduler import registered_domain
+    from modules.extractor import is_congestion_error, is_deadline_error
+    from modules.run_context import RunCounters, count_for_run
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import config
+    from modules.domain_scheduler import registered_domain
+    from modules.extractor import is_congestion_error, is_deadline_error
+    from modules.run_context import RunCounters, count_for_run
+
+# Prozessweite Zähler (übersprungen, per SERP nachgefüllt); die Zusammenfassung eines Laufs liest dessen RunCounters
+_counters: Counter = Counter()
+_counters_lock = threading.Lock()
+
+def record_skip_event(name: str, count: int = 1):
+    with _counters_lock: _counters[name] += count
+    count_for_run("skip_list", name, count)
+
+def get_skip_list_stats(run: Optional[RunCounters] = None) -> Dict[str, int]:
+    if run is not None: counters = run.snapshot("skip_list")
+    else:
+        with _counters_lock: counters = Counter(_counters)
+    return {name: counters[name] for name in ("skipped", "refilled")}
+
+# Endungen, die als normale Seiten gelten (kein eigenes Muster "ext:...")
+PAGE_EXTENSIONS = ("", "html", "htm", "php", "asp", "aspx", "jsp", "shtml")
+
+def url_patterns(url: str) -> List[str]:
+    """
+    Muster, unter denen Ergebnisse einer URL gezählt werden: registrierte Domain, Dateiendung (z.B. 'ext:pdf')
+    und erstes Pfadsegment pro Host (z.B. 'path:shop.example.com/kategorie'), sofern der Pfad tiefer geht.
+    """
+    parts = urlsplit(url); host = (parts.hostname or "").lower()
+    segments = [segment for segment in parts.path.split("/") if segment]
+    patterns = [f"domain:{registered_domain(url)}"]
+    extension = segments[-1].rsplit(".", 1)[-1].lower() if segments and "." in segments[-1] else ""
+    if extension not in PAGE_EXTENSIONS: patterns.append(f"ext:{extension}")
+    if len(segments) >= 2: patterns.append(f"path:{host}/{segments[0].lower()}")
+    return patterns
+
+def is_transient_error(error_msg: str) -> bool:
+    """Fehler, die nichts über die Extrahierbarkeit aussagen (Überlast, Netzwerk, Deadline) und nicht gezählt werden."""
+    return is_deadline_error(error_msg) or is_congestion_error(error_msg) or error_msg.startswith("Exec-Fehler")
+
+class OutcomeStore:
+    """
+    Persistente Erfolgsstatistik der Text-Extraktion je Muster (JSON-Datei, {muster: [versuche, erfolge, zuletzt]}).
+    Einträge, die länger als NEGATIVE_CACHE_TTL_LONG nicht aktualisiert wurden, zählen nicht mehr, damit
+    übersprungene Ziele irgendwann eine neue Chance bekommen.
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or config.SKIP_LIST_FILE
+        self._lock = threading.Lock(); self._dirty = False
+        self._outcomes: Dict[str, List[float]] = self._load()
+
+    def _load(self) -> Dict[str, List[float]]:
+        if not os.path.exists(self.path): return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f: return json.load(f)
+        except (OSError, ValueError) as e: logger.warning(f"Skip-Liste {self.path} nicht lesbar, starte leer: {e}"); return {}
+
+    def record(self, url: str, success: bool):
+        now = time.time()
+        with self._lock:
+            for pattern in url_patterns(url):
+                attempts, successes, updated = self._outcomes.get(pattern, [0, 0, now])
+                if now - updated > config.NEGATIVE_CACHE_TTL_LONG: attempts, successes = 0, 0 # veraltet: neu lernen
+                self._outcomes[pattern] = [attempts + 1, successes + int(success), now]
+            self._dirty = True
+
+    def success_rate(self, url: str) -> Tuple[float, Optional[str]]:
+        """Niedrigste Erfolgsquote über alle Muster mit genug Versuchen (SKIP_MIN_ATTEMPTS) und das Muster dazu; unbekannt = 1.0."""
+        rate, worst = 1.0, None; now = time.time()
+        with self._lock:
+            for pattern in url_patterns(url):
+                attempts, successes, updated = self._outcomes.get(pattern, [0, 0, now])
+                if attempts < config.SKIP_MIN_ATTEMPTS or now - updated > config.NEGATIVE_CACHE_TTL_LONG: continue
+                if successes / attempts < rate: rate, worst = successes / attempts, pattern
+        return rate, worst
+
+    def save(self):
+        with self._lock:
+            if not self._dirty: return
+            data = dict(self._outcomes); self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f: json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e: logger.error(f"Fehler beim Speichern der Skip-Liste {self.path}: {e}")
+
+_outcome_store: Optional[OutcomeStore] = None
+_outcome_store_lock = threading.Lock()
+
+def get_outcome_store() -> OutcomeStore:
+    """Prozessweit geteilte Erfolgsstatistik (wird beim ersten Zugriff aus SKIP_LIST_FILE geladen)."""
+    global _outcome_store
+    if _outcome_store is None:
+        with _outcome_store_lock:
+            if _outcome_store is None: _outcome_store = OutcomeStore()
+    return _outcome_store
+
+def describe_skip_reason(rate: float, pattern: str) -> str:
+    return f"Übersprungen (Skip-Liste): {pattern} liefert nur in {rate:.0%} der Fälle Text"
+
+def plan_urls(urls: List[str], store: Optional[OutcomeStore] = None) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+    Teilt URLs in (abzurufen, übersprungen mit Grund). Ziele unter SKIP_SUCCESS_THRESHOLD werden übersprungen,
+    die übrigen nach erwarteter Erfolgsquote sortiert (schwache Ziele zuletzt, stabil innerhalb gleicher Quote).
+    """
+    store = store or get_outcome_store()
+    rated = [(url, *store.success_rate(url)) for url in urls]
+    skipped = [(url, describe_skip_reason(rate, pattern)) for url, rate, pattern in rated if pattern and rate < config.SKIP_SUCCESS_THRESHOLD]
+    skipped_urls = {url for url, _ in skipped}
+    to_fetch = [url for url, rate, _ in sorted(rated, key=lambda item: -item[1]) if url not in skipped_urls]
+    return to_fetch, skipped
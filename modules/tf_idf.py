@@ -8,6 +8,8 @@ from textblob import TextBlob
 import re
 import sys
 import os
+import time
+import threading
 from collections import Counter
 import logging
 from typing import List, Dict, Any, Tuple, Optional
@@ -18,31 +20,166 @@ try: import config
 except ImportError:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     import config
+from cache_utils import get_derived_artifact_file, text_content_hash, load_many_from_cache, save_many_to_cache
+from modules.run_context import RunCounters, count_for_run
 
 def load_spacy_model(model_name: str) -> Optional[spacy.language.Language]:
     try: nlp = spacy.load(model_name); logger.info(f"-> Spacy-Modell '{model_name}' geladen."); return nlp
     except OSError: logger.error(f"Spacy-Modell '{model_name}' nicht gefunden."); return None
     except Exception as e: logger.exception(f"Fehler Laden Spacy-Modell '{model_name}'"); return None
 
-def preprocess_text(text: str, nlp: spacy.language.Language) -> str:
-    if not text or not nlp: return ""
-    text = re.sub(r'https?://\S+', ' ', text); text = re.sub(r'\d+', ' ', text)
-    text = text.replace('"', ' ').replace("'", " ").replace("-", " ")
-    text = re.sub(r'\s+', ' ', text).strip(); doc = nlp(text); tokens = []
+# Bereinigung der Lemmata (vorkompiliert): Spacy sieht den Originaltext, damit NER "Apollo 11" oder "Baden-Württemberg"
+# vollständig erkennt; URLs, Ziffern, Anführungszeichen und Bindestriche werden pro Token entfernt.
+URL_PATTERN = re.compile(r'https?://\S+'); DIGIT_PATTERN = re.compile(r'\d+'); WHITESPACE_PATTERN = re.compile(r'\s+')
+PUNCT_TO_SPACE = str.maketrans({'"': ' ', "'": ' ', '-': ' '})
+KEPT_POS = frozenset({'NOUN', 'VERB', 'ADJ', 'PROPN'})
+ENTITY_LABELS = frozenset({"PERSON", "ORG", "GPE", "LOC"})
+# Von keiner Analyse genutzte Komponenten (Dependency-Parse, Satzgrenzen); "ner" läuft nur mit include_ner.
+# Clustering (TF-IDF/K-Means) und Sentiment (TextBlob) brauchen keine Spacy-Komponente.
+UNUSED_COMPONENTS = frozenset({"parser", "senter"})
+
+def clean_text(text: str) -> str:
+    text = URL_PATTERN.sub(' ', text); text = DIGIT_PATTERN.sub(' ', text); text = text.translate(PUNCT_TO_SPACE)
+    return WHITESPACE_PATTERN.sub(' ', text).strip()
+
+def filter_tokens(doc) -> str:
+    """
+    Lemmata der Inhaltswörter (Nomen, Verben, Adjektive, Eigennamen) ohne Stoppwörter, klein geschrieben.
+    Jedes Lemma wird wie mit clean_text bereinigt ("E-Mail" -> "mail", "Covid-19" -> "covid"); Teile eines zerlegten Lemmas
+    durchlaufen erneut Stoppwort- und Längenfilter. Abgeschnittene Wortteile ("Groß-" in "Groß- und Kleinschreibung") entfallen.
+    """
+    tokens = []
     for token in doc:
-        if (token.pos_ in ['NOUN', 'VERB', 'ADJ', 'PROPN'] and not token.is_stop and
-                not token.is_punct and token.lemma_ not in ['-pron-'] and len(token.lemma_) > 2):
-            tokens.append(token.lemma_.lower())
+        if token.pos_ not in KEPT_POS or token.is_stop or token.is_punct or token.like_url or token.lemma_ in ['-pron-']: continue
+        if token.tag_ == "TRUNC" or token.text.endswith("-"): continue
+        lemma = token.lemma_; cleaned = clean_text(lemma)
+        for part in cleaned.split():
+            if len(part) >= MIN_LEMMA_LENGTH and (cleaned == lemma or not doc.vocab[part].is_stop): tokens.append(part.lower())
     return " ".join(tokens)
 
-def extract_entities(text: str, nlp: spacy.language.Language) -> List[Tuple[str, str, int]]:
-    if not text or not nlp: return []
-    if "ner" not in nlp.pipe_names: logger.warning("NER-Pipe nicht aktiv."); return []
-    try: doc = nlp(text)
-    except Exception as e: logger.error(f"Fehler Spacy-Verarbeitung NER: {e}", exc_info=True); return []
-    entity_counter = Counter(); entity_labels = {}; allowed_labels = {"PERSON", "ORG", "GPE", "LOC"}
+def disabled_components(nlp: spacy.language.Language, include_ner: bool = False) -> List[str]:
+    """Komponenten, die für die gewählten Optionen nicht laufen müssen (POS, Lemma und Stoppwörter brauchen keinen Parser)."""
+    return [name for name in nlp.pipe_names if name in UNUSED_COMPONENTS or (name == "ner" and not include_ner)]
+
+_nlp_stats: Counter = Counter(); _nlp_stats_lock = threading.Lock()
+
+def get_nlp_stats(run: Optional[RunCounters] = None) -> Dict[str, float]:
+    """Spacy-Zähler des Prozesses bzw. eines Laufs (run): verarbeitete Docs und Sekunden je Komponente ("seconds_<name>")."""
+    if run is not None: return dict(run.snapshot("nlp"))
+    with _nlp_stats_lock: return dict(_nlp_stats)
+
+def _record_nlp_stats(values: Dict[str, float]):
+    with _nlp_stats_lock: _nlp_stats.update(values)
+    for name, value in values.items(): count_for_run("nlp", name, value)
+
+class _StageTimer:
+    """Iterator um eine Pipeline-Stufe; misst die Zeit in next() (inkl. aller vorgelagerten Stufen)."""
+    def __init__(self, iterable): self._iterator = iter(iterable); self.seconds = 0.0
+    def __iter__(self): return self
+    def __next__(self):
+        started = time.perf_counter()
+        try: return next(self._iterator)
+        finally: self.seconds += time.perf_counter() - started
+
+def _pipe_docs(nlp: spacy.language.Language, texts, batch_size: int, n_process: int, disable: List[str]):
+    """
+    nlp.pipe ohne die Komponenten in disable. Mit einem Prozess werden die Komponenten wie in nlp.pipe verkettet,
+    aber einzeln gemessen (Eigenzeit = Stufe minus Vorstufe).
+    """
+    if n_process > 1:
+        yield from nlp.pipe(texts, batch_size=batch_size, n_process=n_process, disable=disable); return
+    stages = [("tokenizer", _StageTimer(nlp.make_doc(text) for text in texts))]
+    for name, component in nlp.pipeline:
+        if name in disable: continue
+        docs = stages[-1][1]
+        stages.append((name, _StageTimer(component.pipe(docs, batch_size=batch_size) if hasattr(component, "pipe") else (component(doc) for doc in docs))))
+    yield from stages[-1][1]
+    _record_nlp_stats({f"seconds_{name}": timer.seconds - (stages[i - 1][1].seconds if i else 0.0) for i, (name, timer) in enumerate(stages)})
+
+def preprocess_text(text: str, nlp: spacy.language.Language) -> str:
+    if not text or not nlp: return ""
+    return filter_tokens(nlp(text, disable=disabled_components(nlp)))
+
+def preprocess_texts(texts: List[str], nlp: spacy.language.Language, batch_size: Optional[int] = None,
+                     n_process: Optional[int] = None) -> List[str]:
+    """
+    Wie preprocess_text für viele Texte, aber über nlp.pipe (Batches, optional mehrere Prozesse).
+    Identische Texte werden nur einmal verarbeitet; Ergebnis in der Reihenfolge von texts.
+    """
+    return [tokens for tokens, _ in analyze_texts(texts, nlp, batch_size=batch_size, n_process=n_process)]
+
+def analyze_texts(texts: List[str], nlp: spacy.language.Language, include_ner: bool = False, batch_size: Optional[int] = None,
+                  n_process: Optional[int] = None) -> List[Tuple[str, Optional[List[Tuple[str, str, int]]]]]:
+    """
+    Ein Spacy-Durchlauf pro eindeutigem Text: (Lemmata wie preprocess_text, Entitäten wie extract_entities oder None ohne include_ner).
+    Spacy verarbeitet den Originaltext; Lemmata werden pro Token bereinigt (filter_tokens), Entitäten stammen aus demselben Doc.
+    Ergebnisse kommen, soweit vorhanden, aus dem NLP-Cache; nur die übrigen Texte laufen durch Spacy.
+    """
+    if include_ner and nlp and "ner" not in nlp.pipe_names: logger.warning("NER-Pipe nicht aktiv."); ner_active = False
+    else: ner_active = include_ner
+    empty = ("", [] if include_ner else None)
+    unique_texts = [text for text in dict.fromkeys(texts) if text]
+    if not nlp or not unique_texts: return [empty for _ in texts]
+    cache_files = _nlp_cache_files(unique_texts, nlp)
+    analyzed_by_text = _load_cached_analyses(cache_files, ner_active, empty[1])
+    pending = [text for text in unique_texts if text not in analyzed_by_text]
+    if cache_files: _record_nlp_stats({"cache_hits": len(analyzed_by_text), "cache_misses": len(pending)})
+    if not pending: return [analyzed_by_text.get(text, empty) for text in texts]
+    batch_size = max(1, batch_size or config.SPACY_BATCH_SIZE)
+    n_process = max(1, min(n_process or config.SPACY_N_PROCESS, -(-len(pending) // batch_size))) # keine Prozesse ohne eigenen Batch
+    analyze_doc = lambda doc: (filter_tokens(doc), entities_from_doc(doc) if ner_active else empty[1])
+    disable = disabled_components(nlp, include_ner=ner_active)
+    run_pipe = lambda processes: [analyze_doc(doc) for doc in _pipe_docs(nlp, pending, batch_size, processes, disable)]
+    try: analyzed = run_pipe(n_process)
+    except Exception as e:
+        if n_process == 1: raise
+        logger.warning(f"nlp.pipe mit {n_process} Prozessen fehlgeschlagen, verarbeite im Hauptprozess: {e}"); analyzed = run_pipe(1)
+    _record_nlp_stats({"docs": len(analyzed)})
+    analyzed_by_text.update(zip(pending, analyzed))
+    if cache_files:
+        save_many_to_cache({cache_files[text]: {"tokens": tokens, "entities": entities if ner_active else None}
+                            for text, (tokens, entities) in zip(pending, analyzed)})
+    return [analyzed_by_text.get(text, empty) for text in texts]
+
+# --- NLP-Cache: Lemmata (und Entitäten) je Textinhalt ---
+# Schlüssel: SHA-256 des Texts + Modell (Name, Version, Komponenten, Spacy-Version) + Filtereinstellungen. Ein Eintrag
+# {"tokens": ..., "entities": [...] oder None} gilt, solange sich keiner dieser Werte ändert (daher auch abgelaufen lesbar);
+# fehlen die Entitäten, zählt er für NER-Läufe als Miss und wird mit Entitäten neu geschrieben.
+NLP_CACHE_TYPE = "nlp_v1"
+MIN_LEMMA_LENGTH = 3
+
+def preprocess_settings() -> str:
+    """Alle Einstellungen, die das Ergebnis von analyze_texts bei gleichem Modell bestimmen."""
+    return (f"pos={','.join(sorted(KEPT_POS))};min_lemma={MIN_LEMMA_LENGTH};clean=token:{URL_PATTERN.pattern}|{DIGIT_PATTERN.pattern}|"
+            f"{''.join(sorted(map(chr, PUNCT_TO_SPACE)))};entities={','.join(sorted(ENTITY_LABELS))}")
+
+def model_signature(nlp: spacy.language.Language) -> Optional[str]:
+    """Name, Version und Komponenten des Modells (None, wenn das Objekt keine Spacy-Metadaten hat)."""
+    meta = getattr(nlp, "meta", None)
+    if not isinstance(meta, dict): return None
+    return f"{meta.get('lang')}_{meta.get('name')}@{meta.get('version')};spacy={spacy.__version__};pipes={','.join(nlp.pipe_names)}"
+
+def _nlp_cache_files(texts: List[str], nlp: spacy.language.Language) -> Dict[str, str]:
+    signature = model_signature(nlp) if config.NLP_CACHE_ENABLED else None
+    if signature is None: return {}
+    settings = preprocess_settings()
+    return {text: get_derived_artifact_file(NLP_CACHE_TYPE, text_content_hash(text), signature, settings) for text in texts}
+
+def _load_cached_analyses(cache_files: Dict[str, str], ner_active: bool, no_entities) -> Dict[str, Tuple[str, Optional[List[Tuple[str, str, int]]]]]:
+    if not cache_files: return {}
+    entries = load_many_from_cache(cache_files.values(), allow_expired=True); analyzed = {}
+    for text, cache_file in cache_files.items():
+        entry = entries.get(cache_file)
+        if not isinstance(entry, dict) or not isinstance(entry.get("tokens"), str): continue
+        if not ner_active: analyzed[text] = (entry["tokens"], no_entities)
+        elif entry.get("entities") is not None: analyzed[text] = (entry["tokens"], [tuple(entity) for entity in entry["entities"]])
+    return analyzed
+
+def entities_from_doc(doc) -> List[Tuple[str, str, int]]:
+    """Zählt PERSON/ORG/GPE/LOC-Entitäten eines Docs."""
+    entity_counter = Counter(); entity_labels = {}
     for ent in doc.ents:
-        if ent.label_ in allowed_labels:
+        if ent.label_ in ENTITY_LABELS:
             entity_text = ent.text.strip()
             if entity_text and len(entity_text) > 2 and not entity_text.isdigit():
                  entity_text_normalized = re.sub(r'\s+', ' ', entity_text)
@@ -52,6 +189,13 @@ def extract_entities(text: str, nlp: spacy.language.Language) -> List[Tuple[str,
     result = [(entity, entity_labels[entity], count) for entity, count in sorted_entities if entity in entity_labels]
     return result
 
+def extract_entities(text: str, nlp: spacy.language.Language) -> List[Tuple[str, str, int]]:
+    if not text or not nlp: return []
+    if "ner" not in nlp.pipe_names: logger.warning("NER-Pipe nicht aktiv."); return []
+    try: doc = nlp(text, disable=disabled_components(nlp, include_ner=True))
+    except Exception as e: logger.error(f"Fehler Spacy-Verarbeitung NER: {e}", exc_info=True); return []
+    return entities_from_doc(doc)
+
 def perform_keyword_clustering(tfidf_matrix, feature_names, num_clusters: int = 5) -> Dict[int, List[str]]:
     if tfidf_matrix.shape[0] < num_clusters:
         logger.warning(f"Docs ({tfidf_matrix.shape[0]}) < Cluster ({num_clusters}). Reduziere."); num_clusters = max(1, tfidf_matrix.shape[0])
@@ -82,15 +226,24 @@ def perform_sentiment_analysis(texts: List[str]) -> Tuple[Dict[int, float], floa
 
 def perform_tf_idf_analysis(texts: List[str], urls: List[str], nlp: spacy.language.Language,
                            reference_text: Optional[str] = None, include_ner: bool = False,
-                           include_clustering: bool = False, include_sentiment: bool = False
+                           include_clustering: bool = False, include_sentiment: bool = False,
+                           preprocessed_texts: Optional[List[str]] = None,
+                           preprocessed_entities: Optional[List[List[Tuple[str, str, int]]]] = None
                            ) -> Tuple[Optional[pd.DataFrame], Dict[str, Any]]:
     if not nlp: return None, {"error": "Spacy Modell nicht geladen."}
-    logger.info("-> Starte Textvorverarbeitung...")
-    preprocessed_texts = [preprocess_text(text, nlp) for text in texts]
+    # preprocessed_texts/-_entities: bereits (z.B. während des Downloads) vorverarbeitete Texte in derselben Reihenfolge wie texts
+    if preprocessed_texts is not None and len(preprocessed_texts) == len(texts):
+        logger.info("-> Verwende bereits vorverarbeitete Texte (Streaming).")
+    else:
+        logger.info("-> Starte Textvorverarbeitung..." + (" (mit NER im selben Durchlauf)" if include_ner else ""))
+        analyzed = analyze_texts(texts, nlp, include_ner=include_ner)
+        preprocessed_texts = [tokens for tokens, _ in analyzed]; preprocessed_entities = [entities for _, entities in analyzed] if include_ner else None
+    if preprocessed_entities is not None and len(preprocessed_entities) != len(texts): preprocessed_entities = None
     valid_indices = [i for i, txt in enumerate(preprocessed_texts) if txt and len(txt.split()) > 1]
     if not valid_indices: return None, {"error": "Keine verwertbaren Texte nach Vorverarbeitung."}
     preprocessed_texts_filtered = [preprocessed_texts[i] for i in valid_indices]
     urls_filtered = [urls[i] for i in valid_indices]; original_texts_filtered = [texts[i] for i in valid_indices]
+    entities_filtered = [preprocessed_entities[i] for i in valid_indices] if preprocessed_entities is not None else None
     logger.info(f"-> {len(preprocessed_texts_filtered)} Texte analysiert (von {len(texts)}).")
     logger.info("-> Berechne TF-IDF...")
     tfidf_matrix = None; feature_names = []
@@ -119,7 +272,7 @@ def perform_tf_idf_analysis(texts: List[str], urls: List[str], nlp: spacy.langua
     if reference_text:
         logger.info("-> Vergleiche mit Referenztext...")
         try:
-            preprocessed_reference = preprocess_text(reference_text, nlp); ref_tokens_set = set(preprocessed_reference.split())
+            preprocessed_reference = preprocess_texts([reference_text], nlp)[0]; ref_tokens_set = set(preprocessed_reference.split())
             logger.debug(f"Ref Tokens: {ref_tokens_set}"); logger.debug(f"Top Terms: {[t for t,s in overall_top_terms_with_scores]}")
             for term, score in overall_top_terms_with_scores:
                  if term not in preprocessed_reference:
@@ -136,7 +289,8 @@ def perform_tf_idf_analysis(texts: List[str], urls: List[str], nlp: spacy.langua
         for i, text in enumerate(original_texts_filtered):
             url = urls_filtered[i]
             try:
-                entities = extract_entities(text, nlp); entities_by_url[url] = entities
+                entities = entities_filtered[i] if entities_filtered is not None else extract_entities(text, nlp) # sonst zweiter Spacy-Durchlauf
+                entities_by_url[url] = entities
                 for entity, label, count in entities:
                     if label in combined_ner_labels:
                         combined_label = combined_ner_labels[label]; key = (entity.lower(), combined_label)
@@ -0,0 +1,93 @@
+# SEO-GAP-ANALYSIS/resp_client.py
+import socket
+import threading
+import logging
+from typing import Any, List, Optional, Sequence
+from urllib.parse import urlsplit, unquote
+
+logger = logging.getLogger(__name__)
+
+# Minimaler Client für das Redis-Protokoll (RESP2) ohne zusätzliche Abhängigkeit: eine Verbindung pro Thread,
+# einfache Befehle und Pipelines. Spricht mit Redis, Valkey, KeyDB und kompatiblen Servern.
+
+class RespError(Exception):
+    """Fehlerantwort des Servers (z.B. '-ERR unknown command')."""
+
+def encode_command(args: Sequence[Any]) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        value = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+        parts.append(b"$%d\r\n%s\r\n" % (len(value), value))
+    return b"".join(parts)
+
+def read_reply(stream) -> Any:
+    """Liest eine Antwort; Fehlerantworten werden als RespError zurückgegeben (nicht geworfen), damit Pipelines vollständig gelesen werden."""
+    line = stream.readline()
+    if not line.endswith(b"\r\n"): raise ConnectionError("Verbindung zum Cache-Server unterbrochen")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+": return body.decode('utf-8')
+    if kind == b"-": return RespError(body.decode('utf-8', 'replace'))
+    if kind == b":": return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0: return None
+        data = stream.read(length + 2)
+        if len(data) != length + 2: raise ConnectionError("Verbindung zum Cache-Server unterbrochen")
+        return data[:-2]
+    if kind == b"*":
+        count = int(body)
+        return None if count < 0 else [read_reply(stream) for _ in range(count)]
+    raise ConnectionError(f"Unerwartete Antwort vom Cache-Server: {line[:40]!r}")
+
+class RespClient:
+    """Client für redis://[:passwort@]host[:port][/db]; Verbindungen werden pro Thread gehalten und bei Fehlern einmal neu aufgebaut."""
+    def __init__(self, url: str, timeout: float = 5.0):
+        parts = urlsplit(url)
+        if parts.scheme not in ("redis", ""): raise ValueError(f"Nicht unterstützte Cache-URL '{url}' (erwartet redis://host:port/db)")
+        self.host = parts.hostname or "localhost"; self.port = parts.port or 6379
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.strip("/") or 0); self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._local.sock = sock; self._local.stream = sock.makefile('rb')
+        setup = ([("AUTH", self.password)] if self.password else []) + ([("SELECT", self.db)] if self.db else [])
+        for reply in self._send(setup) if setup else []:
+            if isinstance(reply, RespError): self.close(); raise reply
+
+    def _send(self, commands: List[Sequence[Any]]) -> List[Any]:
+        self._local.sock.sendall(b"".join(encode_command(command) for command in commands))
+        return [read_reply(self._local.stream) for _ in commands]
+
+    def close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None: return
+        try: self._local.stream.close(); sock.close()
+        except OSError: pass
+        self._local.sock = None
+
+    def pipeline(self, commands: List[Sequence[Any]]) -> List[Any]:
+        """Sendet mehrere Befehle in einem Roundtrip; Fehlerantworten stehen als RespError in der Ergebnisliste."""
+        if not commands: return []
+        for attempt in range(2):
+            try:
+                if getattr(self._local, "sock", None) is None: self._connect()
+                return self._send(commands)
+            except (OSError, ConnectionError) as e:
+                self.close()
+                if attempt: raise ConnectionError(f"Cache-Server {self.host}:{self.port} nicht erreichbar: {e}") from e
+                logger.debug(f"Verbindung zu {self.host}:{self.port} verloren, baue neu auf: {e}")
+
+    def execute(self, *args) -> Any:
+        reply = self.pipeline([args])[0]
+        if isinstance(reply, RespError): raise reply
+        return reply
+
+    def scan_keys(self, pattern: str, count: int = 1000) -> List[str]:
+        keys, cursor = [], "0"
+        while True:
+            cursor, batch = self.execute("SCAN", cursor, "MATCH", pattern, "COUNT", count)
+            keys.extend(key.decode('utf-8') for key in batch); cursor = cursor.decode('utf-8')
+            if cursor == "0": return keys
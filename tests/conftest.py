@@ -0,0 +1,14 @@
+# SEO-GAP-ANALYSIS/tests/conftest.py
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+
+@pytest.fixture(autouse=True)
+def no_memory_cache_tier(monkeypatch):
+    """Viele Tests altern Cache-Dateien direkt auf der Platte; die Speicher-Stufe ist daher standardmäßig aus."""
+    monkeypatch.setattr(config, 'MEMORY_CACHE_BYTES', 0)
+    monkeypatch.setattr(config, 'CACHE_GC_INTERVAL_SECONDS', 0) # keine GC-Threads während der Tests
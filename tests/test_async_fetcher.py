@@ -0,0 +1,138 @@
+# SEO-GAP-ANALYSIS/tests/test_async_fetcher.py
+import sys
+import os
+import time
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+from modules.async_fetcher import fetch_texts_async
+from modules.extractor import MIN_TEXT_LENGTH as EFFECTIVE_MIN_TEXT_LENGTH, load_cached_text
+
+EXPECTED_TEXT = f"Main content {'X' * EFFECTIVE_MIN_TEXT_LENGTH}"
+HTML_BODY = f"<html><body><p>{EXPECTED_TEXT}</p></body></html>".encode('utf-8')
+
+class _TestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    in_flight = 0; max_in_flight = 0; lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock: cls.in_flight += 1; cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            if self.path.startswith("/slow"): time.sleep(0.1)
+            if self.path.startswith("/hang"): time.sleep(1.0)
+            if self.path.startswith("/etag") and self.headers.get("If-None-Match") == '"abc"': status, ctype, body = 304, None, b""
+            elif self.path.startswith("/missing"): status, ctype, body = 404, "text/html", b"not found"
+            elif self.path.startswith("/file.pdf"): status, ctype, body = 200, "application/pdf", b"%PDF-1.4"
+            else: status, ctype, body = 200, "text/html; charset=utf-8", HTML_BODY
+            self.send_response(status); self.send_header("Content-Length", str(len(body)))
+            if ctype: self.send_header("Content-Type", ctype)
+            if self.path.startswith("/etag"): self.send_header("ETag", '"abc"')
+            self.end_headers(); self.wfile.write(body)
+        finally:
+            with cls.lock: cls.in_flight -= 1
+    def log_message(self, *args): pass
+
+@pytest.fixture
+def local_server():
+    _TestHandler.in_flight = 0; _TestHandler.max_in_flight = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _TestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True); thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown(); server.server_close()
+
+@pytest.fixture(autouse=True)
+def manage_test_cache(tmp_path):
+    original_cache_dir = config.CACHE_DIR
+    config.CACHE_DIR = str(tmp_path / "cache")
+    os.makedirs(config.CACHE_DIR, exist_ok=True)
+    yield
+    config.CACHE_DIR = original_cache_dir
+
+def test_fetch_texts_async_results_and_errors(local_server, mocker):
+    mocker.patch('trafilatura.extract', return_value=EXPECTED_TEXT)
+    urls = [f"{local_server}/ok", f"{local_server}/missing", f"{local_server}/file.pdf"]
+    results = {url: (text, err) for url, text, err in fetch_texts_async(urls, use_cache=False)}
+    assert set(results) == set(urls)
+    assert results[urls[0]] == (EXPECTED_TEXT, None)
+    assert results[urls[1]][0] is None and "HTTP Client Fehler 404" in results[urls[1]][1]
+    assert results[urls[2]][0] is None and "Inhaltstyp ist kein HTML (application/pdf)" in results[urls[2]][1]
+
+def test_fetch_texts_async_respects_per_host_limit(local_server, mocker):
+    mocker.patch('trafilatura.extract', return_value=EXPECTED_TEXT)
+    urls = [f"{local_server}/slow/{i}" for i in range(8)]
+    seen = []
+    results = fetch_texts_async(urls, use_cache=False, max_connections=50, per_host_limit=2, on_result=seen.append)
+    assert len(results) == 8 and seen == results
+    assert all(err is None for _, _, err in results)
+    assert _TestHandler.max_in_flight <= 2
+
+def test_fetch_texts_async_uses_text_cache(local_server, mocker):
+    mock_extract = mocker.patch('trafilatura.extract', return_value=EXPECTED_TEXT)
+    url = f"{local_server}/cached"
+    fetch_texts_async([url], use_cache=True)
+    assert load_cached_text(url) == (EXPECTED_TEXT, None)
+    results = fetch_texts_async([url], use_cache=True)
+    assert results == [(url, EXPECTED_TEXT, None)]
+    mock_extract.assert_called_once()
+
+def test_fetch_texts_async_with_process_pool(local_server):
+    """Extraktion über den geteilten Prozesspool (echtes Trafilatura im Kindprozess)."""
+    from modules.extractor import get_extraction_pool
+    assert get_extraction_pool(0) is None
+    pool = get_extraction_pool(1)
+    assert get_extraction_pool(1) is pool
+    url = f"{local_server}/page"
+    results = fetch_texts_async([url], use_cache=False, extraction_pool=pool)
+    assert results[0][0] == url and results[0][2] is None
+    assert EXPECTED_TEXT in results[0][1]
+
+def test_fetch_texts_async_revalidates_stale_entry(local_server, mocker):
+    """Abgelaufener Eintrag mit ETag: 304 -> gespeicherter Text, kein Trafilatura-Aufruf."""
+    from modules.extractor import get_text_cache_file
+    from cache_utils import get_raw_cache_file
+    url = f"{local_server}/etag"
+    mock_extract = mocker.patch('trafilatura.extract', return_value=EXPECTED_TEXT)
+    fetch_texts_async([url], use_cache=True)
+    cache_file = get_text_cache_file(url)
+    old = time.time() - config.MAX_CACHE_AGE_SECONDS - 60
+    for stale_file in (cache_file, get_raw_cache_file(url)): os.utime(stale_file, (old, old))
+    assert fetch_texts_async([url], use_cache=True) == [(url, EXPECTED_TEXT, None)]
+    mock_extract.assert_called_once()
+    assert os.path.getmtime(cache_file) > old + 60
+
+def test_fetch_texts_async_caps_body_size(local_server, mocker):
+    from modules.extractor import pop_download_sizes
+    mocker.patch.object(config, 'MAX_DOWNLOAD_BYTES', 20)
+    mock_extract = mocker.patch('trafilatura.extract', return_value=EXPECTED_TEXT)
+    urls = [f"{local_server}/big", f"{local_server}/file.pdf"]
+    fetch_texts_async(urls, use_cache=False)
+    assert mock_extract.call_args.args[0] == HTML_BODY[:20]
+    assert pop_download_sizes(urls) == {urls[0]: 20, urls[1]: 0}
+
+def test_fetch_texts_async_deadline_reports_stragglers(local_server, mocker):
+    from modules.extractor import pop_fetch_latencies
+    mocker.patch('trafilatura.extract', return_value=EXPECTED_TEXT)
+    urls = [f"{local_server}/fast", f"{local_server}/hang"]
+    started = time.monotonic()
+    results = {url: (text, err) for url, text, err in fetch_texts_async(urls, use_cache=False, deadline_seconds=0.4)}
+    assert time.monotonic() - started < 0.9
+    assert results[urls[0]] == (EXPECTED_TEXT, None)
+    assert results[urls[1]][0] is None and results[urls[1]][1].startswith("Fetch-Deadline überschritten")
+    assert urls[0] in pop_fetch_latencies(urls)
+
+def test_fetch_texts_async_deadline_releases_circuit_trial(local_server, mocker):
+    """Ein per Deadline abgebrochener Probeaufruf (half_open) darf den Host nicht dauerhaft sperren."""
+    import modules.resilience as resilience
+    breaker = resilience.CircuitBreaker(failure_threshold=1, cooldown_seconds=0)
+    mocker.patch.object(resilience, '_circuit_breaker', breaker)
+    breaker.record_failure("127.0.0.1") # open, nach 0s Abkühlzeit half_open
+    url = f"{local_server}/hang"
+    results = fetch_texts_async([url], use_cache=False, deadline_seconds=0.3)
+    assert results[0][2].startswith("Fetch-Deadline überschritten")
+    assert not breaker._circuits["127.0.0.1"].trial_in_flight
+    breaker.before_call("127.0.0.1") # neuer Probeaufruf möglich
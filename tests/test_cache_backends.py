@@ -0,0 +1,127 @@
+# SEO-GAP-ANALYSIS/tests/test_cache_backends.py
+import sys
+import os
+import time
+import threading
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+from cache_backends import get_cache_backend, CacheBackend, SQLiteCacheBackend, SQLITE_FILENAME
+from cache_utils import (
+    get_cache_path, save_to_cache, load_from_cache, is_cache_valid, touch_cache, cache_exists, clear_all_cache,
+    load_many_from_cache, save_many_to_cache, save_raw_html, load_raw_html, migrate_cache_to_sqlite, collect_garbage, cache_statistics
+)
+
+@pytest.fixture
+def sqlite_cache(tmp_path, mocker):
+    mocker.patch.object(config, 'CACHE_DIR', str(tmp_path))
+    mocker.patch.object(config, 'CACHE_BACKEND', 'sqlite')
+    return get_cache_backend()
+
+def test_cache_backend_requires_all_storage_methods():
+    class IncompleteBackend(CacheBackend):
+        def read(self, cache_file): return None
+    with pytest.raises(TypeError): IncompleteBackend()
+
+def test_sqlite_backend_roundtrip_ttl_and_touch(sqlite_cache, tmp_path):
+    cache_file = get_cache_path("text_v2", "abc")
+    save_to_cache(["Text", None], cache_file)
+    assert isinstance(sqlite_cache, SQLiteCacheBackend) and not os.path.exists(cache_file) # keine Einzeldatei
+    assert load_from_cache(cache_file) == ["Text", None] and cache_exists(cache_file) and is_cache_valid(cache_file)
+    conn = sqlite_cache._connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    old = time.time() - config.MAX_CACHE_AGE_SECONDS - 60
+    conn.execute("UPDATE entries SET stored_at = ?", (old,)); conn.commit()
+    assert load_from_cache(cache_file) is None and load_from_cache(cache_file, allow_expired=True) == ["Text", None]
+    assert touch_cache(cache_file) and load_from_cache(cache_file) == ["Text", None]
+    clear_all_cache()
+    assert not cache_exists(cache_file) and os.path.exists(tmp_path / SQLITE_FILENAME)
+
+def test_sqlite_backend_batched_and_raw(sqlite_cache):
+    items = {get_cache_path("text_v2", f"k{i}"): [f"Text {i}", None] for i in range(1200)}
+    save_many_to_cache(items)
+    loaded = load_many_from_cache(list(items) + [get_cache_path("text_v2", "fehlt")])
+    assert loaded == items
+    save_raw_html("https://example.com/", b"<html>x</html>", {"content_hash": "h"})
+    assert load_raw_html("https://example.com/") == (b"<html>x</html>", {"url": "https://example.com/", "content_hash": "h"})
+    serp_file = get_cache_path("serp_v2", "x")
+    assert sqlite_cache.cache_type_of(os.path.basename(serp_file)) == "serp_v2"
+
+def test_sqlite_backend_concurrent_writers(sqlite_cache):
+    def writer(n):
+        for i in range(50): save_to_cache({"n": n, "i": i}, get_cache_path("serp_v2", f"{n}_{i}"))
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert sum(1 for _ in sqlite_cache.entries()) == 400
+
+def test_migrate_file_cache_to_sqlite(tmp_path, mocker):
+    mocker.patch.object(config, 'CACHE_DIR', str(tmp_path))
+    text_file = get_cache_path("text_v2", "alt"); neg_file = get_cache_path("text_v2", "neg")
+    save_to_cache(["Alter Text", None], text_file); save_to_cache([None, "404", {"error_class": "client_error"}], neg_file)
+    old = time.time() - 3600; os.utime(text_file, (old, old))
+    stats = migrate_cache_to_sqlite(batch_size=1, remove_files=True)
+    assert stats == {"migrated": 2, "bytes": stats["bytes"], "failed": 0} and not os.path.exists(text_file)
+    mocker.patch.object(config, 'CACHE_BACKEND', 'sqlite')
+    assert load_from_cache(text_file) == ["Alter Text", None]
+    assert abs(get_cache_backend().stored_at(text_file) - old) < 1 # Alter bleibt erhalten
+    expires = get_cache_backend()._connection().execute("SELECT expires_at - stored_at FROM entries WHERE key = ?", (os.path.basename(neg_file),)).fetchone()[0]
+    assert expires == config.NEGATIVE_CACHE_TTL_LONG
+
+def set_entry_times(backend, cache_file, stored_at, accessed_at):
+    if isinstance(backend, SQLiteCacheBackend):
+        conn = backend._connection()
+        conn.execute("UPDATE entries SET stored_at = ?, expires_at = ? + ?, accessed_at = ? WHERE key = ?",
+                     (stored_at, stored_at, config.MAX_CACHE_AGE_SECONDS, accessed_at, os.path.basename(cache_file))); conn.commit()
+    else: os.utime(cache_file, (accessed_at, stored_at))
+
+@pytest.mark.parametrize("backend_kind", ["file", "sqlite"])
+def test_gc_removes_expired_first_then_least_recently_used(backend_kind, tmp_path, mocker):
+    mocker.patch.object(config, 'CACHE_DIR', str(tmp_path)); mocker.patch.object(config, 'CACHE_BACKEND', backend_kind)
+    backend = get_cache_backend(); now = time.time()
+    files = {name: get_cache_path("text_v2", name) for name in ("alt", "b", "c", "d")}
+    for name, cache_file in files.items(): save_to_cache([f"Text {name}" * 50, None], cache_file)
+    set_entry_times(backend, files["alt"], now - config.MAX_CACHE_AGE_SECONDS - 60, now) # abgelaufen, aber gerade gelesen
+    for name, accessed in (("b", now - 300), ("c", now - 200), ("d", now - 100)): set_entry_times(backend, files[name], now - 400, accessed)
+    load_from_cache(files["b"]); backend.flush_access() # b ist jetzt zuletzt gelesen, c am längsten nicht
+    sizes = {os.path.basename(info.name): info.size for info in backend.entries()}
+    stats = collect_garbage(max_bytes=int((sizes[os.path.basename(files["b"])] + sizes[os.path.basename(files["d"])]) / 0.9) + 1)
+    assert stats["expired_removed"] == 1 and stats["lru_removed"] == 1
+    assert [name for name, cache_file in files.items() if cache_exists(cache_file)] == ["b", "d"]
+    assert stats["bytes_after"] == sum(info.size for info in backend.entries())
+
+@pytest.mark.parametrize("backend_kind", ["file", "sqlite"])
+def test_gc_keeps_content_addressed_entries_past_ttl(backend_kind, tmp_path, mocker):
+    """content_v1/nlp_v1 werden mit allow_expired gelesen; die GC darf sie nicht als abgelaufen löschen, nur per LRU."""
+    mocker.patch.object(config, 'CACHE_DIR', str(tmp_path)); mocker.patch.object(config, 'CACHE_BACKEND', backend_kind)
+    backend = get_cache_backend(); old = time.time() - config.MAX_CACHE_AGE_SECONDS - 60
+    files = {kind: get_cache_path(kind, "h") for kind in ("text_v2", "content_v1", "nlp_v1")}
+    for kind, cache_file in files.items(): save_to_cache({"kind": kind}, cache_file); set_entry_times(backend, cache_file, old, old)
+    stats = collect_garbage(max_bytes=0)
+    assert stats["expired_removed"] == 1 and [kind for kind, cache_file in files.items() if cache_exists(cache_file)] == ["content_v1", "nlp_v1"]
+    stats = collect_garbage(max_bytes=1) # über dem Limit: per LRU verdrängt
+    assert stats["lru_removed"] == 2
+
+def test_cache_statistics_per_type(sqlite_cache):
+    now = time.time()
+    save_to_cache({"organic_results": []}, get_cache_path("serp_v2", "q"))
+    for i, age in enumerate((60, 2 * 86400, config.MAX_CACHE_AGE_SECONDS + 60)):
+        cache_file = get_cache_path("text_v2", f"t{i}"); save_to_cache(["Text", None], cache_file)
+        set_entry_times(sqlite_cache, cache_file, now - age, now - age)
+    stats = cache_statistics()
+    assert list(stats) == ["serp_v2", "text_v2"]
+    assert stats["serp_v2"]["entries"] == 1 and stats["serp_v2"]["ages"]["<1h"] == 1
+    assert stats["text_v2"]["entries"] == 3 and stats["text_v2"]["expired"] == 1 and stats["text_v2"]["bytes"] > 0
+    assert stats["text_v2"]["ages"]["<1h"] == 1 and stats["text_v2"]["ages"]["<7d"] == 1
+
+def test_sqlite_schema_upgrade_adds_access_time(tmp_path):
+    import sqlite3
+    db_path = str(tmp_path / SQLITE_FILENAME)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE entries (key TEXT PRIMARY KEY, cache_type TEXT NOT NULL, value BLOB NOT NULL, "
+                     "stored_at REAL NOT NULL, expires_at REAL NOT NULL, size INTEGER NOT NULL)")
+        conn.execute("INSERT INTO entries VALUES ('text_v2_x.json', 'text_v2', x'00', 100.0, 200.0, 1)")
+    backend = SQLiteCacheBackend(db_path)
+    assert [tuple(info) for info in backend.entries()] == [("text_v2_x.json", 1, 100.0, 100.0, 200.0)]
@@ -2,6 +2,7 @@
 import sys
 import os
 import time
+import json
 import pytest
 import hashlib
 
@@ -108,4 +109,136 @@ def test_is_cache_valid(tmp_path, mocker):
     remove_file_if_exists(cache_file)
     assert is_cache_valid(cache_file) is False
 
-    config.CACHE_DIR = original_cache_dir
\ No newline at end of file
+    config.CACHE_DIR = original_cache_dir
+
+def test_load_expired_and_touch_cache(tmp_path, mocker):
+    """Abgelaufene Einträge nur mit allow_expired laden; touch_cache erneuert die TTL."""
+    from cache_utils import touch_cache
+    original_cache_dir = config.CACHE_DIR
+    config.CACHE_DIR = str(tmp_path)
+    cache_file = get_cache_path("test_touch", "mykey", "json")
+    save_to_cache(["text", None], cache_file)
+    old = time.time() - config.MAX_CACHE_AGE_SECONDS - 60
+    os.utime(cache_file, (old, old))
+
+    assert load_from_cache(cache_file) is None
+    assert load_from_cache(cache_file, allow_expired=True) == ["text", None]
+    assert touch_cache(cache_file) is True
+    assert load_from_cache(cache_file) == ["text", None]
+    assert touch_cache(str(tmp_path / "fehlt.json")) is False
+
+    config.CACHE_DIR = original_cache_dir
+
+def test_raw_html_cache_roundtrip(tmp_path):
+    from cache_utils import normalize_url, save_raw_html, load_raw_html, get_raw_cache_file
+    original_cache_dir = config.CACHE_DIR
+    config.CACHE_DIR = str(tmp_path)
+    assert normalize_url("HTTPS://Example.COM:443/Pfad?a=1#x") == "https://example.com/Pfad?a=1"
+    assert normalize_url("http://example.com") == "http://example.com/"
+    html = b"<html><body>" + b"inhalt " * 1000 + b"</body></html>"
+    save_raw_html("https://example.com/seite", html, {"content_type": "text/html", "content_hash": "abc"})
+    assert os.path.getsize(get_raw_cache_file("https://example.com/seite")) < len(html) # komprimiert
+    content, meta = load_raw_html("https://EXAMPLE.com/seite#top")
+    assert content == html and meta["content_hash"] == "abc" and meta["url"] == "https://example.com/seite"
+    assert load_raw_html("https://example.com/andere") is None
+    config.CACHE_DIR = original_cache_dir
+
+def test_cache_entry_ttl_by_error_class(tmp_path, mocker):
+    from cache_utils import cache_entry_ttl
+    mocker.patch.object(config, 'NEGATIVE_CACHE_TTL_SHORT', 100)
+    mocker.patch.object(config, 'NEGATIVE_CACHE_TTL_LONG', 10 * config.MAX_CACHE_AGE_SECONDS)
+    assert cache_entry_ttl([None, "Timeout", {"error_class": "timeout"}]) == 100
+    assert cache_entry_ttl([None, "404", {"error_class": "client_error"}]) == 10 * config.MAX_CACHE_AGE_SECONDS
+    assert cache_entry_ttl(["text", None, {"etag": "x"}]) == config.MAX_CACHE_AGE_SECONDS
+    assert cache_entry_ttl([None, "alt"]) == config.MAX_CACHE_AGE_SECONDS
+
+    cache_file = str(tmp_path / "text_v2_neg.json")
+    save_to_cache([None, "404", {"error_class": "client_error"}], cache_file)
+    old = time.time() - config.MAX_CACHE_AGE_SECONDS - 60
+    os.utime(cache_file, (old, old))
+    assert load_from_cache(cache_file) == [None, "404", {"error_class": "client_error"}] # lange TTL überdauert MAX_CACHE_AGE
+
+def test_canonicalize_url_strips_tracking_and_variants(mocker):
+    from cache_utils import canonicalize_url
+    mocker.patch.object(config, 'URL_STRIP_PARAMS', ["utm_*", "gclid"])
+    mocker.patch.object(config, 'URL_STRIP_WWW', True); mocker.patch.object(config, 'URL_STRIP_TRAILING_SLASH', True)
+    canonical = "https://example.com/Ratgeber?b=2&seite=1"
+    for variant in ("https://www.example.com/Ratgeber/?seite=1&utm_source=x&b=2#abschnitt", "HTTPS://Example.com:443/Ratgeber?b=2&gclid=abc&seite=1&UTM_Medium=y"):
+        assert canonicalize_url(variant) == canonical
+    assert canonicalize_url("https://example.com/ratgeber") != canonical # Pfad bleibt case-sensitiv
+    assert canonicalize_url("https://www.example.com") == "https://example.com/"
+    mocker.patch.object(config, 'URL_STRIP_WWW', False)
+    assert canonicalize_url("https://www.example.com/a/") == "https://www.example.com/a"
+
+def test_canonicalize_url_keeps_www_and_trailing_slash_by_default():
+    """www. und Slash am Ende sind opt-in: andere Hosts bzw. Pfade, Cache-Schlüssel einfacher URLs bleiben wie bisher."""
+    from cache_utils import canonicalize_url
+    assert not config.URL_STRIP_WWW and not config.URL_STRIP_TRAILING_SLASH
+    assert canonicalize_url("https://www.example.com/a/") == "https://www.example.com/a/" != canonicalize_url("https://example.com/a")
+    assert canonicalize_url("https://example.com/a/?utm_source=x#top") == "https://example.com/a/"
+
+def test_compressed_cache_format_and_legacy_entries(tmp_path, mocker):
+    import cache_utils
+    from cache_utils import CACHE_FORMAT_MAGIC, CODEC_GZIP, cache_codec
+    mocker.patch.object(config, 'CACHE_COMPRESSION', 'gzip')
+    data = ["Ein langer Wettbewerbertext. " * 200, None, {"content_hash": "abc"}]
+    cache_file = str(tmp_path / "text_v2_neu.json")
+    save_to_cache(data, cache_file)
+    with open(cache_file, 'rb') as f: payload = f.read()
+    assert payload[:5] == CACHE_FORMAT_MAGIC + bytes([1, CODEC_GZIP]) and len(payload) < len(json.dumps(data)) / 10
+    assert load_from_cache(cache_file) == data
+
+    legacy_file = str(tmp_path / "text_v2_alt.json") # altes Format: JSON mit indent=4
+    with open(legacy_file, 'w', encoding='utf-8') as f: json.dump(["Alter Text", None], f, ensure_ascii=False, indent=4)
+    assert load_from_cache(legacy_file) == ["Alter Text", None]
+
+    mocker.patch.object(cache_utils, 'zstandard', None); mocker.patch.object(config, 'CACHE_COMPRESSION', 'zstd')
+    assert cache_codec() == CODEC_GZIP # Fallback ohne zstandard
+    future_file = str(tmp_path / "text_v2_zukunft.json")
+    with open(future_file, 'wb') as f: f.write(CACHE_FORMAT_MAGIC + bytes([99, CODEC_GZIP]) + b"x")
+    assert load_from_cache(future_file) is None
+
+def test_memory_tier_lru_ttl_and_invalidation(tmp_path, mocker):
+    from cache_utils import get_memory_tier, get_cache_tier_stats, clear_all_cache
+    mocker.patch.object(config, 'CACHE_DIR', str(tmp_path)); mocker.patch.object(config, 'CACHE_COMPRESSION', 'none')
+    mocker.patch.object(config, 'MEMORY_CACHE_BYTES', 300)
+    files = [str(tmp_path / f"text_v2_{i}.json") for i in range(3)]
+    for i, cache_file in enumerate(files): save_to_cache([f"Text {i} " + "x" * 100, None], cache_file)
+    tier = get_memory_tier()
+    assert tier.stats()["bytes"] <= 300 and tier.get(files[0]) is None # ältester Eintrag verdrängt
+    before = get_cache_tier_stats()
+    os.remove(files[2]) # Speicher-Stufe beantwortet ohne Platte
+    data = load_from_cache(files[2]); data[0] = "verändert"
+    assert load_from_cache(files[2])[0].startswith("Text 2") # Kopie, Cache bleibt unverändert
+    assert load_from_cache(files[0])[0].startswith("Text 0") # Platte, danach wieder im Speicher
+    after = get_cache_tier_stats()
+    assert after["memory_hits"] - before["memory_hits"] == 2 and after["disk_hits"] - before["disk_hits"] == 1
+
+    tier.touch(files[0], time.time() - config.MAX_CACHE_AGE_SECONDS - 60) # TTL wie auf der Platte
+    assert load_from_cache(files[0]) is None and load_from_cache(files[0], allow_expired=True) is not None
+
+    save_to_cache(["Text", None], files[1]); clear_all_cache()
+    assert load_from_cache(files[1]) is None and tier.stats()["entries"] == 0
+
+def test_memory_tier_charges_uncompressed_size_and_batches_access(tmp_path, mocker):
+    import copy
+    import json
+    from cache_backends import ACCESS_FLUSH_THRESHOLD
+    from cache_utils import get_memory_tier, get_cache_backend, flush_memory_access, cache_exists
+    mocker.patch.object(config, 'CACHE_DIR', str(tmp_path)); mocker.patch.object(config, 'CACHE_COMPRESSION', 'gzip')
+    mocker.patch.object(config, 'MEMORY_CACHE_BYTES', 10**6)
+    data = ["Text " * 500, None]; cache_file = str(tmp_path / "text_v2_gross.json")
+    save_to_cache(data, cache_file); tier = get_memory_tier()
+    assert tier.stats()["bytes"] == len(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()) > os.path.getsize(cache_file)
+    tier.clear(); load_from_cache(cache_file) # von der Platte geladen: ebenfalls unkomprimierte Größe
+    assert tier.stats()["bytes"] > os.path.getsize(cache_file)
+
+    deepcopy = mocker.spy(copy, 'deepcopy')
+    assert is_cache_valid(cache_file) and cache_exists(cache_file)
+    deepcopy.assert_not_called() # Existenz-/Alterprüfungen ohne Kopie
+
+    record = mocker.spy(get_cache_backend(), 'record_access_many')
+    for _ in range(ACCESS_FLUSH_THRESHOLD - 1): load_from_cache(cache_file)
+    record.assert_not_called() # Treffer der Speicher-Stufe werden gesammelt
+    flush_memory_access()
+    assert list(record.call_args.args[0]) == [cache_file]
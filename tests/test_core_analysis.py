@@ -1,7 +1,10 @@
 # SEO-GAP-ANALYSIS/tests/test_core_analysis.py
 import sys
 import os
+import threading
+import time
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 import pandas as pd
 
@@ -12,6 +15,15 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from core_analysis import sanitize_filename, run_analysis, validate_openai_key
 # Importiere auch config für Tests
 import config
+from modules.run_context import submit_in_context
+
+@pytest.fixture(autouse=True)
+def isolated_skip_list(tmp_path, mocker):
+    """Jeder Test mit eigener, leerer Skip-Liste (keine gelernten Daten aus output/)."""
+    from modules.skip_list import OutcomeStore
+    store = OutcomeStore(str(tmp_path / "skip_list.json"))
+    mocker.patch('core_analysis.get_outcome_store', return_value=store)
+    return store
 
 # --- Tests für sanitize_filename ---
 @pytest.mark.parametrize("input_string, expected_output", [
@@ -139,4 +151,256 @@ def test_run_analysis_fetch_fail(mock_fetch, mock_setup):
     mock_setup.assert_called_once()
     mock_fetch.assert_called_once()
 
-# TODO: Weitere Tests für run_analysis (Fehler in _perform, _generate, _save etc.) hinzufügen.
\ No newline at end of file
+@patch('core_analysis._setup_analysis', return_value=MagicMock())
+@patch('core_analysis._fetch_data')
+@patch('core_analysis._generate_additional_outputs', return_value=(None, None))
+@patch('core_analysis._save_results', return_value={})
+@patch('core_analysis._perform_core_analysis', return_value=(pd.DataFrame({"url": ["url1"]}), {"overall_top_terms_with_scores": []}))
+def test_parallel_runs_report_only_their_own_counters(mock_perform, mock_save, mock_generate, mock_fetch, mock_setup, tmp_path, mocker):
+    """Gleichzeitige Läufe (z.B. Flask-Requests) zählen getrennt, auch was ihre Worker-Threads zählen."""
+    from modules.extractor import record_fetch_event
+    mocker.patch.object(config, 'OUTPUT_DIR', str(tmp_path)); barrier = threading.Barrier(2)
+    def fake_fetch(query, *args, **kwargs):
+        requests = {"a": 2, "b": 5}[query]
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            for future in [submit_in_context(pool, record_fetch_event, "requests") for _ in range(requests)]: future.result()
+        record_fetch_event("text_cache_hits"); barrier.wait() # beide Läufe haben gezählt, bevor einer auswertet
+        return ["eins"], ["url1"], [], []
+    mock_fetch.side_effect = fake_fetch; results = {}
+    def run(query): results[query] = run_analysis(query=query)
+    threads = [threading.Thread(target=run, args=(query,)) for query in ("a", "b")]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert results["a"]["fetch_stats"]["connection_pool"]["requests"] == 2
+    assert results["b"]["fetch_stats"]["connection_pool"]["requests"] == 5
+    assert results["a"]["fetch_stats"]["text_cache"]["hits"] == 1 and results["b"]["fetch_stats"]["text_cache"]["hits"] == 1
+
+# TODO: Weitere Tests für run_analysis (Fehler in _perform, _generate, _save etc.) hinzufügen.
+
+# --- Tests für die Download-Engines in _fetch_data ---
+from core_analysis import _fetch_data
+
+SERP_OK = {"organic_results": [{"title": "A", "url": "https://a.example"}, {"title": "B", "url": "https://b.example"}], "related_questions": ["Frage?"], "error": None}
+
+@patch('core_analysis.get_serp_results', return_value=SERP_OK)
+@patch('core_analysis.fetch_texts_async')
+def test_fetch_data_async_engine(mock_async, mock_serp):
+    """Die async-Engine liefert denselben (texts, urls, failed, related_questions)-Vertrag."""
+    def fake_async(urls, use_cache, extract_workers, on_result, **kwargs):
+        results = [("https://b.example", None, "HTTP Client Fehler 404 (Not Found)"), ("https://a.example", "Text A", None)]
+        for result in results: on_result(result)
+        return results
+    mock_async.side_effect = fake_async
+    texts, urls, failed, questions = _fetch_data("q", 2, "de", True, 3, engine="async")
+    assert texts == ["Text A"] and urls == ["https://a.example"]
+    assert failed == [("https://b.example", "HTTP Client Fehler 404 (Not Found)")]
+    assert questions == ["Frage?"]
+    assert mock_async.call_args.kwargs["extract_workers"] == 3
+
+@patch('core_analysis.get_serp_results', return_value=SERP_OK)
+@patch('core_analysis.extract_text_from_url', side_effect=lambda url, use_cache, cache_hits=None: ("Text", None) if "a." in url else (None, "Fehler"))
+def test_fetch_data_thread_engine(mock_extract, mock_serp):
+    texts, urls, failed, questions = _fetch_data("q", 2, "de", True, 2)
+    assert texts == ["Text"] and urls == ["https://a.example"]
+    assert failed == [("https://b.example", "Fehler")]
+
+@patch('core_analysis.get_serp_results')
+@patch('core_analysis.extract_text_from_url', side_effect=lambda url, use_cache, cache_hits=None: (f"Text {url}", None))
+def test_fetch_data_dedupes_canonical_urls_within_and_across_keywords(mock_extract, mock_serp, mocker):
+    from modules.extractor import get_url_dedup_stats
+    mocker.patch.object(config, 'URL_STRIP_WWW', True); mocker.patch.object(config, 'URL_STRIP_TRAILING_SLASH', True)
+    mock_serp.return_value = {"organic_results": [{"url": "https://a.example/seite"}, {"url": "https://www.a.example/seite/?utm_source=x"}, {"url": "https://b.example/"}], "related_questions": [], "error": None}
+    before = get_url_dedup_stats(); memo = {}
+    texts, urls, failed, _ = _fetch_data("q1", 3, "de", False, 2, fetch_memo=memo)
+    assert sorted(urls) == ["https://a.example/seite", "https://b.example/"] and mock_extract.call_count == 2
+    mock_serp.return_value = {"organic_results": [{"url": "https://b.example/#top"}, {"url": "https://c.example/"}], "related_questions": [], "error": None}
+    texts, urls, failed, _ = _fetch_data("q2", 2, "de", False, 2, fetch_memo=memo)
+    assert sorted(urls) == ["https://b.example/#top", "https://c.example/"] and mock_extract.call_count == 3 # b.example aus dem Memo
+    after = get_url_dedup_stats()
+    assert after["duplicates"] - before["duplicates"] == 1 and after["batch_reused"] - before["batch_reused"] == 1
+    assert after["saved_requests"] - before["saved_requests"] == 2
+
+@patch('core_analysis.get_serp_results')
+@patch('core_analysis.extract_text_from_url', side_effect=lambda url, use_cache, cache_hits=None: (None, "Inhaltstyp nicht HTML") if url.endswith(".pdf") else ("Text", None))
+def test_fetch_data_skips_learned_targets_and_refills(mock_extract, mock_serp, isolated_skip_list, mocker):
+    mocker.patch.object(config, 'SKIP_MIN_ATTEMPTS', 2); mocker.patch.object(config, 'SKIP_REFILL_FROM_SERP', True)
+    for i in range(2): isolated_skip_list.record(f"https://docs.example/datei{i}.pdf", False)
+    mock_serp.side_effect = lambda query, num_results, use_cache, language: {"organic_results": [
+        {"url": "https://docs.example/handbuch.pdf"}, {"url": "https://a.example/"}, {"url": "https://b.example/"}][:num_results], "related_questions": [], "error": None}
+    skipped = []
+    texts, urls, failed, _ = _fetch_data("q", 2, "de", False, 2, skipped_urls=skipped)
+    assert [url for url, _ in skipped] == ["https://docs.example/handbuch.pdf"] and failed == []
+    assert sorted(urls) == ["https://a.example/", "https://b.example/"] # b.example über zusätzliche SERP-Ergebnisse nachgefüllt
+    assert mock_serp.call_args.kwargs["num_results"] == 3
+    assert isolated_skip_list.success_rate("https://a.example/")[0] == 1.0
+
+
+@pytest.mark.parametrize("engine, extract_workers", [("thread", 0), ("thread", 1), ("async", 0)])
+def test_fetch_data_does_not_learn_from_cache_hits(engine, extract_workers, isolated_skip_list, tmp_path, mocker):
+    """Gecachte Ergebnisse (auch gecachte Fehler) sind keine Abrufe und zählen nicht für die Skip-Liste."""
+    import httpx
+    from modules.extractor import cache_extraction_failure, DownloadResult
+    mocker.patch.object(config, 'CACHE_DIR', str(tmp_path)); mocker.patch('core_analysis.get_serp_results', return_value=SERP_OK)
+    mocker.patch('core_analysis.get_extraction_pool', return_value=MagicMock() if extract_workers else None)
+    cache_extraction_failure("https://b.example", "HTTP Client Fehler 404 (N/A)", True, "client_error")
+    gone = DownloadResult(None, "", "HTTP Client Fehler 410 (N/A)")
+    mocker.patch('modules.extractor.download_url_content', return_value=gone); mocker.patch('core_analysis.download_url_content', return_value=gone)
+    mocker.patch('modules.async_fetcher._fetch_url_content_async', side_effect=httpx.HTTPStatusError(
+        "Gone", request=httpx.Request("GET", "https://a.example"), response=httpx.Response(410)))
+    record = mocker.spy(isolated_skip_list, "record")
+    texts, urls, failed, _ = _fetch_data("q", 2, "de", True, 2, engine=engine, extract_workers=extract_workers)
+    assert len(failed) == 2 and [call.args for call in record.call_args_list] == [("https://a.example", False)]
+
+from modules.extractor import DownloadResult
+HTML_PAGE = "<html><body><article><h1>Titel</h1>" + "<p>" + "Ein ausreichend langer Absatz mit Inhalt für die Extraktion. " * 10 + "</p></article></body></html>"
+
+@patch('core_analysis.get_serp_results', return_value=SERP_OK)
+@patch('core_analysis.download_url_content')
+def test_fetch_data_process_pool_stage(mock_download, mock_serp):
+    """Download in Threads, Trafilatura im Prozesspool (echte Extraktion im Kindprozess)."""
+    mock_download.side_effect = lambda url, use_cache, stale: DownloadResult(HTML_PAGE.encode("utf-8"), "text/html", None) if "a." in url else DownloadResult(None, "", "HTTP Client Fehler 404 (N/A)")
+    texts, urls, failed, questions = _fetch_data("q", 2, "de", False, 2, extract_workers=1)
+    assert urls == ["https://a.example"]
+    assert "ausreichend langer Absatz" in texts[0]
+    assert failed == [("https://b.example", "HTTP Client Fehler 404 (N/A)")]
+
+@patch('core_analysis.get_serp_results')
+@patch('core_analysis.download_url_content')
+def test_staged_downloads_respect_domain_limit(mock_download, mock_serp, mocker):
+    """Auch mit Prozesspool laufen Downloads über den DomainScheduler (höchstens DOMAIN_MAX_CONCURRENCY pro Domain)."""
+    mocker.patch.object(config, 'DOMAIN_INITIAL_CONCURRENCY', 1); mocker.patch.object(config, 'DOMAIN_MAX_CONCURRENCY', 1)
+    mock_serp.return_value = {"organic_results": [{"url": f"https://a.example/{i}"} for i in range(4)], "related_questions": [], "error": None}
+    lock = threading.Lock(); running = []; peak = []
+    def download(url, use_cache, stale):
+        with lock: running.append(url); peak.append(len(running))
+        time.sleep(0.05)
+        with lock: running.remove(url)
+        return DownloadResult(HTML_PAGE.encode("utf-8"), "text/html", None)
+    mock_download.side_effect = download
+    texts, urls, failed, _ = _fetch_data("q", 4, "de", False, 4, extract_workers=1)
+    assert len(urls) == 4 and failed == [] and max(peak) == 1
+
+@patch('core_analysis.get_serp_results', return_value=SERP_OK)
+@patch('core_analysis.get_extraction_pool', return_value=MagicMock())
+def test_staged_cache_lookups_run_on_download_workers(mock_pool, mock_serp, mocker):
+    """Cache-Prüfung samt Neu-Ableitung aus dem Roh-HTML blockiert nicht den aufrufenden Thread."""
+    lookup_threads = []
+    def lookup(url):
+        lookup_threads.append(threading.current_thread()); return (f"Text {url}", None), None
+    mocker.patch('core_analysis.lookup_text_cache', side_effect=lookup)
+    texts, urls, failed, _ = _fetch_data("q", 2, "de", True, 2, extract_workers=1)
+    assert sorted(urls) == ["https://a.example", "https://b.example"] and failed == []
+    assert len(lookup_threads) == 2 and threading.current_thread() not in lookup_threads
+    mock_pool.return_value.submit.assert_not_called()
+
+
+@patch('core_analysis._setup_analysis', return_value=MagicMock())
+@patch('core_analysis._fetch_data', return_value=(["eins", "zwei"], ["url1", "url2"], [], []))
+@patch('core_analysis._generate_additional_outputs', return_value=(None, None))
+@patch('core_analysis._save_results', return_value={})
+@patch('core_analysis._perform_core_analysis')
+def test_run_analysis_reports_nlp_cache_hit_ratio(mock_perform, mock_save, mock_generate, mock_fetch, mock_setup, tmp_path, mocker):
+    """fetch_stats.nlp enthält die Spacy-Zähler dieses Laufs samt Trefferquote des NLP-Caches."""
+    import modules.tf_idf as tfidf_module
+    mocker.patch.object(config, 'OUTPUT_DIR', str(tmp_path))
+    def perform(*args, **kwargs):
+        tfidf_module._record_nlp_stats({"cache_hits": 3, "cache_misses": 1, "docs": 1, "seconds_tagger": 0.5})
+        return pd.DataFrame({"url": ["url1"]}), {"overall_top_terms_with_scores": []}
+    mock_perform.side_effect = perform
+    result = run_analysis(query="q", stream_preprocessing=False)
+    nlp_stats = result["fetch_stats"]["nlp"]
+    assert nlp_stats["cache_hits"] == 3 and nlp_stats["docs"] == 1 and nlp_stats["cache_hit_ratio"] == 0.75 and nlp_stats["seconds_tagger"] == 0.5
+
+# --- Tests für die Streaming-Vorverarbeitung ---
+@patch('core_analysis._setup_analysis', return_value=MagicMock())
+@patch('core_analysis._fetch_data')
+@patch('core_analysis._perform_core_analysis', return_value=(None, {"error": "abbruch nach vorverarbeitung"}))
+@patch('core_analysis.tfidf_module.analyze_texts', side_effect=lambda texts, nlp, include_ner=False, **kwargs: [(f"pre:{text}", None) for text in texts])
+def test_run_analysis_streams_preprocessing(mock_preprocess, mock_perform, mock_fetch, mock_setup):
+    """Texte werden bereits während _fetch_data vorverarbeitet und in URL-Reihenfolge weitergegeben."""
+    def fake_fetch(*args, on_text=None, **kwargs):
+        on_text("url2", "zwei"); on_text("url1", "eins")
+        return ["zwei", "eins"], ["url2", "url1"], [], []
+    mock_fetch.side_effect = fake_fetch
+    run_analysis(query="q", stream_preprocessing=True)
+    assert sorted(text for call in mock_preprocess.call_args_list for text in call.args[0]) == ["eins", "zwei"] # jeder Text genau einmal
+    assert mock_perform.call_args.kwargs["preprocessed_texts"] == ["pre:zwei", "pre:eins"]
+    assert mock_perform.call_args.kwargs["preprocessed_entities"] is None # ohne NER keine Entitäten
+
+@patch('core_analysis._setup_analysis', return_value=MagicMock())
+@patch('core_analysis._fetch_data')
+@patch('core_analysis._perform_core_analysis', return_value=(None, {"error": "abbruch"}))
+@patch('core_analysis.tfidf_module.analyze_texts', side_effect=lambda texts, nlp, include_ner=False, **kwargs: [(f"pre:{text}", [(text, "ORG", 1)]) for text in texts])
+def test_run_analysis_streams_entities_from_same_pass(mock_analyze, mock_perform, mock_fetch, mock_setup):
+    """Mit NER liefert derselbe Spacy-Durchlauf Lemmata und Entitäten; keine zweite Verarbeitung in der Analyse."""
+    def fake_fetch(*args, on_text=None, **kwargs):
+        on_text("url1", "eins"); on_text("url2", "eins")
+        return ["eins", "eins"], ["url1", "url2"], [], []
+    mock_fetch.side_effect = fake_fetch
+    run_analysis(query="q", include_ner=True, stream_preprocessing=True)
+    assert all(call.kwargs["include_ner"] for call in mock_analyze.call_args_list) and sum(len(call.args[0]) for call in mock_analyze.call_args_list) == 1
+    args = mock_perform.call_args
+    assert args.kwargs["preprocessed_texts"] == ["pre:eins", "pre:eins"] and args.kwargs["preprocessed_entities"] == [[("eins", "ORG", 1)]] * 2
+
+@patch('core_analysis._setup_analysis', return_value=MagicMock())
+@patch('core_analysis._fetch_data', return_value=(["eins"], ["url1"], [], []))
+@patch('core_analysis._perform_core_analysis', return_value=(None, {"error": "abbruch"}))
+def test_run_analysis_without_streaming(mock_perform, mock_fetch, mock_setup):
+    run_analysis(query="q", stream_preprocessing=False)
+    assert mock_fetch.call_args.kwargs["on_text"] is None
+    assert mock_perform.call_args.kwargs["preprocessed_texts"] is None
+
+
+# --- Tests für die Fetch-Deadline ---
+from core_analysis import _latency_percentiles
+from modules.extractor import describe_deadline_error
+
+def test_latency_percentiles():
+    stats = _latency_percentiles([float(i) for i in range(1, 101)])
+    assert (stats["count"], stats["p50"], stats["p95"], stats["p99"], stats["max"]) == (100, 50.0, 95.0, 99.0, 100.0)
+    assert _latency_percentiles([])["p50"] is None
+
+@patch('core_analysis._setup_analysis', return_value=MagicMock())
+@patch('core_analysis._fetch_data', return_value=(["eins"], ["url1"], [("url2", describe_deadline_error(5))], []))
+@patch('core_analysis._perform_core_analysis', return_value=(None, {"error": "abbruch"}))
+def test_run_analysis_deadline_requires_min_texts(mock_perform, mock_fetch, mock_setup, mocker):
+    mocker.patch.object(config, 'FETCH_MIN_TEXTS', 2)
+    result = run_analysis(query="q", fetch_deadline_seconds=5, stream_preprocessing=False)
+    assert mock_fetch.call_args.kwargs["deadline_seconds"] == 5
+    assert result["success"] is False and "Fetch-Deadline" in result["error"]
+    assert result["fetch_stats"]["deadline"] == {"seconds": 5, "cancelled": 1}
+    mock_perform.assert_not_called()
+
+    mocker.patch.object(config, 'FETCH_MIN_TEXTS', 1) # genug Texte -> Analyse läuft weiter
+    run_analysis(query="q", fetch_deadline_seconds=5, stream_preprocessing=False)
+    mock_perform.assert_called_once()
+
+@patch('core_analysis.tfidf_module.preprocess_text')
+@patch('core_analysis._setup_analysis')
+@patch('core_analysis.get_serp_results')
+@patch('core_analysis.fetch_texts_async')
+def test_prewarm_cache_fetches_serps_and_texts_without_nlp(mock_async, mock_serp, mock_setup, mock_preprocess):
+    from core_analysis import prewarm_cache
+    serps = {
+        "eins": {"organic_results": [{"url": "https://a.example/"}, {"url": "https://b.example/x"}], "related_questions": [], "error": None},
+        "zwei": {"organic_results": [{"url": "https://a.example/?utm_source=n"}, {"url": "https://c.example/"}], "related_questions": [], "error": None},
+        "drei": {"organic_results": [], "related_questions": [], "error": "SerpApi Fehler"}
+    }
+    mock_serp.side_effect = lambda query, **kwargs: serps[query]
+    def fake_async(urls, use_cache, on_result, **kwargs):
+        for url in urls: on_result((url, None, "HTTP Client Fehler 404 (Not Found)") if "c." in url else (url, f"Text {url}", None))
+    mock_async.side_effect = fake_async
+    report = prewarm_cache(["eins", "zwei", "drei"], num_results=2, language="de", serp_workers=3, max_connections=50, per_host_limit=2, extract_workers=0)
+    assert sorted(mock_async.call_args.args[0]) == ["https://a.example/", "https://b.example/x", "https://c.example/"] # a.example nur einmal
+    assert mock_async.call_args.kwargs["per_host_limit"] == 2 and mock_async.call_args.kwargs["max_connections"] == 50
+    assert report["urls"] == 3 and report["texts_ok"] == 2 and report["serp_failed"] == [("drei", "SerpApi Fehler")]
+    assert report["texts_failed"] == [("https://c.example/", "HTTP Client Fehler 404 (Not Found)")] and report["urls_per_second"] > 0
+    mock_setup.assert_not_called(); mock_preprocess.assert_not_called()
+
+@patch('core_analysis.get_serp_results', return_value={"organic_results": [], "related_questions": [], "error": "leer"})
+def test_prewarm_cache_defaults_follow_current_config(mock_serp, mocker):
+    """Standardwerte werden beim Aufruf gelesen, nicht beim Import (z.B. nach load_config_from_json)."""
+    from core_analysis import prewarm_cache
+    mocker.patch.object(config, 'RESULTS_COUNT', 7); mocker.patch.object(config, 'LANGUAGE', 'en')
+    prewarm_cache(["eins"], serp_workers=1)
+    assert mock_serp.call_args.kwargs["num_results"] == 7 and mock_serp.call_args.kwargs["language"] == "en"
@@ -0,0 +1,119 @@
+# SEO-GAP-ANALYSIS/tests/test_domain_scheduler.py
+import sys
+import os
+import time
+import asyncio
+import threading
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.domain_scheduler import AsyncDomainLimiter, DomainScheduler, registered_domain
+
+def test_registered_domain():
+    assert registered_domain("https://www.blog.example.co.uk/artikel") == "example.co.uk"
+    assert registered_domain("http://127.0.0.1:8000/seite") == "127.0.0.1"
+
+def test_scheduler_limits_in_flight_per_domain_and_round_robin():
+    urls = [f"https://a.example.com/{i}" for i in range(6)] + [f"https://b.example.org/{i}" for i in range(2)]
+    lock = threading.Lock(); in_flight = Counter(); max_in_flight = Counter(); started = []
+
+    def fetch(url):
+        domain = registered_domain(url)
+        with lock: in_flight[domain] += 1; max_in_flight[domain] = max(max_in_flight[domain], in_flight[domain]); started.append(domain)
+        time.sleep(0.02)
+        with lock: in_flight[domain] -= 1
+        return "Text", None
+
+    results = []
+    scheduler = DomainScheduler(max_workers=8, initial_limit=2, max_limit=2)
+    scheduler.run(urls, fetch, lambda url, text, err: results.append(url))
+    assert sorted(results) == sorted(urls)
+    assert max_in_flight["example.com"] <= 2 and max_in_flight["example.org"] <= 2
+    assert started[:2] == ["example.com", "example.org"] # reihum statt alle URLs einer Domain zuerst
+
+def test_scheduler_aimd_halves_on_congestion_and_grows_on_success():
+    errors = {"https://slow.example.com/1", "https://slow.example.com/2"}
+    fetch = lambda url: (None, "HTTP Client Fehler 429 (Too Many Requests)") if url in errors else ("Text", None)
+    scheduler = DomainScheduler(max_workers=1, initial_limit=4, max_limit=8)
+    scheduler.run(sorted(errors), fetch, lambda *args: None)
+    assert scheduler.stats()["example.com"]["limit"] == 1.0
+    assert scheduler.stats()["example.com"]["congestion_events"] == 2
+
+    scheduler.run([f"https://ok.example.com/{i}" for i in range(3)], fetch, lambda *args: None)
+    assert scheduler.stats()["example.com"]["limit"] > 1.0
+
+def test_scheduler_reports_exceptions_as_errors():
+    def fetch(url): raise RuntimeError("kaputt")
+    results = []
+    DomainScheduler(max_workers=2).run(["https://x.example.net/"], fetch, lambda *args: results.append(args))
+    assert results == [("https://x.example.net/", None, "Exec-Fehler: kaputt")]
+
+def test_scheduler_deadline_cancels_stragglers():
+    def fetch(url):
+        if "langsam" in url: time.sleep(1.0)
+        return "Text", None
+    results = {}
+    started = time.monotonic()
+    DomainScheduler(max_workers=4).run(
+        ["https://schnell.example.com/", "https://langsam.example.org/"], fetch,
+        lambda url, text, err: results.__setitem__(url, (text, err)), deadline_seconds=0.2
+    )
+    assert time.monotonic() - started < 0.8
+    assert results["https://schnell.example.com/"] == ("Text", None)
+    assert results["https://langsam.example.org/"][1].startswith("Fetch-Deadline überschritten")
+
+def test_scheduler_follow_up_stage_frees_domain_slot_and_completes_in_caller():
+    from concurrent.futures import ThreadPoolExecutor
+    urls = [f"https://a.example.com/{i}" for i in range(3)]; extraction = ThreadPoolExecutor(max_workers=3)
+    fetched = []; completed_in = []; results = {}
+    def fetch(url):
+        fetched.append(time.monotonic()); return extraction.submit(lambda: time.sleep(0.2) or f"Text {url}")
+    def complete(url, future):
+        completed_in.append(threading.current_thread()); return future.result(), None
+    scheduler = DomainScheduler(max_workers=4, initial_limit=1, max_limit=1)
+    scheduler.run(urls, fetch, lambda url, text, err: results.__setitem__(url, (text, err)), complete=complete)
+    extraction.shutdown()
+    assert results == {url: (f"Text {url}", None) for url in urls} and completed_in == [threading.current_thread()] * 3
+    assert fetched[-1] - fetched[0] < 0.2 # nächster Download derselben Domain wartet nicht auf die Extraktion
+
+def test_scheduler_deadline_covers_follow_up_stage():
+    from concurrent.futures import Future
+    results = {}
+    DomainScheduler(max_workers=2).run(["https://x.example.net/"], lambda url: Future(), lambda url, text, err: results.__setitem__(url, err),
+                                       deadline_seconds=0.1, complete=lambda url, future: future.result())
+    assert results["https://x.example.net/"].startswith("Fetch-Deadline überschritten")
+
+def test_async_limiter_shares_limit_across_subdomains():
+    limiter = AsyncDomainLimiter(initial_limit=2, max_limit=2); in_flight = Counter(); max_in_flight = Counter()
+
+    async def fetch(url):
+        domain = await limiter.acquire(url); in_flight[domain] += 1; max_in_flight[domain] = max(max_in_flight[domain], in_flight[domain])
+        await asyncio.sleep(0.01)
+        in_flight[domain] -= 1; limiter.release(domain); limiter.record(domain, 0.01, None)
+
+    async def main():
+        await asyncio.gather(*(fetch(f"https://{host}.example.com/{i}") for i in range(4) for host in ("www", "shop")))
+    asyncio.run(main())
+    assert max_in_flight == {"example.com": 2} # www und shop teilen sich das Limit ihrer Domain
+
+def test_async_limiter_aimd_halves_on_congestion():
+    limiter = AsyncDomainLimiter(initial_limit=4, max_limit=8)
+
+    async def main():
+        for error_msg in ("HTTP Client Fehler 429 (Too Many Requests)", "Netzwerkfehler (RequestException): ReadTimeout"):
+            domain = await limiter.acquire("https://www.example.com/"); limiter.release(domain); limiter.record(domain, 0.1, error_msg)
+        domain = await limiter.acquire("https://www.example.com/"); limiter.release(domain); limiter.record(domain, 0.1, "HTTP Client Fehler 404 (Not Found)")
+    asyncio.run(main())
+    assert limiter.stats()["example.com"]["congestion_events"] == 2 # 404 ist keine Überlast
+    assert limiter.stats()["example.com"]["limit"] == 2.0 # 4 -> 2 -> 1, danach additiv +1
+
+def test_async_limiter_cancelled_waiter_frees_its_turn():
+    limiter = AsyncDomainLimiter(initial_limit=1, max_limit=1)
+
+    async def main():
+        domain = await limiter.acquire("https://example.com/1")
+        waiting = asyncio.ensure_future(limiter.acquire("https://example.com/2")); await asyncio.sleep(0)
+        waiting.cancel(); limiter.release(domain)
+        assert await asyncio.wait_for(limiter.acquire("https://example.com/3"), 1) == "example.com"
+    asyncio.run(main())
@@ -5,13 +5,21 @@ import pytest
 import requests
 from unittest.mock import MagicMock, patch
 import tenacity # Importieren
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import config
-from modules.extractor import extract_text_from_url
+from modules.extractor import extract_text_from_url, get_http_session, get_connection_pool_stats, get_text_cache_file
 from modules.extractor import MIN_TEXT_LENGTH as EFFECTIVE_MIN_TEXT_LENGTH
-from cache_utils import get_cache_key, get_cache_path, save_to_cache, load_from_cache, clear_all_cache
+from cache_utils import get_cache_key, get_cache_path, save_to_cache, load_from_cache, clear_all_cache, is_cache_valid
+
+def cached_text_entry(cache_file):
+    """[text, error_msg] eines Text-Cache-Eintrags, Text aus dem inhaltsadressierten Speicher aufgelöst."""
+    from modules.extractor import _parse_text_cache_entry
+    return list(_parse_text_cache_entry(cache_file, load_from_cache(cache_file))[:2])
 
 # --- Testdaten und Konstanten ---
 DUMMY_HTML_CONTENT = f"<html><body><p>Main content {'X' * EFFECTIVE_MIN_TEXT_LENGTH}</p></body></html>".encode('utf-8')
@@ -38,6 +46,7 @@ def manage_test_cache(tmp_path):
 def create_mock_response(content=DUMMY_HTML_CONTENT, status_code=200, headers={'Content-Type': 'text/html'}, reason="OK", raise_for_status_effect=None):
     mock_resp = MagicMock(spec=requests.Response)
     mock_resp.content = content
+    mock_resp.iter_content.side_effect = lambda chunk_size=1, decode_unicode=False: iter([content] if content else [])
     mock_resp.status_code = status_code
     mock_resp.headers = headers
     mock_resp.reason = reason
@@ -64,7 +73,7 @@ def create_mock_response(content=DUMMY_HTML_CONTENT, status_code=200, headers={'
 def test_extract_text_success(mocker):
     expected_text = f"Main content {'X' * EFFECTIVE_MIN_TEXT_LENGTH}"
     mock_response = create_mock_response()
-    mock_get = mocker.patch('modules.extractor.requests.get', return_value=mock_response)
+    mock_get = mocker.patch('modules.extractor.requests.Session.get', return_value=mock_response)
     mock_trafilatura = mocker.patch('trafilatura.extract', return_value=expected_text)
     text, error = extract_text_from_url(URL_SUCCESS, use_cache=False)
     assert text == expected_text
@@ -75,7 +84,7 @@ def test_extract_text_success(mocker):
 
 def test_extract_text_no_content_extracted(mocker):
     mock_response = create_mock_response()
-    mock_get = mocker.patch('modules.extractor.requests.get', return_value=mock_response)
+    mock_get = mocker.patch('modules.extractor.requests.Session.get', return_value=mock_response)
     mock_trafilatura = mocker.patch('trafilatura.extract', return_value=None)
     text, error = extract_text_from_url(URL_NOEXTRACT, use_cache=False)
     assert text is None
@@ -88,7 +97,7 @@ def test_extract_text_no_content_extracted(mocker):
 def test_extract_text_too_short(mocker):
     short_text = "Too short."
     mock_response = create_mock_response(content=SHORT_HTML_CONTENT)
-    mock_get = mocker.patch('modules.extractor.requests.get', return_value=mock_response)
+    mock_get = mocker.patch('modules.extractor.requests.Session.get', return_value=mock_response)
     mock_trafilatura = mocker.patch('trafilatura.extract', return_value=short_text)
     text, error = extract_text_from_url(URL_SHORT, use_cache=False)
     assert text is None
@@ -101,7 +110,7 @@ def test_extract_text_too_short(mocker):
 
 def test_extract_text_non_html(mocker):
     mock_response = create_mock_response(content=b"%PDF-1.4...", headers={'Content-Type': 'application/pdf'})
-    mock_get = mocker.patch('modules.extractor.requests.get', return_value=mock_response)
+    mock_get = mocker.patch('modules.extractor.requests.Session.get', return_value=mock_response)
     mock_trafilatura = mocker.patch('trafilatura.extract')
     text, error = extract_text_from_url(URL_PDF, use_cache=False)
     assert text is None
@@ -111,10 +120,11 @@ def test_extract_text_non_html(mocker):
     mock_get.assert_called_once()
     mock_trafilatura.assert_not_called()
     mock_response.close.assert_called()
+    mock_response.iter_content.assert_not_called() # Abbruch nach den Headern
 
 def test_extract_text_fetch_error_after_retries(mocker):
     connection_error_instance = requests.exceptions.ConnectionError("Test Connection Error")
-    mock_get = mocker.patch('modules.extractor.requests.get', side_effect=connection_error_instance)
+    mock_get = mocker.patch('modules.extractor.requests.Session.get', side_effect=connection_error_instance)
     mock_trafilatura = mocker.patch('trafilatura.extract')
     text, error = extract_text_from_url(URL_FETCH_ERROR, use_cache=False)
     assert text is None
@@ -127,7 +137,7 @@ def test_extract_text_fetch_error_after_retries(mocker):
 def test_extract_text_server_error_retry_fail(mocker):
     """Testet 503 Server Error, der wiederholt wird, aber fehlschlägt."""
     mock_response_503 = create_mock_response(status_code=503, reason="Service Unavailable")
-    mock_get = mocker.patch('modules.extractor.requests.get', return_value=mock_response_503)
+    mock_get = mocker.patch('modules.extractor.requests.Session.get', return_value=mock_response_503)
     mock_trafilatura = mocker.patch('trafilatura.extract')
     text, error = extract_text_from_url(URL_SERVER_ERROR, use_cache=False)
     assert text is None
@@ -143,7 +153,7 @@ def test_extract_text_server_error_retry_success(mocker):
     mock_response_503 = create_mock_response(status_code=503, reason="Service Unavailable")
     mock_response_ok = create_mock_response()
     expected_text = f"Main content {'X' * EFFECTIVE_MIN_TEXT_LENGTH}"
-    mock_get = mocker.patch('modules.extractor.requests.get', side_effect=[mock_response_503, mock_response_ok])
+    mock_get = mocker.patch('modules.extractor.requests.Session.get', side_effect=[mock_response_503, mock_response_ok])
     mock_trafilatura = mocker.patch('trafilatura.extract', return_value=expected_text)
     text, error = extract_text_from_url(URL_SERVER_ERROR, use_cache=False)
     assert text == expected_text
@@ -157,7 +167,7 @@ def test_extract_text_server_error_retry_success(mocker):
 def test_extract_text_http_client_error_no_retry(mocker):
     """Testet einen 404 Fehler (Client Error), der keinen Retry auslösen soll."""
     mock_response = create_mock_response(status_code=404, reason="Not Found")
-    mock_get = mocker.patch('modules.extractor.requests.get', return_value=mock_response)
+    mock_get = mocker.patch('modules.extractor.requests.Session.get', return_value=mock_response)
     mock_trafilatura = mocker.patch('trafilatura.extract')
     text, error = extract_text_from_url(URL_404_ERROR, use_cache=False)
     assert text is None
@@ -172,7 +182,7 @@ def test_extract_text_http_client_error_no_retry(mocker):
 
 def test_extract_text_trafilatura_exception(mocker):
     mock_response = create_mock_response()
-    mock_get = mocker.patch('modules.extractor.requests.get', return_value=mock_response)
+    mock_get = mocker.patch('modules.extractor.requests.Session.get', return_value=mock_response)
     trafilatura_error = ValueError("Trafilatura internal error")
     mock_trafilatura = mocker.patch('trafilatura.extract', side_effect=trafilatura_error)
     text, error = extract_text_from_url(URL_TRAFILA_ERROR, use_cache=False)
@@ -188,22 +198,22 @@ def test_extract_text_caching(mocker, tmp_path):
     url_cache = "https://test.cache.com"
     # 1. Erster Aufruf (ohne Cache)
     mock_response1 = create_mock_response()
-    mock_get1 = mocker.patch('modules.extractor.requests.get', return_value=mock_response1)
+    mock_get1 = mocker.patch('modules.extractor.requests.Session.get', return_value=mock_response1)
     mock_trafilatura1 = mocker.patch('trafilatura.extract', return_value=expected_text)
     text1, error1 = extract_text_from_url(url_cache, use_cache=True)
     assert text1 == expected_text; assert error1 is None
     mock_get1.assert_called_once(); mock_trafilatura1.assert_called_once(); mock_response1.close.assert_called()
-    cache_key = get_cache_key("text_v2", url_cache); cache_file = get_cache_path("text_v2", cache_key, extension="json")
-    assert os.path.exists(cache_file); assert load_from_cache(cache_file) == [expected_text, None]
+    cache_file = get_text_cache_file(url_cache)
+    assert os.path.exists(cache_file); assert cached_text_entry(cache_file) == [expected_text, None]
     # 2. Zweiter Aufruf (mit Cache)
-    mock_get2 = mocker.patch('modules.extractor.requests.get')
+    mock_get2 = mocker.patch('modules.extractor.requests.Session.get')
     mock_trafilatura2 = mocker.patch('trafilatura.extract')
     text2, error2 = extract_text_from_url(url_cache, use_cache=True)
     assert text2 == expected_text; assert error2 is None
     mock_get2.assert_not_called(); mock_trafilatura2.assert_not_called()
     # 3. Aufruf mit use_cache=False (Text zu kurz)
     mock_response3 = create_mock_response(content=b"New short content")
-    mock_get3 = mocker.patch('modules.extractor.requests.get', return_value=mock_response3)
+    mock_get3 = mocker.patch('modules.extractor.requests.Session.get', return_value=mock_response3)
     mock_trafilatura3 = mocker.patch('trafilatura.extract', return_value="New Text")
     text3, error3 = extract_text_from_url(url_cache, use_cache=False)
     assert text3 is None; assert error3 is not None
@@ -215,16 +225,213 @@ def test_extract_text_caching_error(mocker, tmp_path):
     expected_error = "Inhaltstyp ist kein HTML (application/pdf)"
     # 1. Erster Aufruf (Fehler)
     mock_response_err1 = create_mock_response(content=b"%PDF...", headers={'Content-Type': 'application/pdf'})
-    mock_get_err1 = mocker.patch('modules.extractor.requests.get', return_value=mock_response_err1)
+    mock_get_err1 = mocker.patch('modules.extractor.requests.Session.get', return_value=mock_response_err1)
     mock_trafilatura_err1 = mocker.patch('trafilatura.extract')
     text_err1, error_err1 = extract_text_from_url(url_cache_err, use_cache=True)
     assert text_err1 is None; assert error_err1 == expected_error
     mock_get_err1.assert_called_once(); mock_trafilatura_err1.assert_not_called(); mock_response_err1.close.assert_called()
-    cache_key_err = get_cache_key("text_v2", url_cache_err); cache_file_err = get_cache_path("text_v2", cache_key_err, extension="json")
-    assert os.path.exists(cache_file_err); assert load_from_cache(cache_file_err) == [None, expected_error]
+    cache_file_err = get_text_cache_file(url_cache_err)
+    assert os.path.exists(cache_file_err); assert load_from_cache(cache_file_err) == [None, expected_error, {"error_class": "content_type"}]
     # 2. Zweiter Aufruf (sollte Fehler aus Cache laden)
-    mock_get_err2 = mocker.patch('modules.extractor.requests.get')
+    mock_get_err2 = mocker.patch('modules.extractor.requests.Session.get')
     mock_trafilatura_err2 = mocker.patch('trafilatura.extract')
     text_err2, error_err2 = extract_text_from_url(url_cache_err, use_cache=True)
     assert text_err2 is None; assert error_err2 == expected_error
-    mock_get_err2.assert_not_called(); mock_trafilatura_err2.assert_not_called()
\ No newline at end of file
+    mock_get_err2.assert_not_called(); mock_trafilatura_err2.assert_not_called()
+
+# --- Tests für den geteilten Verbindungspool ---
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-Alive
+    def do_GET(self):
+        body = DUMMY_HTML_CONTENT
+        self.send_response(200); self.send_header("Content-Type", "text/html"); self.send_header("Content-Length", str(len(body)))
+        self.end_headers(); self.wfile.write(body)
+    def log_message(self, *args): pass
+
+@pytest.fixture
+def local_http_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True); thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown(); server.server_close()
+
+def test_http_session_is_shared():
+    session = get_http_session()
+    assert get_http_session() is session
+    adapter = session.get_adapter("https://example.com")
+    assert adapter._pool_maxsize == config.HTTP_POOL_MAXSIZE
+    assert adapter._pool_block is True
+
+def test_connection_pool_reuses_connections(local_http_server, mocker):
+    mocker.patch('trafilatura.extract', return_value=f"Main content {'X' * EFFECTIVE_MIN_TEXT_LENGTH}")
+    before = get_connection_pool_stats()
+    for path in ("/a", "/b", "/c"):
+        text, error = extract_text_from_url(local_http_server + path, use_cache=False)
+        assert error is None
+    after = get_connection_pool_stats()
+    assert after["requests"] - before["requests"] == 3
+    assert after["connections_opened"] - before["connections_opened"] == 1
+    assert after["connections_reused"] - before["connections_reused"] == 2
+
+# --- Tests für die HTTP-Revalidierung (ETag / Last-Modified) ---
+def _make_stale(cache_file):
+    old = time.time() - config.MAX_CACHE_AGE_SECONDS - 60
+    os.utime(cache_file, (old, old))
+
+def test_extract_text_stores_validators_and_revalidates_with_304(mocker):
+    from modules.extractor import get_text_cache_stats
+    url = "https://test.revalidate.com"
+    expected_text = f"Main content {'X' * EFFECTIVE_MIN_TEXT_LENGTH}"
+    validator_headers = {'Content-Type': 'text/html', 'ETag': '"v1"', 'Last-Modified': 'Wed, 01 Oct 2025 10:00:00 GMT'}
+    mocker.patch('modules.extractor.requests.Session.get', return_value=create_mock_response(headers=validator_headers))
+    mocker.patch('trafilatura.extract', return_value=expected_text)
+    assert extract_text_from_url(url, use_cache=True) == (expected_text, None)
+    cache_file = get_text_cache_file(url)
+    meta = load_from_cache(cache_file)[2]
+    assert cached_text_entry(cache_file) == [expected_text, None]
+    assert meta["etag"] == '"v1"' and meta["last_modified"] == 'Wed, 01 Oct 2025 10:00:00 GMT' and meta["content_hash"]
+
+    from cache_utils import get_raw_cache_file
+    _make_stale(cache_file); _make_stale(get_raw_cache_file(url)) # Roh-HTML läuft gleichzeitig ab
+    before = get_text_cache_stats()
+    mock_get = mocker.patch('modules.extractor.requests.Session.get', return_value=create_mock_response(content=b"", status_code=304, headers={}))
+    mock_trafilatura = mocker.patch('trafilatura.extract')
+    assert extract_text_from_url(url, use_cache=True) == (expected_text, None)
+    sent_headers = mock_get.call_args.kwargs["headers"]
+    assert sent_headers["If-None-Match"] == '"v1"'
+    assert sent_headers["If-Modified-Since"] == 'Wed, 01 Oct 2025 10:00:00 GMT'
+    mock_trafilatura.assert_not_called()
+    assert is_cache_valid(cache_file) and is_cache_valid(get_raw_cache_file(url)) # TTL erneuert
+    after = get_text_cache_stats()
+    assert after["revalidated"] - before["revalidated"] == 1 and after["refetched"] == before["refetched"]
+
+def test_extract_text_stale_entry_refetched_on_200(mocker):
+    from modules.extractor import get_text_cache_stats
+    url = "https://test.refetch.com"
+    cache_file = get_text_cache_file(url)
+    save_to_cache(["alter Text", None, {"etag": '"v1"'}], cache_file); _make_stale(cache_file)
+    new_text = f"Neuer Inhalt {'Y' * EFFECTIVE_MIN_TEXT_LENGTH}"
+    mocker.patch('modules.extractor.requests.Session.get', return_value=create_mock_response(headers={'Content-Type': 'text/html', 'ETag': '"v2"'}))
+    mocker.patch('trafilatura.extract', return_value=new_text)
+    before = get_text_cache_stats()
+    assert extract_text_from_url(url, use_cache=True) == (new_text, None)
+    assert cached_text_entry(cache_file) == [new_text, None] and load_from_cache(cache_file)[2]["etag"] == '"v2"'
+    assert get_text_cache_stats()["refetched"] - before["refetched"] == 1
+
+def test_identical_texts_stored_once_by_content_hash(mocker, tmp_path):
+    from modules.extractor import get_text_cache_stats
+    from cache_utils import get_content_file, text_content_hash
+    mocker.patch.object(config, 'CACHE_DIR', str(tmp_path))
+    shared_text = f"Syndizierter Artikel {'Z' * EFFECTIVE_MIN_TEXT_LENGTH}"
+    mocker.patch('modules.extractor.requests.Session.get', side_effect=lambda *a, **k: create_mock_response())
+    mocker.patch('trafilatura.extract', return_value=shared_text)
+    before = get_text_cache_stats()
+    urls = ["https://original.example/artikel", "https://spiegel.example/kopie"]
+    assert [extract_text_from_url(url, use_cache=True) for url in urls] == [(shared_text, None)] * 2
+    entries = [load_from_cache(get_text_cache_file(url)) for url in urls]
+    assert entries[0][0] is None and entries[0][2]["text_hash"] == entries[1][2]["text_hash"] == text_content_hash(shared_text)
+    assert load_from_cache(get_content_file(text_content_hash(shared_text))) == shared_text
+    assert len([name for name in os.listdir(tmp_path) if name.startswith("content_v1_")]) == 1
+    assert get_text_cache_stats()["content_shared"] - before["content_shared"] == 1
+    os.remove(get_content_file(text_content_hash(shared_text))) # fehlender Inhalt: Eintrag zählt als Miss
+    mocker.patch('trafilatura.extract', return_value=shared_text + " neu")
+    assert extract_text_from_url(urls[0], use_cache=True) == (shared_text + " neu", None)
+
+# --- Tests für gestreamte, größenbegrenzte Downloads ---
+def test_download_is_streamed_and_capped(mocker):
+    from modules.extractor import get_download_stats, pop_download_sizes
+    url = "https://test.large.com"
+    mocker.patch.object(config, 'MAX_DOWNLOAD_BYTES', 100)
+    mock_response = create_mock_response()
+    mock_response.iter_content.side_effect = lambda chunk_size=1, decode_unicode=False: iter([b"a" * 60, b"b" * 60, b"c" * 60])
+    mock_get = mocker.patch('modules.extractor.requests.Session.get', return_value=mock_response)
+    mock_trafilatura = mocker.patch('trafilatura.extract', return_value=f"Main content {'X' * EFFECTIVE_MIN_TEXT_LENGTH}")
+    before = get_download_stats()
+    text, error = extract_text_from_url(url, use_cache=False)
+    assert error is None
+    assert mock_get.call_args.kwargs["stream"] is True
+    assert mock_trafilatura.call_args.args[0] == b"a" * 60 + b"b" * 40
+    after = get_download_stats()
+    assert after["truncated"] - before["truncated"] == 1
+    assert after["bytes_downloaded"] - before["bytes_downloaded"] == 100
+    assert pop_download_sizes([url]) == {url: 100}
+    assert pop_download_sizes([url]) == {}
+
+def test_non_html_download_counted_as_aborted(mocker):
+    from modules.extractor import get_download_stats, pop_download_sizes
+    mocker.patch('modules.extractor.requests.Session.get', return_value=create_mock_response(content=b"%PDF", headers={'Content-Type': 'application/pdf'}))
+    before = get_download_stats()
+    extract_text_from_url(URL_PDF, use_cache=False)
+    assert get_download_stats()["aborted_non_html"] - before["aborted_non_html"] == 1
+    assert pop_download_sizes([URL_PDF]) == {URL_PDF: 0}
+
+# --- Tests für den Roh-HTML-Cache und abgeleitete Texte ---
+def test_raw_html_cache_allows_reextraction_without_network(mocker):
+    import modules.extractor as extractor
+    from cache_utils import load_raw_html
+    url = "https://test.raw.com/seite"
+    first_text = f"Main content {'X' * EFFECTIVE_MIN_TEXT_LENGTH}"
+    mocker.patch('modules.extractor.requests.Session.get', return_value=create_mock_response())
+    mocker.patch('trafilatura.extract', return_value=first_text)
+    assert extract_text_from_url(url, use_cache=True) == (first_text, None)
+    content, meta = load_raw_html(url + "#abschnitt") # Fragment wird beim Schlüssel ignoriert
+    assert content == DUMMY_HTML_CONTENT and meta["content_type"] == "text/html"
+
+    # Neue Extraktions-Einstellungen: Text wird aus dem Roh-HTML abgeleitet, kein Download
+    mock_get = mocker.patch('modules.extractor.requests.Session.get')
+    mocker.patch.object(extractor, 'MIN_TEXT_LENGTH', len(first_text) + 1)
+    mock_trafilatura = mocker.patch('trafilatura.extract', return_value=first_text)
+    text, error = extract_text_from_url(url, use_cache=True)
+    assert text is None and "Extrahierter Text zu kurz" in error
+    mock_get.assert_not_called(); mock_trafilatura.assert_called_once()
+
+    # Zurück zu den alten Einstellungen: abgeleitetes Ergebnis (Hash + Einstellungen) wird wiederverwendet
+    mocker.patch.object(extractor, 'MIN_TEXT_LENGTH', EFFECTIVE_MIN_TEXT_LENGTH)
+    mock_trafilatura = mocker.patch('trafilatura.extract')
+    assert extract_text_from_url(url, use_cache=True) == (first_text, None)
+    mock_get.assert_not_called(); mock_trafilatura.assert_not_called()
+
+# --- Tests für den Negativ-Cache mit TTL je Fehlerklasse ---
+@pytest.mark.parametrize("status_code, reason, error_class", [(408, "Request Timeout", "timeout"), (429, "Too Many Requests", "server_error"), (404, "Not Found", "client_error")])
+def test_transient_client_errors_get_short_ttl(status_code, reason, error_class, mocker):
+    """408/429 sind vorübergehend: kurze TTL wie Timeouts/5xx, nicht die lange TTL von client_error."""
+    import httpx
+    from cache_utils import SHORT_TTL_ERROR_CLASSES, cache_entry_ttl
+    from modules.extractor import classify_fetch_error, get_text_cache_file
+    httpx_error = httpx.HTTPStatusError(reason, request=httpx.Request("GET", "https://x.example"), response=httpx.Response(status_code))
+    assert classify_fetch_error(httpx_error) == error_class
+    url = f"https://status{status_code}.example"
+    mocker.patch('modules.extractor.requests.Session.get', return_value=create_mock_response(status_code=status_code, reason=reason))
+    extract_text_from_url(url, use_cache=True)
+    entry = load_from_cache(get_text_cache_file(url))
+    assert entry[2] == {"error_class": error_class}
+    assert (cache_entry_ttl(entry) == config.NEGATIVE_CACHE_TTL_SHORT) == (error_class in SHORT_TTL_ERROR_CLASSES)
+
+def test_negative_cache_ttl_per_error_class(mocker):
+    from modules.extractor import get_text_cache_file, get_negative_cache_stats
+    url_timeout, url_404 = "https://test.timeout.com", "https://test.gone.com"
+    mocker.patch('tenacity.nap.time.sleep', return_value=None)
+    mocker.patch('modules.extractor.requests.Session.get', side_effect=requests.exceptions.ReadTimeout("Timeout"))
+    extract_text_from_url(url_timeout, use_cache=True)
+    mocker.patch('modules.extractor.requests.Session.get', return_value=create_mock_response(status_code=404, reason="Not Found"))
+    extract_text_from_url(url_404, use_cache=True)
+    assert load_from_cache(get_text_cache_file(url_timeout))[2] == {"error_class": "timeout"}
+    assert load_from_cache(get_text_cache_file(url_404))[2] == {"error_class": "client_error"}
+
+    # Innerhalb der kurzen TTL: beide Fehler aus dem Cache, Einsparung wird gezählt
+    mock_get = mocker.patch('modules.extractor.requests.Session.get', return_value=create_mock_response())
+    before = get_negative_cache_stats()
+    extract_text_from_url(url_timeout, use_cache=True); extract_text_from_url(url_404, use_cache=True)
+    mock_get.assert_not_called()
+    after = get_negative_cache_stats()
+    assert after["timeout"] - before["timeout"] == 1 and after["client_error"] - before["client_error"] == 1
+    assert after["saved_requests"] - before["saved_requests"] == 2
+
+    # Nach der kurzen TTL wird nur der Timeout erneut abgerufen, der 404 bleibt gecacht
+    for cache_file in (get_text_cache_file(url_timeout), get_text_cache_file(url_404)):
+        old = time.time() - config.NEGATIVE_CACHE_TTL_SHORT - 60; os.utime(cache_file, (old, old))
+    assert load_from_cache(get_text_cache_file(url_timeout)) is None
+    mocker.patch('trafilatura.extract', return_value=f"Main content {'X' * EFFECTIVE_MIN_TEXT_LENGTH}")
+    assert extract_text_from_url(url_timeout, use_cache=True)[1] is None
+    assert extract_text_from_url(url_404, use_cache=True)[1].startswith("HTTP Client Fehler 404")
+    mock_get.assert_called_once()
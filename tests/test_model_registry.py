@@ -0,0 +1,62 @@
+# SEO-GAP-ANALYSIS/tests/test_model_registry.py
+import sys
+import os
+import time
+import threading
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+from modules.model_registry import ModelRegistry, resolve_model_names, preload_models_in_background
+
+class FakeModel:
+    def __init__(self, name): self.name = name
+
+@pytest.fixture
+def loads():
+    return []
+
+@pytest.fixture
+def make_registry(loads):
+    def make(max_bytes=0, sizes=None, delay=0.0, missing=()):
+        def loader(name):
+            loads.append(name); time.sleep(delay)
+            return None if name in missing else FakeModel(name)
+        return ModelRegistry(max_bytes=max_bytes, loader=loader, sizer=lambda name, nlp: (sizes or {}).get(name, 100))
+    return make
+
+def test_concurrent_requests_load_model_once(make_registry, loads):
+    registry = make_registry(delay=0.2); barrier = threading.Barrier(6); results = []
+    def request():
+        barrier.wait(); results.append(registry.get("de_core_news_sm"))
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert loads == ["de_core_news_sm"] and len({id(nlp) for nlp in results}) == 1
+    stats = registry.stats()
+    assert stats["loads"] == 1 and stats["hits"] == 5 and stats["loaded_models"] == 1
+
+def test_budget_evicts_least_recently_used_model(make_registry, loads):
+    registry = make_registry(max_bytes=250, sizes={"de": 100, "en": 100, "fr": 100})
+    registry.get("de"); registry.get("en"); registry.get("de") # en ist jetzt am längsten ungenutzt
+    registry.get("fr")
+    assert list(registry.loaded()) == ["de", "fr"] and registry.stats()["evictions"] == 1
+    registry.get("en") # erneut geladen, verdrängt de
+    assert list(registry.loaded()) == ["fr", "en"] and loads == ["de", "en", "fr", "en"]
+
+def test_single_model_above_budget_stays_loaded(make_registry):
+    registry = make_registry(max_bytes=50, sizes={"de": 100})
+    assert registry.get("de") is not None and list(registry.loaded()) == ["de"]
+
+def test_failed_load_is_not_cached(make_registry, loads):
+    registry = make_registry(missing={"xx_fehlt"})
+    assert registry.get("xx_fehlt") is None and registry.get("xx_fehlt") is None
+    assert loads == ["xx_fehlt", "xx_fehlt"] and registry.stats()["load_failures"] == 2 and registry.loaded() == {}
+
+def test_preload_resolves_language_codes(make_registry, loads, mocker):
+    registry = make_registry(); mocker.patch('modules.model_registry.get_model_registry', return_value=registry)
+    assert resolve_model_names(["de", "en", "de_core_news_sm", "eigenes_modell"]) == [config.SPACY_MODEL_MAP["de"], config.SPACY_MODEL_MAP["en"], "eigenes_modell"]
+    preload_models_in_background(["de", "en"]).join()
+    assert sorted(loads) == sorted([config.SPACY_MODEL_MAP["de"], config.SPACY_MODEL_MAP["en"]])
+    assert preload_models_in_background([]) is None
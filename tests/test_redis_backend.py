@@ -0,0 +1,175 @@
+# SEO-GAP-ANALYSIS/tests/test_redis_backend.py
+import sys
+import os
+import time
+import fnmatch
+import threading
+import socketserver
+from collections import Counter
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+import cache_backends
+from cache_backends import RedisCacheBackend, get_cache_backend
+from cache_utils import get_cache_key, get_cache_path, save_to_cache, load_from_cache, is_cache_valid, touch_cache, cache_statistics, get_cache_tier_stats, await_shared_fill
+from resp_client import RespClient, RespError, encode_command
+
+@pytest.fixture(autouse=True)
+def forget_backends(mocker):
+    """Jeder Test bekommt eigene Backend-Instanzen (neuer Server-Port)."""
+    mocker.patch.object(cache_backends, '_backends', {})
+
+# --- In-Process-Stand-in für einen Redis-Server (nur die vom Backend genutzten Befehle) ---
+class StandInRedis(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True; daemon_threads = True
+
+    def __init__(self, get_delay: float = 0.0):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.data = {}; self.lock = threading.Lock(); self.calls = Counter(); self.get_delay = get_delay; self.fail_sets = False
+
+    def value(self, key):
+        entry = self.data.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.time(): del self.data[key]; return None
+        return entry[0] if entry else None
+
+class StandInHandler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line: return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2]); args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        while (args := self.read_command()) is not None:
+            self.wfile.write(self.reply(args[0].decode().upper(), args[1:]))
+
+    def reply(self, name, args):
+        server = self.server; server.calls[name] += 1
+        if name == "GET" and server.get_delay: time.sleep(server.get_delay)
+        with server.lock:
+            if name == "PING": return b"+PONG\r\n"
+            if name == "GET": return bulk(server.value(args[0]))
+            if name == "MGET": return b"*%d\r\n" % len(args) + b"".join(bulk(server.value(key)) for key in args)
+            if name == "SET" and server.fail_sets: return b"-OOM command not allowed when used memory > 'maxmemory'\r\n"
+            if name == "SET":
+                options = [arg.decode().upper() for arg in args[2:]]
+                if "NX" in options and server.value(args[0]) is not None: return b"$-1\r\n"
+                expires = time.time() + int(options[options.index("PX") + 1]) / 1000 if "PX" in options else None
+                server.data[args[0]] = (args[1], expires); return b"+OK\r\n"
+            if name == "DEL": return b":%d\r\n" % sum(1 for key in args if server.value(key) is not None and server.data.pop(key))
+            if name == "EVAL" and args[0].decode() == RedisCacheBackend.RELEASE_LEASE_SCRIPT: # nur das Freigabe-Skript
+                owned = server.value(args[2]) == args[3]
+                return b":%d\r\n" % (1 if owned and server.data.pop(args[2]) else 0)
+            if name == "GETRANGE":
+                value = server.value(args[0]) or b""; return bulk(value[int(args[1]):int(args[2]) + 1])
+            if name == "STRLEN": return b":%d\r\n" % len(server.value(args[0]) or b"")
+            if name == "SCAN":
+                pattern = args[args.index(b"MATCH") + 1].decode()
+                keys = [key for key in list(server.data) if server.value(key) is not None and fnmatch.fnmatchcase(key.decode(), pattern)]
+                return b"*2\r\n$1\r\n0\r\n*%d\r\n" % len(keys) + b"".join(bulk(key) for key in keys)
+        return b"-ERR unknown command '%s'\r\n" % name.encode()
+
+def bulk(value):
+    return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+@pytest.fixture
+def redis_server(mocker, tmp_path):
+    server = StandInRedis(); threading.Thread(target=server.serve_forever, daemon=True).start()
+    mocker.patch.object(config, 'CACHE_DIR', str(tmp_path)); mocker.patch.object(config, 'CACHE_BACKEND', 'redis')
+    mocker.patch.object(config, 'CACHE_REDIS_URL', f"redis://127.0.0.1:{server.server_address[1]}/0")
+    mocker.patch.object(config, 'CACHE_FILL_LEASE_SECONDS', 5)
+    yield server
+    server.shutdown(); server.server_close()
+
+def test_resp_client_encoding_and_errors(redis_server):
+    assert encode_command(["SET", "k", b"\x00v"]) == b"*3\r\n$3\r\nSET\r\n$1\r\nk\r\n$2\r\n\x00v\r\n"
+    client = RespClient(config.CACHE_REDIS_URL)
+    assert client.execute("PING") == "PONG" and client.execute("SET", "k", b"\x00v") == "OK" and client.execute("GET", "k") == b"\x00v"
+    with pytest.raises(RespError): client.execute("FLUSHALL")
+    client.close(); assert client.execute("GET", "fehlt") is None # neue Verbindung nach close
+
+def test_redis_backend_async_writes_shared_between_nodes(redis_server):
+    cache_file = get_cache_path("serp_v2", "abc")
+    node_a = get_cache_backend(); node_b = RedisCacheBackend(config.CACHE_REDIS_URL, config.CACHE_REDIS_PREFIX)
+    assert isinstance(node_a, RedisCacheBackend) and node_a is get_cache_backend()
+    save_to_cache({"organic_results": [], "related_questions": []}, cache_file)
+    assert load_from_cache(cache_file)["organic_results"] == [] # lokal sofort lesbar, auch vor dem Schreiben
+    node_a.flush_writes()
+    assert node_b.read(cache_file) is not None and is_cache_valid(cache_file) and not os.path.exists(cache_file)
+    stored_at = node_b.stored_at(cache_file); time.sleep(0.01)
+    assert touch_cache(cache_file); node_a.flush_writes()
+    assert node_b.stored_at(cache_file) > stored_at
+    stats = cache_statistics()
+    assert stats["serp_v2"]["entries"] == 1 and stats["serp_v2"]["bytes"] > 0
+    assert node_a.delete(cache_file) and node_b.read(cache_file) is None
+
+def test_redis_backend_coalesces_concurrent_reads(redis_server):
+    backend = get_cache_backend(); cache_file = get_cache_path("text_v2", "x")
+    backend.write(cache_file, b"payload", 60); backend.flush_writes()
+    redis_server.get_delay = 0.2; redis_server.calls.clear(); barrier = threading.Barrier(8); results = []
+    def reader():
+        barrier.wait(); results.append(backend.read(cache_file)[0])
+    threads = [threading.Thread(target=reader) for _ in range(8)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert results == [b"payload"] * 8 and redis_server.calls["GET"] < 8
+
+def test_concurrent_serp_misses_fetch_origin_once(redis_server, mocker):
+    from modules.serp_api import get_serp_results
+    mocker.patch.object(config, 'SERP_API_KEY', 'test')
+    calls = []
+    def slow_api(url, params):
+        calls.append(params["q"]); time.sleep(0.3)
+        response = mocker.MagicMock(); response.json.return_value = {"organic_results": [{"title": "T", "link": "https://a.example/"}]}
+        return response
+    mocker.patch('modules.serp_api._make_serp_api_request', side_effect=slow_api)
+    before = get_cache_tier_stats(); results = []
+    threads = [threading.Thread(target=lambda: results.append(get_serp_results("keyword", 10, True, "de"))) for _ in range(4)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert len(calls) == 1 and all(result["organic_results"] == [{"title": "T", "url": "https://a.example/"}] for result in results)
+    after = get_cache_tier_stats()
+    assert after["shared_fill_leases"] - before["shared_fill_leases"] == 1 and after["shared_fill_waits"] - before["shared_fill_waits"] == 3
+
+def test_content_addressed_entries_have_no_server_expiry(redis_server):
+    backend = get_cache_backend()
+    save_to_cache("Text", get_cache_path("content_v1", "h")); save_to_cache(["Text", None], get_cache_path("text_v2", "u"))
+    backend.flush_writes()
+    expiry = {key.decode().split("_v")[0]: expires for key, (_, expires) in redis_server.data.items()}
+    assert expiry[config.CACHE_REDIS_PREFIX + "content"] is None and expiry[config.CACHE_REDIS_PREFIX + "text"] is not None
+
+def test_lease_release_keeps_lease_taken_over_by_other_node(redis_server):
+    cache_file = get_cache_path("serp_v2", "lease")
+    node_a = get_cache_backend(); node_b = RedisCacheBackend(config.CACHE_REDIS_URL, config.CACHE_REDIS_PREFIX)
+    assert node_a.acquire_lease(cache_file, 0.05); time.sleep(0.1) # Lease von A abgelaufen
+    assert node_b.acquire_lease(cache_file, 5)
+    node_a.release_lease(cache_file); node_a.write(cache_file, b"spaet", 60); node_a.flush_writes()
+    assert not node_a.acquire_lease(cache_file, 5) # B hält die Lease weiterhin
+    node_b.release_lease(cache_file)
+    assert node_a.acquire_lease(cache_file, 5)
+
+def test_wait_for_other_node_is_bounded(redis_server, mocker):
+    mocker.patch.object(config, 'CACHE_FILL_WAIT_SECONDS', 0.3)
+    cache_file = get_cache_path("serp_v2", "langsam"); other = RedisCacheBackend(config.CACHE_REDIS_URL, config.CACHE_REDIS_PREFIX)
+    assert other.acquire_lease(cache_file, 5)
+    started = time.monotonic()
+    assert await_shared_fill(cache_file) is None and time.monotonic() - started < 1 # fülle selbst statt CACHE_FILL_LEASE_SECONDS zu warten
+
+def test_failed_batch_is_counted_and_releases_leases(redis_server):
+    backend = get_cache_backend(); cache_file = get_cache_path("serp_v2", "voll")
+    assert backend.acquire_lease(cache_file, 5)
+    redis_server.fail_sets = True; backend.write(cache_file, b"x", 60); backend.flush_writes()
+    assert get_cache_tier_stats()["shared_write_failures"] == 1 and backend.read(cache_file) is None
+    redis_server.fail_sets = False
+    assert RedisCacheBackend(config.CACHE_REDIS_URL, config.CACHE_REDIS_PREFIX).acquire_lease(cache_file, 5) # Lease freigegeben
+
+def test_serp_without_api_key_releases_lease(redis_server, mocker):
+    from modules.serp_api import get_serp_results
+    mocker.patch.object(config, 'SERP_API_KEY', None)
+    assert get_serp_results("ohne key", 10, True, "de")["error"]
+    cache_file = get_cache_path("serp_v2", get_cache_key("serp_v2", "ohne key", 10, "de"))
+    assert RedisCacheBackend(config.CACHE_REDIS_URL, config.CACHE_REDIS_PREFIX).acquire_lease(cache_file, 5)
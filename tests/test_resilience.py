@@ -0,0 +1,87 @@
+# SEO-GAP-ANALYSIS/tests/test_resilience.py
+import sys
+import os
+import time
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_none
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import modules.resilience as resilience
+from modules.resilience import CircuitBreaker, CircuitOpenError, RetryBudget, retry_within_budget, start_retry_budget, get_resilience_stats
+from modules.run_context import submit_in_context
+
+@pytest.fixture(autouse=True)
+def fresh_breaker(mocker):
+    mocker.patch.object(resilience, '_circuit_breaker', CircuitBreaker(failure_threshold=2, cooldown_seconds=0.1))
+    token = resilience._run_budget.set(None) # Budget früherer Tests nicht übernehmen
+    yield
+    resilience._run_budget.reset(token)
+
+def test_circuit_breaker_open_half_open_closed():
+    breaker = resilience.get_circuit_breaker(); started = time.time()
+    breaker.record_failure("down.example"); breaker.before_call("down.example") # noch geschlossen
+    breaker.record_failure("down.example")
+    with pytest.raises(CircuitOpenError): breaker.before_call("down.example")
+    assert breaker.states() == {"down.example": "open"}
+    time.sleep(0.12)
+    breaker.before_call("down.example") # Probeaufruf (half_open)
+    with pytest.raises(CircuitOpenError): breaker.before_call("down.example") # nur ein Probeaufruf gleichzeitig
+    breaker.record_success("down.example")
+    breaker.before_call("down.example")
+    assert [(e["from"], e["to"]) for e in breaker.events_since(started)] == [("closed", "open"), ("open", "half_open"), ("half_open", "closed")]
+
+def test_failed_trial_reopens_circuit():
+    breaker = resilience.get_circuit_breaker()
+    for _ in range(2): breaker.record_failure("flaky.example")
+    time.sleep(0.12); breaker.before_call("flaky.example"); breaker.record_failure("flaky.example")
+    with pytest.raises(CircuitOpenError): breaker.before_call("flaky.example")
+
+def test_retry_budget_limits_total_attempts():
+    budget = RetryBudget(3)
+    assert [budget.try_consume() for _ in range(5)] == [True, True, True, False, False]
+    assert budget.summary() == {"limit": 3, "used": 3, "denied": 2}
+
+def test_retry_within_budget_stops_tenacity_retries():
+    calls = []
+    @retry(stop=stop_after_attempt(5), wait=wait_none(), retry=retry_if_exception_type(ConnectionError) & retry_within_budget(), reraise=True)
+    def flaky(url):
+        calls.append(url); raise ConnectionError("weg")
+    budget = start_retry_budget(2); before = get_resilience_stats()
+    with pytest.raises(ConnectionError): flaky("https://a.example/")
+    assert len(calls) == 3 and budget.summary()["used"] == 2
+    with pytest.raises(ConnectionError): flaky("https://b.example/") # Budget erschöpft: kein Retry mehr
+    assert len(calls) == 4
+    after = get_resilience_stats()
+    assert after["retries_used"] - before["retries_used"] == 2
+    assert after["retries_denied"] - before["retries_denied"] == 2 # dritter Fehler bei a und erster bei b
+
+def test_retry_budgets_of_parallel_runs_are_separate():
+    @retry(stop=stop_after_attempt(10), wait=wait_none(), retry=retry_if_exception_type(ConnectionError) & retry_within_budget(), reraise=True)
+    def flaky(url):
+        raise ConnectionError("weg")
+    barrier = threading.Barrier(2); budgets = {}
+    def run(name: str, limit: int):
+        budgets[name] = start_retry_budget(limit); barrier.wait() # beide Läufe haben ihr Budget gesetzt
+        with ThreadPoolExecutor(max_workers=2) as pool: # Worker übernehmen das Budget ihres Laufs
+            for future in [submit_in_context(pool, flaky, f"https://{name}.example/{i}") for i in range(2)]:
+                with pytest.raises(ConnectionError): future.result()
+    threads = [threading.Thread(target=run, args=("a", 3)), threading.Thread(target=run, args=("b", 5))]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    assert budgets["a"].summary() == {"limit": 3, "used": 3, "denied": 2}
+    assert budgets["b"].summary() == {"limit": 5, "used": 5, "denied": 2}
+    assert resilience._run_budget.get() is None # der aufrufende Kontext bleibt unberührt
+
+def test_extractor_fails_fast_on_open_circuit(mocker, tmp_path):
+    import config
+    from modules.extractor import extract_text_from_url, get_text_cache_file
+    mocker.patch.object(config, 'CACHE_DIR', str(tmp_path))
+    for _ in range(2): resilience.get_circuit_breaker().record_failure("down.example")
+    mock_get = mocker.patch('modules.extractor.requests.Session.get')
+    text, error = extract_text_from_url("https://down.example/seite", use_cache=True)
+    assert text is None and error.startswith("Netzwerkfehler (Circuit offen)")
+    mock_get.assert_not_called()
+    assert not os.path.exists(get_text_cache_file("https://down.example/seite")) # Sperre wird nicht gecacht
@@ -147,7 +147,7 @@ def test_get_serp_results_caching(mocker, tmp_path):
     cache_file = get_cache_path("serp_v2", cache_key, extension="json")
     assert os.path.exists(cache_file)
     # Lade und vergleiche den Inhalt (ignoriere 'error'-Key, falls er None ist)
-    with open(cache_file, 'r') as f: cached_data = json.load(f)
+    cached_data = load_from_cache(cache_file) # komprimiertes Cache-Format
     assert cached_data["organic_results"] == results1["organic_results"]
     assert cached_data["related_questions"] == results1["related_questions"]
 
@@ -158,4 +158,20 @@ def test_get_serp_results_caching(mocker, tmp_path):
     assert results2["organic_results"] == results1["organic_results"]
     assert results2["related_questions"] == results1["related_questions"]
     assert results2["error"] is None
-    mock_get2.assert_not_called()
\ No newline at end of file
+    mock_get2.assert_not_called()
+
+def test_clear_cache_for_query_removes_serp_entry(mocker):
+    """clear_cache_for_query löscht den Eintrag, den get_serp_results schreibt (Platte und Speicher-Stufe)."""
+    mocker.patch.object(config, 'MEMORY_CACHE_BYTES', 1024 * 1024)
+    mock_response = MagicMock(spec=requests.Response); mock_response.status_code = 200
+    mock_response.json.return_value = MOCK_SUCCESS_RESPONSE_JSON; mock_response.raise_for_status = MagicMock()
+    mock_get = mocker.patch('modules.serp_api.requests.get', return_value=mock_response)
+    config.SERP_API_KEY = "dummy_test_key"; query = "cache test query"
+    cache_file = get_cache_path("serp_v2", get_cache_key("serp_v2", query, 2, "en"), extension="json")
+
+    get_serp_results(query, num_results=2, use_cache=True, language="en")
+    assert load_from_cache(cache_file) is not None
+    clear_cache_for_query(query, 2, "en")
+    assert load_from_cache(cache_file) is None and not os.path.exists(cache_file)
+    get_serp_results(query, num_results=2, use_cache=True, language="en")
+    assert mock_get.call_count == 2 # nach dem Löschen wieder von der API
@@ -0,0 +1,40 @@
+# SEO-GAP-ANALYSIS/tests/test_skip_list.py
+import sys
+import os
+import json
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import config
+from modules.skip_list import OutcomeStore, url_patterns, plan_urls, is_transient_error
+from modules.extractor import describe_deadline_error
+
+def test_url_patterns():
+    assert url_patterns("https://www.example.com/") == ["domain:example.com"]
+    assert url_patterns("https://shop.example.com/kategorie/schuhe.html") == ["domain:example.com", "path:shop.example.com/kategorie"]
+    assert url_patterns("https://example.com/downloads/Preisliste.PDF") == ["domain:example.com", "ext:pdf", "path:example.com/downloads"]
+
+def test_transient_errors_are_not_learned():
+    assert is_transient_error(describe_deadline_error(5)) and is_transient_error("Netzwerkfehler: Timeout")
+    assert not is_transient_error("Trafilatura konnte keinen Hauptinhalt extrahieren.")
+
+def test_plan_urls_skips_and_deprioritises(tmp_path, mocker):
+    mocker.patch.object(config, 'SKIP_MIN_ATTEMPTS', 3); mocker.patch.object(config, 'SKIP_SUCCESS_THRESHOLD', 0.2)
+    store = OutcomeStore(str(tmp_path / "skip.json"))
+    for _ in range(4): store.record("https://www.youtube.com/watch?v=x", False)
+    for success in (True, False, False): store.record("https://shop.example.org/kategorie/a", success)
+    urls = ["https://shop.example.org/kategorie/b", "https://youtube.com/watch?v=y", "https://neu.example/"]
+    to_fetch, skipped = plan_urls(urls, store)
+    assert to_fetch == ["https://neu.example/", "https://shop.example.org/kategorie/b"] # schwaches Muster zuletzt
+    assert skipped[0][0] == "https://youtube.com/watch?v=y" and "domain:youtube.com" in skipped[0][1]
+
+def test_outcome_store_persists_and_expires(tmp_path, mocker):
+    mocker.patch.object(config, 'SKIP_MIN_ATTEMPTS', 1)
+    path = str(tmp_path / "skip.json")
+    store = OutcomeStore(path); store.record("https://login.example/", False); store.save()
+    assert OutcomeStore(path).success_rate("https://login.example/") == (0.0, "domain:login.example")
+    with open(path, encoding='utf-8') as f: data = json.load(f)
+    data["domain:login.example"][2] = time.time() - config.NEGATIVE_CACHE_TTL_LONG - 60
+    with open(path, 'w', encoding='utf-8') as f: json.dump(data, f)
+    assert OutcomeStore(path).success_rate("https://login.example/") == (1.0, None) # veraltet: neue Chance
@@ -3,6 +3,7 @@ import sys
 import os
 import pytest
 import spacy
+from spacy.lookups import Lookups
 import pandas as pd
 import re
 
@@ -14,10 +15,18 @@ import config
 from modules.tf_idf import (
     load_spacy_model,
     preprocess_text,
+    preprocess_texts,
+    analyze_texts,
     extract_entities,
     perform_tf_idf_analysis,
     perform_sentiment_analysis # Import für separaten Sentiment-Test
 )
+import modules.tf_idf as tfidf_module
+
+@pytest.fixture(autouse=True)
+def isolated_nlp_cache(tmp_path, mocker):
+    """NLP-Cache-Einträge der Tests landen im Testverzeichnis statt in output/cache."""
+    mocker.patch.object(config, 'CACHE_DIR', str(tmp_path)); mocker.patch.object(config, 'CACHE_BACKEND', 'file')
 
 # Lade Spacy Modell einmal pro Sitzung (schneller)
 SPACY_MODEL_NAME = config.SPACY_MODEL_MAP.get(config.LANGUAGE, "de_core_news_sm")
@@ -32,6 +41,39 @@ def nlp_de():
     print(f"Spacy Modell '{SPACY_MODEL_NAME}' erfolgreich geladen.")
     return nlp
 
+# Kleine deutsche Pipeline ohne Modell-Download (läuft in CI): Wortarten per attribute_ruler, Lookup-Lemmatizer,
+# EntityRuler als "ner" und ein nie ausgeführter "parser". Wort -> (Wortart, Lemma)
+FIXTURE_LEXICON = {
+    "Dies": ("PRON", "dies"), "einfacher": ("ADJ", "einfach"), "Test": ("NOUN", "Test"), "NurStoppWörter": ("NOUN", "NurStoppWörter"),
+    "Katze": ("NOUN", "Katze"), "jagt": ("VERB", "jagen"), "Mäuse": ("NOUN", "Maus"), "Garten": ("NOUN", "Garten"),
+    "Analysieren": ("VERB", "analysieren"), "Sätze": ("NOUN", "Satz"), "URLs": ("NOUN", "URLs"), "https://example.com": ("PROPN", "https://example.com"),
+    "123": ("NUM", "123"), "E-Mail": ("NOUN", "E-Mail"), "Mail": ("NOUN", "Mail"), "Adresse": ("NOUN", "Adresse"), "prüfen": ("VERB", "prüfen"),
+    "Groß-": ("ADJ", "groß"), "Kleinschreibung": ("NOUN", "Kleinschreibung"), "Deutsche": ("PROPN", "Deutsche"), "Bahn": ("PROPN", "Bahn"),
+    "fährt": ("VERB", "fahren"), "Berlin": ("PROPN", "Berlin"), "Apollo": ("PROPN", "Apollo"), "11": ("NUM", "11"), "flog": ("VERB", "fliegen"),
+    "Mond": ("NOUN", "Mond"), "Covid-19": ("PROPN", "Covid-19"),
+}
+FIXTURE_ENTITIES = [{"label": "ORG", "pattern": "Deutsche Bahn"}, {"label": "LOC", "pattern": "Berlin"}, {"label": "ORG", "pattern": "Apollo 11"}]
+
+@pytest.fixture(scope='session')
+def nlp_fixture():
+    nlp = spacy.blank("de"); nlp.meta["name"] = "test_fixture"
+    tagger = nlp.add_pipe("attribute_ruler", name="tagger")
+    for word, (pos, _) in FIXTURE_LEXICON.items(): tagger.add([[{"ORTH": word}]], {"POS": pos})
+    nlp.add_pipe("sentencizer", name="parser")
+    lookups = Lookups(); lookups.add_table("lemma_lookup", {word: lemma for word, (_, lemma) in FIXTURE_LEXICON.items()})
+    nlp.add_pipe("lemmatizer", config={"mode": "lookup"}).initialize(lookups=lookups)
+    nlp.add_pipe("entity_ruler", name="ner").add_patterns(FIXTURE_ENTITIES)
+    return nlp
+
+@pytest.fixture(params=["fixture", "model"])
+def nlp_any(request):
+    """Äquivalenztests laufen immer mit der Fixture-Pipeline und zusätzlich mit dem echten Modell, falls installiert."""
+    return request.getfixturevalue("nlp_fixture" if request.param == "fixture" else "nlp_de")
+
+EQUIVALENCE_TEXTS = ["Die Katze jagt Mäuse im Garten.", "", "Analysieren wir 123 Sätze mit URLs wie https://example.com!",
+                     "E-Mail Adresse prüfen.", "Die Katze jagt Mäuse im Garten.", "Groß- und Kleinschreibung.",
+                     "Die Deutsche Bahn fährt nach Berlin, Apollo 11 flog zum Mond. Covid-19 in Berlin."]
+
 # --- Tests für Hilfsfunktionen ---
 
 def test_load_spacy_model_success(nlp_de):
@@ -45,8 +87,7 @@ def test_load_spacy_model_fail():
     nlp = load_spacy_model("invalid_model_name_xyz")
     assert nlp is None
 
-# Testfälle für preprocess_text
-@pytest.mark.usefixtures("nlp_de")
+# Testfälle für preprocess_text (Erwartungen des ursprünglichen Filters; laufen auch mit der Fixture-Pipeline)
 @pytest.mark.parametrize("input_text, expected_output", [
     ("Dies ist ein einfacher Test.", "einfach test"),
     ("Die Katze jagt Mäuse im Garten.", "katze jagen maus garten"),
@@ -57,15 +98,99 @@ def test_load_spacy_model_fail():
     # KORREKTUR: Erwartung an tatsächliches Ergebnis angepasst
     ("E-Mail Adresse prüfen.", "mail adresse prüfen"),
 ])
-def test_preprocess_text(nlp_de, input_text, expected_output):
+def test_preprocess_text(nlp_any, input_text, expected_output):
     """Testet die korrigierte preprocess_text Funktion."""
-    actual_output = preprocess_text(input_text, nlp_de)
+    actual_output = preprocess_text(input_text, nlp_any)
     if actual_output != expected_output:
         print(f"\nInput:    '{input_text}'")
         print(f"Expected: '{expected_output}'")
         print(f"Actual:   '{actual_output}'")
     assert actual_output == expected_output
 
+def test_fixture_pipeline_tokens(nlp_fixture):
+    assert preprocess_text(EQUIVALENCE_TEXTS[-1], nlp_fixture) == "deutsche bahn fahren berlin apollo fliegen mond covid berlin"
+    assert extract_entities(EQUIVALENCE_TEXTS[-1], nlp_fixture) == [("Berlin", "LOC", 2), ("Deutsche Bahn", "ORG", 1), ("Apollo 11", "ORG", 1)]
+
+@pytest.mark.parametrize("n_process", [1, 2])
+def test_preprocess_texts_matches_preprocess_text(nlp_any, n_process):
+    """Batch-Vorverarbeitung über nlp.pipe liefert exakt dieselben Tokens wie preprocess_text, in Eingabereihenfolge."""
+    assert preprocess_texts(EQUIVALENCE_TEXTS, nlp_any, batch_size=2, n_process=n_process) == [preprocess_text(text, nlp_any) for text in EQUIVALENCE_TEXTS]
+
+def test_single_pass_matches_separate_calls(nlp_any):
+    """analyze_texts mit NER = preprocess_text und extract_entities je Text (ein Durchlauf statt zwei)."""
+    expected = [(preprocess_text(text, nlp_any), extract_entities(text, nlp_any)) for text in EQUIVALENCE_TEXTS]
+    assert analyze_texts(EQUIVALENCE_TEXTS, nlp_any, include_ner=True) == expected
+
+@pytest.mark.parametrize("include_ner", [False, True])
+def test_reduced_pipeline_matches_full_pipeline(nlp_any, include_ner, mocker):
+    """Ohne Parser (und ohne NER, wenn nicht gebraucht) entstehen dieselben Lemmata und Entitäten wie mit allen Komponenten."""
+    mocker.patch.object(config, 'NLP_CACHE_ENABLED', False)
+    reduced = analyze_texts(EQUIVALENCE_TEXTS, nlp_any, include_ner=include_ner)
+    mocker.patch.object(tfidf_module, 'disabled_components', lambda nlp, include_ner=False: [])
+    assert analyze_texts(EQUIVALENCE_TEXTS, nlp_any, include_ner=include_ner) == reduced
+
+def test_cached_analysis_matches_fresh_analysis(nlp_any, mocker):
+    """Ergebnisse aus dem NLP-Cache sind identisch mit einer frischen Verarbeitung."""
+    fresh = analyze_texts(EQUIVALENCE_TEXTS, nlp_any, include_ner=True)
+    pipe = mocker.spy(tfidf_module, "_pipe_docs")
+    assert analyze_texts(EQUIVALENCE_TEXTS, nlp_any, include_ner=True) == fresh and analyze_texts(EQUIVALENCE_TEXTS, nlp_any) == [(tokens, None) for tokens, _ in fresh]
+    assert pipe.call_count == 0
+
+def test_preprocess_texts_batches_unique_texts(mocker):
+    """Ohne echtes Modell: bereinigte, eindeutige Texte gehen in einem nlp.pipe-Aufruf an Spacy."""
+    nlp = spacy.blank("de"); pipe = mocker.spy(tfidf_module, "_pipe_docs")
+    assert preprocess_texts(["a 1 b", "", "a 1 b", "c-d"], nlp, batch_size=8, n_process=4) == ["", "", "", ""]
+    assert pipe.call_count == 1 and pipe.call_args.args[2:4] == (8, 1) # 2 Texte -> ein Batch, ein Prozess
+
+def test_analyze_texts_entities_from_single_pass_use_original_text(mocker):
+    """Entitäten entstehen im selben nlp.pipe-Durchlauf wie die Lemmata, auf dem Originaltext (Ziffern und Bindestriche bleiben)."""
+    nlp = spacy.blank("de"); ruler = nlp.add_pipe("entity_ruler", name="ner")
+    ruler.add_patterns([{"label": "LOC", "pattern": "Baden-Württemberg"}, {"label": "ORG", "pattern": "Bahn"}, {"label": "ORG", "pattern": "Apollo 11"}])
+    pipe = mocker.spy(tfidf_module, "_pipe_docs")
+    text = "Urlaub in Baden-Württemberg 2024: https://bahn.example/x Bahn  und Baden-Württemberg mit Apollo 11!"
+    assert analyze_texts([text, ""], nlp, include_ner=True) == [("", [("Baden-Württemberg", "LOC", 2), ("Bahn", "ORG", 1), ("Apollo 11", "ORG", 1)]), ("", [])]
+    assert pipe.call_count == 1
+    assert analyze_texts([text], nlp) == [("", None)] # ohne NER keine Entitäten
+
+def test_lemmas_are_cleaned_per_token():
+    """URLs, Zahlen, Bindestriche und Anführungszeichen werden pro Lemma entfernt; zerlegte Teile durchlaufen erneut den Stoppwortfilter."""
+    nlp = spacy.blank("de"); ruler = nlp.add_pipe("attribute_ruler")
+    for word, pos, lemma in [("E-Mail", "NOUN", "E-Mail"), ("Covid-19", "PROPN", "Covid-19"), ("https://example.com", "PROPN", "https://example.com"),
+                             ("2024", "NUM", "2024"), ("Oder-Brücke", "NOUN", "oder-Brücke"), ("Adresse", "NOUN", "Adresse"), ("prüfen", "VERB", "prüfen")]:
+        ruler.add([[{"ORTH": word}]], {"POS": pos, "LEMMA": lemma})
+    assert preprocess_text("E-Mail Adresse prüfen https://example.com 2024 Covid-19 Oder-Brücke", nlp) == "mail adresse prüfen covid brücke"
+
+@pytest.mark.parametrize("include_ner", [False, True])
+def test_analyze_texts_runs_only_needed_components(include_ner):
+    """Parser läuft nie, NER nur mit include_ner; die Zeiten je Komponente landen in get_nlp_stats."""
+    nlp = spacy.blank("de"); nlp.add_pipe("sentencizer", name="parser")
+    nlp.add_pipe("entity_ruler", name="ner").add_patterns([{"label": "ORG", "pattern": "Bahn"}])
+    assert tfidf_module.disabled_components(nlp, include_ner=include_ner) == (["parser"] if include_ner else ["parser", "ner"])
+    before = tfidf_module.get_nlp_stats()
+    result = analyze_texts(["Die Bahn fährt. Die Bahn hält.", "Noch ein Satz."], nlp, include_ner=include_ner)
+    assert result[0][1] == ([("Bahn", "ORG", 2)] if include_ner else None)
+    after = tfidf_module.get_nlp_stats()
+    assert after["docs"] - before.get("docs", 0) == 2 and "seconds_tokenizer" in after
+    assert after.get("seconds_parser", 0) == before.get("seconds_parser", 0)
+    assert (after.get("seconds_ner", 0) > before.get("seconds_ner", 0)) == include_ner
+
+def test_analyze_texts_cached_by_content_and_model(mocker):
+    """Zweiter Lauf über dieselben Texte kommt ohne Spacy aus; NER-Läufe brauchen Einträge mit Entitäten, neue Modellversion = Miss."""
+    nlp = spacy.blank("de"); nlp.add_pipe("entity_ruler", name="ner").add_patterns([{"label": "ORG", "pattern": "Bahn"}])
+    texts = ["Die Bahn fährt.", "Noch ein Satz.", "Die Bahn fährt."]
+    pipe = mocker.spy(tfidf_module, "_pipe_docs"); before = tfidf_module.get_nlp_stats()
+    first = analyze_texts(texts, nlp)
+    assert analyze_texts(texts, nlp) == first and pipe.call_count == 1
+    with_ner = analyze_texts(texts, nlp, include_ner=True) # Eintrag ohne Entitäten -> neu verarbeitet
+    assert with_ner[0][1] == [("Bahn", "ORG", 1)] and pipe.call_count == 2
+    assert analyze_texts(texts, nlp, include_ner=True) == with_ner and analyze_texts(texts, nlp) == first and pipe.call_count == 2
+    after = tfidf_module.get_nlp_stats()
+    assert after["cache_hits"] - before.get("cache_hits", 0) == 6 and after["cache_misses"] - before.get("cache_misses", 0) == 4
+    nlp.meta["version"] = "9.9.9"; analyze_texts(texts, nlp)
+    assert pipe.call_count == 3
+    mocker.patch.object(config, 'NLP_CACHE_ENABLED', False); analyze_texts(texts, nlp)
+    assert pipe.call_count == 4
+
 @pytest.mark.usefixtures("nlp_de")
 def test_extract_entities_simple(nlp_de):
     """Testet die Entitätserkennung (realistischere Erwartung für sm-Modell)."""